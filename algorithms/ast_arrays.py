@@ -0,0 +1,144 @@
+"""
+Массивы AST в прямом порядке обхода (ASTArrays) и структурное сравнение по ним (compare_ast_arrays).
+Это другая, более грубая метрика, чем ASTComparator и compare_asts из ast_find, а не их ускоренный вариант:
+сравниваются только типы узлов, дочерние узлы сопоставляются по порядку в общем списке детей узла
+(без разбиения по полям), а значения полей, не являющиеся узлами (None, константы), не учитываются.
+Поэтому проценты в общем случае отличаются: например, heapq.py и textwrap.py из стандартной библиотеки
+дают 74.65 % против 72.86 % у compare_asts. Выигрыш массивов - в повторном использовании: их можно хранить
+в кэше (ASTCache) и передавать движкам n-грамм и Greedy String Tiling как последовательность токенов.
+"""
+import os
+import numpy as np
+from algorithms.ast_cache import AST_TYPE_NAMES, FlatAST
+from algorithms.ast_find import get_ast_from_file
+
+
+class ASTArrays:
+    """
+    AST в виде массивов NumPy в прямом порядке обхода: код типа узла (AST_TYPE_NAMES), число дочерних узлов,
+    глубина, размер поддерева и номер родителя (-1 у корня). Поддерево узла i занимает отрезок [i, i + sizes[i]).
+    Дочерние узлы каждого узла доступны через массив children и смещения child_offsets;
+    first_lines и last_lines - диапазоны строк узлов (0 у узлов без позиции), если они известны.
+    Узел занимает несколько десятков байт вместо сотен у объектов ast.
+    """
+
+    def __init__(self, types, child_counts, first_lines=None, last_lines=None):
+        self.types = np.asarray(types, dtype=np.int32)
+        self.child_counts = np.asarray(child_counts, dtype=np.int64)
+        self.first_lines = None if first_lines is None else np.asarray(first_lines, dtype=np.int32)
+        self.last_lines = None if last_lines is None else np.asarray(last_lines, dtype=np.int32)
+        count = len(self.types)
+        indices = np.arange(count, dtype=np.int64)
+        # Баланс незанятых мест для дочерних узлов перед каждым узлом (слово Лукасевича): поддерево узла i
+        # заканчивается там, где баланс впервые опускается до balance[i] - 1, так как каждый узел
+        # занимает одно место и открывает child_counts мест
+        balance = np.concatenate(([0], np.cumsum(self.child_counts - 1)))
+        # Конец поддерева - первая позиция после i с балансом balance[i] - 1: поиск по ключам (баланс, позиция),
+        # упорядоченным по возрастанию; баланс не меньше -1, поэтому ключи неотрицательны
+        width = count + 1
+        keys = np.sort((balance + 1) * width + np.arange(width))
+        ends = keys[np.searchsorted(keys, balance[:-1] * width + indices, side="right")] % width
+        self.sizes = ends - indices
+        # Глубина - число поддеревьев предков, покрывающих узел: +1 после корня поддерева, -1 после его конца
+        steps = np.bincount(indices + 1, minlength=width + 1) - np.bincount(ends, minlength=width + 1)
+        self.depths = np.cumsum(steps)[:count]
+        # Родитель - ближайший предыдущий узел на уровень выше: поиск по ключам (глубина, позиция)
+        depth_keys = self.depths * width + indices
+        order = np.sort(depth_keys)
+        parents = order[np.searchsorted(order, (self.depths - 1) * width + indices) - 1] % width
+        self.parents = np.where(self.depths > 0, parents, -1)
+        self.children = np.argsort(self.parents[1:], kind="stable") + 1
+        self.child_offsets = np.concatenate(([0], np.cumsum(self.child_counts)[:-1])).astype(np.int64)
+
+    @classmethod
+    def from_flat(cls, flat):
+        return cls(np.frombuffer(flat.types, dtype=np.uint16), np.frombuffer(flat.child_counts, dtype=np.uint32),
+                   np.frombuffer(flat.first_lines, dtype=np.int32), np.frombuffer(flat.last_lines, dtype=np.int32))
+
+    @classmethod
+    def from_tree(cls, tree):
+        return cls.from_flat(FlatAST.from_tree(tree))
+
+    @classmethod
+    def from_file(cls, file_path, ast_cache=None):
+        """Строит массивы AST файла; с кэшем ASTCache файл разбирается только при промахе кэша."""
+        if ast_cache is not None:
+            return cls.from_flat(ast_cache.flatten_file(file_path))
+        return cls.from_tree(get_ast_from_file(file_path))
+
+    def __len__(self):
+        return len(self.types)
+
+    def line_range(self, index):
+        """Возвращает (первая строка, последняя строка) узла или None, если позиция неизвестна."""
+        if self.first_lines is None or not self.first_lines[index]:
+            return None
+        return int(self.first_lines[index]), int(self.last_lines[index] or self.first_lines[index])
+
+    def token_str(self):
+        """
+        Возвращает последовательность типов узлов строкой (один символ на узел), которую можно передать
+        движкам n-грамм (heckel.split_into_n_gramm_hashes) и Greedy String Tiling (tile_sequences по кодам).
+        """
+        return (self.types + 0x100).astype("<u4").tobytes().decode("utf-32-le")
+
+    def type_names(self):
+        return [AST_TYPE_NAMES[code] for code in self.types.tolist()]
+
+
+def compare_ast_arrays(arrays1, arrays2):
+    """
+    Структурное сравнение двух AST в массивах: корни сопоставляются друг с другом, у совпавших по типу узлов
+    попарно сопоставляются дочерние узлы (лишние дочерние узлы большего списка пропускаются, как zip
+    в ASTComparator), а поддеревья несовпавших узлов пропускаются целиком.
+    Сопоставление идёт по уровням дерева, каждый уровень обрабатывается операциями над массивами.
+    Возвращает (число несовпадений, число сопоставленных пар узлов).
+    """
+    if len(arrays1) == 0 or len(arrays2) == 0:
+        return 0, 0
+    if len(arrays1) == len(arrays2) and np.array_equal(arrays1.types, arrays2.types) and \
+            np.array_equal(arrays1.child_counts, arrays2.child_counts):
+        return 0, len(arrays1)
+    if arrays1.types[0] != arrays2.types[0]:
+        return 1, 1
+    mismatches = 0
+    total = 1
+    nodes1 = np.zeros(1, dtype=np.int64)
+    nodes2 = np.zeros(1, dtype=np.int64)
+    while len(nodes1):
+        counts = np.minimum(arrays1.child_counts[nodes1], arrays2.child_counts[nodes2])
+        pairs_count = int(counts.sum())
+        if pairs_count == 0:
+            break
+        # Номер дочернего узла внутри своей группы: 0, 1, ..., counts[k] - 1 для каждой пары родителей
+        within = np.arange(pairs_count) - np.repeat(np.cumsum(counts) - counts, counts)
+        children1 = arrays1.children[np.repeat(arrays1.child_offsets[nodes1], counts) + within]
+        children2 = arrays2.children[np.repeat(arrays2.child_offsets[nodes2], counts) + within]
+        equal = arrays1.types[children1] == arrays2.types[children2]
+        total += pairs_count
+        mismatches += pairs_count - int(np.count_nonzero(equal))
+        nodes1 = children1[equal]
+        nodes2 = children2[equal]
+    return mismatches, total
+
+
+def arrays_plagiarism_percentage(target_arrays, origin_arrays):
+    """Вычисляет процент заимствования по двум уже построенным массивам AST."""
+    mismatches, total = compare_ast_arrays(target_arrays, origin_arrays)
+    return (1 - mismatches / total) * 100 if total else 0
+
+
+def calculate_arrays_plagiarism_percentage(target_filename, origin_filename, ast_cache=None):
+    """Вычисляет процент заимствования по структурному сравнению массивов AST (см. compare_ast_arrays)."""
+    return arrays_plagiarism_percentage(ASTArrays.from_file(target_filename, ast_cache),
+                                        ASTArrays.from_file(origin_filename, ast_cache))
+
+
+if __name__ == "__main__":
+    # Частное тестирование алгоритма
+    test_examples_dir = os.path.join(os.path.dirname(__file__), '..', 'test_examples')
+    origin_path = os.path.join(test_examples_dir, "original_program.py")
+    for name in sorted(os.listdir(test_examples_dir)):
+        if name.endswith(".py"):
+            percentage = calculate_arrays_plagiarism_percentage(os.path.join(test_examples_dir, name), origin_path)
+            print(f"Процент заимствований {name}: {percentage:.1f} %")
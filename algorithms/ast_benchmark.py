@@ -0,0 +1,81 @@
+import ast
+import os
+import sysconfig
+import time
+from algorithms.ast_find import ASTComparator, IterativeASTComparator
+
+
+def load_stdlib_trees(count=20):
+    """Разбирает count самых больших модулей стандартной библиотеки: список (имя, AST, AST повторного разбора)."""
+    stdlib_dir = sysconfig.get_paths()["stdlib"]
+    paths = [os.path.join(stdlib_dir, name) for name in os.listdir(stdlib_dir) if name.endswith(".py")]
+    trees = []
+    for path in sorted(paths, key=os.path.getsize, reverse=True):
+        try:
+            with open(path, encoding="utf-8") as file:
+                src = file.read()
+            trees.append((os.path.basename(path), ast.parse(src), ast.parse(src)))
+        except (SyntaxError, UnicodeDecodeError):
+            continue
+        if len(trees) == count:
+            break
+    return trees
+
+
+def build_deep_tree(depth=10000):
+    """Строит AST выражения 1 + 1 + ... + 1 с глубиной вложенности depth."""
+    node = ast.Constant(value=1)
+    for _ in range(depth):
+        node = ast.BinOp(left=node, op=ast.Add(), right=ast.Constant(value=1))
+    return ast.Module(body=[ast.Expr(value=node)], type_ignores=[])
+
+
+def time_comparator(comparator_class, tree1, tree2, repeats=5):
+    """
+    Возвращает (лучшее время сравнения в секундах, mismatches, total) или (None, None, None), если сравнение
+    завершилось ошибкой: RecursionError на глубоких деревьях или AttributeError рекурсивного сравнения
+    на списках строк в узлах (global, nonlocal).
+    """
+    best = None
+    for _ in range(repeats):
+        comparator = comparator_class(tree1, tree2)
+        start = time.perf_counter()
+        try:
+            comparator.compare()
+        except (RecursionError, AttributeError):
+            return None, None, None
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, comparator.mismatches, comparator.total
+
+
+def run_ast_benchmark(count=20, depth=10000):
+    """
+    Сравнивает рекурсивный и итеративный обход на модулях стандартной библиотеки (каждый модуль сравнивается
+    с результатом его повторного разбора, то есть обходится целиком) и на глубоком синтетическом дереве.
+    """
+    trees = load_stdlib_trees(count)
+    recursive_time = iterative_time = 0
+    for name, tree1, tree2 in trees:
+        recursive, mismatches, total = time_comparator(ASTComparator, tree1, tree2)
+        if recursive is None:
+            print(f"{name}: пропущен, рекурсивное сравнение завершилось ошибкой")
+            continue
+        iterative, iterative_mismatches, iterative_total = time_comparator(IterativeASTComparator, tree1, tree2)
+        if (mismatches, total) != (iterative_mismatches, iterative_total):
+            raise AssertionError(f"Счётчики различаются для {name}")
+        recursive_time += recursive
+        iterative_time += iterative
+        print(f"{name}: {total} узлов, {recursive * 1000:.1f} мс -> {iterative * 1000:.1f} мс")
+    print(f"Итого: {recursive_time:.3f} с -> {iterative_time:.3f} с, ускорение {recursive_time / iterative_time:.2f}x")
+
+    deep_tree = build_deep_tree(depth)
+    recursive, _, _ = time_comparator(ASTComparator, deep_tree, deep_tree, repeats=1)
+    iterative, _, total = time_comparator(IterativeASTComparator, deep_tree, deep_tree, repeats=1)
+    print(f"Дерево глубины {depth}: рекурсивный обход - "
+          f"{'RecursionError' if recursive is None else f'{recursive:.3f} с'}, "
+          f"итеративный - {iterative:.3f} с ({total} узлов)")
+
+
+if __name__ == "__main__":
+    run_ast_benchmark()
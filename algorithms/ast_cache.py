@@ -0,0 +1,141 @@
+import ast
+import hashlib
+import os
+import struct
+import sys
+from array import array
+from algorithms.file_access import MappedFile
+from tokenizers.token_cache import DiskCache, default_cache_dir
+
+# Таблица типов узлов AST текущей версии Python: код типа - номер в отсортированном списке имён
+AST_TYPES = sorted((value for value in vars(ast).values() if isinstance(value, type) and issubclass(value, ast.AST)),
+                   key=lambda value: value.__name__)
+AST_TYPE_NAMES = [value.__name__ for value in AST_TYPES]
+AST_TYPE_CODES = {value: code for code, value in enumerate(AST_TYPES)}
+
+
+class FlatAST:
+    """
+    Компактное представление AST в прямом порядке обхода: для каждого узла хранятся код типа (AST_TYPE_NAMES),
+    число дочерних узлов и диапазон строк (0, если у узла нет позиции). Дочерние узлы перечисляются
+    в порядке полей узла, значения-идентификаторы и константы не хранятся.
+    """
+    COLUMNS = (("types", "H"), ("child_counts", "I"), ("first_lines", "i"), ("last_lines", "i"))
+
+    def __init__(self, types=None, child_counts=None, first_lines=None, last_lines=None):
+        self.types = types if types is not None else array("H")
+        self.child_counts = child_counts if child_counts is not None else array("I")
+        self.first_lines = first_lines if first_lines is not None else array("i")
+        self.last_lines = last_lines if last_lines is not None else array("i")
+
+    @classmethod
+    def from_tree(cls, tree):
+        """Строит представление итеративным обходом дерева (поля узлов берутся из таблицы по типу узла)."""
+        flat = cls()
+        add_type, add_count = flat.types.append, flat.child_counts.append
+        add_first_line, add_last_line = flat.first_lines.append, flat.last_lines.append
+        fields_table = {}
+        node_base = ast.AST
+        stack = [tree]
+        pop, push = stack.pop, stack.extend
+        while stack:
+            node = pop()
+            node_type = type(node)
+            fields = fields_table.get(node_type)
+            if fields is None:
+                fields = fields_table[node_type] = (AST_TYPE_CODES[node_type], node_type._fields)
+            code, names = fields
+            add_type(code)
+            children = []
+            for name in names:
+                value = getattr(node, name, None)
+                if isinstance(value, list):
+                    children.extend([item for item in value if isinstance(item, node_base)])
+                elif isinstance(value, node_base):
+                    children.append(value)
+            add_count(len(children))
+            add_first_line(getattr(node, "lineno", None) or 0)
+            add_last_line(getattr(node, "end_lineno", None) or 0)
+            if children:
+                children.reverse()
+                push(children)
+        return flat
+
+    def __len__(self):
+        return len(self.types)
+
+    def type_names(self):
+        """Возвращает имена типов узлов в прямом порядке обхода."""
+        return [AST_TYPE_NAMES[code] for code in self.types]
+
+    def encode(self):
+        return b"".join(getattr(self, name).tobytes() for name, _ in FlatAST.COLUMNS)
+
+    @classmethod
+    def decode(cls, data, count):
+        """Восстанавливает представление из count узлов; для данных неверной длины возвращает None."""
+        if len(data) != count * sum(array(typecode).itemsize for _, typecode in FlatAST.COLUMNS):
+            return None
+        columns = {}
+        offset = 0
+        for name, typecode in FlatAST.COLUMNS:
+            column = array(typecode)
+            column.frombytes(data[offset:offset + count * column.itemsize])
+            offset += count * column.itemsize
+            columns[name] = column
+        return cls(**columns)
+
+
+class ASTCache(DiskCache):
+    """
+    Кэш компактных представлений AST (FlatAST) на диске. Ключ - хэш исходного кода и версии Python,
+    вытеснение давно не использованных записей по суммарному размеру - как в DiskCache.
+    Полные деревья не кэшируются: pickle.loads восстанавливает AST не быстрее, чем ast.parse его строит,
+    а чтение FlatAST сводится к копированию нескольких массивов.
+    """
+    MAGIC = b"CCDA"
+    FORMAT = 1
+    HEADER = struct.Struct("<4sI")
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024):
+        super().__init__(directory or os.path.join(default_cache_dir(), "ast"), max_bytes)
+
+    @staticmethod
+    def key(src):
+        """Вычисляет ключ записи по исходному коду (str или байты: bytes, memoryview) и версии Python."""
+        digest = hashlib.sha256()
+        digest.update(src.encode("utf-8", "surrogatepass") if isinstance(src, str) else src)
+        digest.update(b"\0")
+        digest.update(repr([sys.version, ASTCache.FORMAT, sys.byteorder]).encode("utf-8"))
+        return digest.hexdigest()
+
+    def flatten(self, src):
+        """Возвращает FlatAST исходного кода, разбирая его только при промахе кэша."""
+        key = ASTCache.key(src)
+        data = self.get(key)
+        if data is not None:
+            flat = ASTCache.decode(data)
+            if flat is not None:
+                return flat
+        flat = FlatAST.from_tree(ast.parse(src))
+        self.put(key, ASTCache.encode(flat))
+        return flat
+
+    def flatten_file(self, file_path):
+        """Возвращает FlatAST файла (ключ считается и файл разбирается прямо из отображения в память, без копии)."""
+        with MappedFile(file_path) as file, file.view() as source:
+            return self.flatten(source)
+
+    @staticmethod
+    def encode(flat):
+        return ASTCache.HEADER.pack(ASTCache.MAGIC, len(flat)) + flat.encode()
+
+    @staticmethod
+    def decode(data):
+        """Восстанавливает запись; для повреждённой записи возвращает None."""
+        if len(data) < ASTCache.HEADER.size:
+            return None
+        magic, count = ASTCache.HEADER.unpack_from(data)
+        if magic != ASTCache.MAGIC:
+            return None
+        return FlatAST.decode(data[ASTCache.HEADER.size:], count)
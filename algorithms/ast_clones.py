@@ -0,0 +1,155 @@
+import ast
+import hashlib
+import os
+from collections import defaultdict, namedtuple
+from itertools import combinations
+from algorithms.ast_find import get_ast_from_file
+
+# Поддерево AST: узел, структурный хэш, число узлов и номер родителя в списке поддеревьев (-1 у корня)
+Subtree = namedtuple("Subtree", ["node", "digest", "size", "parent"])
+# Пара совпавших поддеревьев: документ и диапазон строк (первая, последняя) каждого из них, число узлов
+ClonePair = namedtuple("ClonePair", ["doc1", "lines1", "doc2", "lines2", "size"])
+
+
+def hash_subtrees(tree, normalize=True):
+    """
+    Вычисляет структурный (Merkle) хэш каждого поддерева: хэш узла зависит от его типа, имён полей,
+    значений полей-констант и хэшей дочерних узлов. При normalize=True идентификаторы и константы
+    заменяются названием их типа, поэтому переименованные копии получают одинаковые хэши.
+    Обход итеративный; возвращает список Subtree в прямом порядке обхода (корень - первый элемент).
+    """
+    nodes = []
+    parents = []
+    layouts = []
+    stack = [(tree, -1)]
+    while stack:
+        node, parent = stack.pop()
+        index = len(nodes)
+        nodes.append(node)
+        parents.append(parent)
+        layout = [type(node).__name__]
+        children = []
+        for field in node._fields:
+            value = getattr(node, field, None)
+            layout.append(field)
+            values = value if isinstance(value, list) else [value]
+            if isinstance(value, list):
+                layout.append(len(value))
+            for item in values:
+                if isinstance(item, ast.AST):
+                    # Место дочернего узла в описании узла; номер будет известен после его добавления в nodes
+                    layout.append(None)
+                    children.append(item)
+                else:
+                    layout.append(type(item).__name__ if normalize else repr(item))
+        layouts.append(layout)
+        # Дочерние узлы добавляются в стек в обратном порядке, чтобы обход оставался прямым (слева направо)
+        for child in reversed(children):
+            stack.append((child, index))
+
+    child_indices = [[] for _ in nodes]
+    for index in range(1, len(nodes)):
+        child_indices[parents[index]].append(index)
+    digests = [b""] * len(nodes)
+    sizes = [1] * len(nodes)
+    # В прямом порядке обхода дочерние узлы идут после родителя, поэтому обратный проход начинает с листьев
+    for index in range(len(nodes) - 1, -1, -1):
+        digest = hashlib.blake2b(digest_size=16)
+        children = iter(child_indices[index])
+        for part in layouts[index]:
+            if part is None:
+                child = next(children)
+                digest.update(b"\x00" + digests[child])
+                sizes[index] += sizes[child]
+            else:
+                digest.update(b"\x01" + str(part).encode("utf-8", "surrogatepass"))
+        digests[index] = digest.digest()
+    return [Subtree(node, digest, size, parent) for node, digest, size, parent in zip(nodes, digests, sizes, parents)]
+
+
+def line_range(node):
+    """Возвращает (первая строка, последняя строка) узла или None, если у узла нет позиции в исходном коде."""
+    if getattr(node, "lineno", None) is None:
+        return None
+    return node.lineno, getattr(node, "end_lineno", None) or node.lineno
+
+
+class ASTCloneIndex:
+    """
+    Индекс поддеревьев AST по структурным хэшам для поиска клонов в корпусе файлов.
+    В индекс попадают поддеревья не меньше min_size узлов, имеющие позицию в исходном коде;
+    построение индекса линейно по суммарному числу узлов.
+    """
+
+    def __init__(self, min_size=10, normalize=True):
+        self.min_size = min_size
+        self.normalize = normalize
+        self.buckets = defaultdict(list)
+
+    def add(self, doc_id, tree):
+        """Добавляет AST документа в индекс."""
+        subtrees = hash_subtrees(tree, self.normalize)
+        # Для каждого поддерева запоминается хэш ближайшего предка, попадающего в индекс:
+        # совпадение, вложенное в совпадение предков, не считается отдельным клоном
+        indexed_ancestors = [None] * len(subtrees)
+        for index, subtree in enumerate(subtrees):
+            parent = subtree.parent
+            if parent >= 0:
+                parent_subtree = subtrees[parent]
+                indexed = parent_subtree.size >= self.min_size and line_range(parent_subtree.node) is not None
+                indexed_ancestors[index] = parent_subtree.digest if indexed else indexed_ancestors[parent]
+            lines = line_range(subtree.node)
+            if subtree.size >= self.min_size and lines is not None:
+                self.buckets[subtree.digest].append((doc_id, lines, subtree.size, indexed_ancestors[index]))
+
+    def add_file(self, filename, doc_id=None):
+        """Добавляет файл; по умолчанию идентификатором документа служит имя файла."""
+        self.add(filename if doc_id is None else doc_id, get_ast_from_file(filename))
+
+    def clone_pairs(self):
+        """Возвращает максимальные пары клонов (ClonePair), отсортированные по убыванию размера."""
+        pairs = []
+        for entries in self.buckets.values():
+            for (doc1, lines1, size, ancestor1), (doc2, lines2, _, ancestor2) in combinations(entries, 2):
+                if ancestor1 is not None and ancestor1 == ancestor2:
+                    continue
+                pairs.append(ClonePair(doc1, lines1, doc2, lines2, size))
+        return sorted(pairs, key=lambda pair: (-pair.size, str(pair.doc1), pair.lines1, str(pair.doc2), pair.lines2))
+
+
+def calculate_clone_percentage(target_filename, origin_filename, min_size=5, normalize=True):
+    """
+    Вычисляет процент узлов AST target, входящих в поддеревья (не меньше min_size узлов),
+    структурный хэш которых встречается в AST origin.
+    """
+    target_subtrees = hash_subtrees(get_ast_from_file(target_filename), normalize)
+    origin_digests = {subtree.digest for subtree in hash_subtrees(get_ast_from_file(origin_filename), normalize)
+                      if subtree.size >= min_size}
+    covered = [False] * len(target_subtrees)
+    matched_size = 0
+    # В прямом порядке обхода родитель идёт раньше потомков: узлы внутри совпавшего поддерева пропускаются
+    for index, subtree in enumerate(target_subtrees):
+        if subtree.parent >= 0 and covered[subtree.parent]:
+            covered[index] = True
+        elif subtree.size >= min_size and subtree.digest in origin_digests:
+            covered[index] = True
+            matched_size += subtree.size
+    return matched_size / len(target_subtrees) * 100
+
+
+def search_ast_clones(filenames, min_size=10, normalize=True):
+    """Находит пары клонов во всём корпусе файлов за один проход построения индекса."""
+    index = ASTCloneIndex(min_size, normalize)
+    for filename in filenames:
+        index.add_file(filename)
+    return index.clone_pairs()
+
+
+if __name__ == "__main__":
+    # Частное тестирование алгоритма
+    test_examples_dir = os.path.join(os.path.dirname(__file__), '..', 'test_examples')
+    origin_path = os.path.join(test_examples_dir, "original_program.py")
+    for name in sorted(os.listdir(test_examples_dir)):
+        if name.endswith(".py"):
+            percentage = calculate_clone_percentage(os.path.join(test_examples_dir, name), origin_path)
+            print(f"Процент заимствований {name}: {percentage:.1f} %")
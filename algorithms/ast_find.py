@@ -1,5 +1,6 @@
 import ast
 import os
+from algorithms.file_access import MappedFile
 
 
 class ASTComparator(ast.NodeVisitor):
@@ -35,19 +36,105 @@ class ASTComparator(ast.NodeVisitor):
                         self.mismatches += 1
 
 
+class IterativeASTComparator:
+    """
+    Сравнение AST с явным стеком вместо рекурсии: не упирается в ограничение глубины рекурсии.
+    Пары сравниваемых узлов хранятся в двух параллельных стеках, списки дочерних узлов добавляются
+    в них целиком; поля узлов берутся из таблицы, заранее построенной для каждого типа узла.
+    Счётчики mismatches и total совпадают с ASTComparator; строки в списках полей (global, nonlocal),
+    на которых ASTComparator завершается AttributeError, учитываются как узлы без полей.
+    """
+    SCALAR_TYPES = (str, int, float)
+    __fields = {}
+
+    def __init__(self, tree1, tree2):
+        self.tree1 = tree1
+        self.tree2 = tree2
+        self.mismatches = 0
+        self.total = 0
+
+    @classmethod
+    def fields(cls, node_type):
+        """Возвращает кортеж имён полей типа узла (пустой для значений, не являющихся узлами AST)."""
+        if node_type not in cls.__fields:
+            cls.__fields[node_type] = tuple(getattr(node_type, "_fields", ()))
+        return cls.__fields[node_type]
+
+    def compare(self):
+        fields_table = IterativeASTComparator.__fields
+        scalar_types = IterativeASTComparator.SCALAR_TYPES
+        node_base = ast.AST
+        tree2 = self.tree2
+        mismatches = 0
+        total = 0
+        stack1 = [self.tree1]
+        stack2 = [self.tree2]
+        pop1, pop2 = stack1.pop, stack2.pop
+        push1, push2 = stack1.append, stack2.append
+        while stack1:
+            node1 = pop1()
+            node2 = pop2()
+            total += 1
+            if node2 is None:
+                node2 = tree2
+            node_type = type(node1)
+            if node_type is not type(node2):
+                mismatches += 1
+                continue
+            fields = fields_table.get(node_type)
+            if fields is None:
+                fields = IterativeASTComparator.fields(node_type)
+            for field in fields:
+                value1 = getattr(node1, field)
+                value2 = getattr(node2, field)
+                if isinstance(value1, list) and isinstance(value2, list):
+                    # Как и zip в ASTComparator, сравниваются только элементы общей длины
+                    length = min(len(value1), len(value2))
+                    stack1.extend(value1 if length == len(value1) else value1[:length])
+                    stack2.extend(value2 if length == len(value2) else value2[:length])
+                elif isinstance(value1, node_base):
+                    if not isinstance(value2, node_base):
+                        if value1 != value2:
+                            mismatches += 1
+                        continue
+                    value_type = type(value1)
+                    value_fields = fields_table.get(value_type)
+                    if value_fields is None:
+                        value_fields = IterativeASTComparator.fields(value_type)
+                    if value_fields:
+                        push1(value1)
+                        push2(value2)
+                    else:
+                        # Узлы без полей (контекст Load/Store, операторы) учитываются сразу, без стека
+                        total += 1
+                        if value_type is not type(value2):
+                            mismatches += 1
+                elif isinstance(value1, scalar_types) and isinstance(value2, scalar_types):
+                    continue
+                elif value1 != value2:
+                    mismatches += 1
+        self.mismatches += mismatches
+        self.total += total
+        return self.mismatches == 0
+
+
 def get_ast_from_file(file_path, encoding="utf-8"):
-    """Получает AST из файла."""
-    with open(file_path, "r", encoding=encoding) as file:
-        code = file.read()
-    return ast.parse(code)
+    """Получает AST из файла (файл отображается в память; для UTF-8 разбирается прямо из отображения, без копии)."""
+    with MappedFile(file_path, encoding) as file:
+        if encoding.replace("_", "-").lower() in ("utf-8", "utf8"):
+            with file.view() as source:
+                return ast.parse(source)
+        return ast.parse(file.text())
 
 
 def calculate_plagiarism_percentage(target_filename, origin_filename):
     """Вычисляет процент заимствования между двумя файлами."""
-    target_ast = get_ast_from_file(target_filename)
-    origin_ast = get_ast_from_file(origin_filename)
+    return compare_asts(get_ast_from_file(target_filename), get_ast_from_file(origin_filename))
+
 
-    comparator = ASTComparator(target_ast, origin_ast)
+def compare_asts(target_ast, origin_ast):
+    """Вычисляет процент заимствования по двум уже построенным AST."""
+    comparator = IterativeASTComparator(target_ast, origin_ast)
     is_similar = comparator.compare()
     similarity_ratio = 1 - comparator.mismatches / comparator.total
     return similarity_ratio * 100
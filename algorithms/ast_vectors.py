@@ -0,0 +1,150 @@
+import os
+from collections import defaultdict, namedtuple
+import numpy as np
+from algorithms.ast_arrays import ASTArrays
+from algorithms.ast_cache import AST_TYPE_NAMES
+
+# Фрагмент корпуса: документ, диапазон строк (или None для модуля целиком) и число узлов AST
+Fragment = namedtuple("Fragment", ["doc_id", "lines", "size"])
+
+FUNCTION_TYPE_CODES = [AST_TYPE_NAMES.index(name) for name in ("FunctionDef", "AsyncFunctionDef")]
+
+
+def characteristic_vector(arrays, start=0, end=None):
+    """Возвращает вектор числа узлов каждого типа (длины len(AST_TYPE_NAMES)) для узлов [start, end)."""
+    return np.bincount(arrays.types[start:end], minlength=len(AST_TYPE_NAMES)).astype(np.float32)
+
+
+def vector_similarity_percentage(target_vector, origin_vector):
+    """Косинусное сходство характеристических векторов двух AST в процентах."""
+    norm = float(np.linalg.norm(target_vector) * np.linalg.norm(origin_vector))
+    return float(target_vector @ origin_vector) / norm * 100 if norm else 0
+
+
+def function_fragments(arrays, min_size=1):
+    """Возвращает номера узлов определений функций с поддеревом не меньше min_size узлов."""
+    is_function = np.isin(arrays.types, FUNCTION_TYPE_CODES) & (arrays.sizes >= min_size)
+    return np.flatnonzero(is_function)
+
+
+class RandomHyperplaneLSH:
+    """
+    LSH для косинусного сходства: каждая из tables таблиц хэширует вектор знаками его проекций
+    на bits случайных гиперплоскостей; близкие по углу векторы с высокой вероятностью попадают
+    хотя бы в одну общую корзину.
+    """
+
+    def __init__(self, dimension, bits=12, tables=8, seed=1):
+        self.bits = bits
+        self.tables = tables
+        self.planes = np.random.default_rng(seed).standard_normal((tables, bits, dimension)).astype(np.float32)
+        self.__weights = (1 << np.arange(bits, dtype=np.int64))
+        self.__buckets = [defaultdict(list) for _ in range(tables)]
+
+    def keys(self, vectors):
+        """Возвращает ключи корзин формы (число векторов, tables)."""
+        projections = np.einsum("tbd,nd->ntb", self.planes, np.atleast_2d(vectors))
+        return (projections > 0).astype(np.int64) @ self.__weights
+
+    def add(self, start, vectors):
+        """Добавляет векторы с номерами start, start + 1, ..."""
+        for offset, keys in enumerate(self.keys(vectors).tolist()):
+            for bucket, key in zip(self.__buckets, keys):
+                bucket[key].append(start + offset)
+
+    def candidates(self, vector):
+        """Возвращает отсортированный массив номеров векторов из корзин запроса."""
+        result = set()
+        for bucket, key in zip(self.__buckets, self.keys(vector)[0].tolist()):
+            result.update(bucket.get(key, ()))
+        return np.array(sorted(result), dtype=np.int64)
+
+
+class ASTVectorIndex:
+    """
+    Индекс характеристических векторов AST (как в DECKARD): каждый модуль (level="module") или каждое
+    определение функции (level="function") описывается вектором числа узлов каждого типа.
+    Векторы хранятся строками матрицы NumPy, запрос сравнивается со всеми строками одной матричной операцией
+    (косинусное сходство или расстояние L1); при заданном lsh_tables косинусный запрос сначала
+    отбирает кандидатов через RandomHyperplaneLSH.
+    """
+
+    def __init__(self, level="function", min_size=20, lsh_tables=None, lsh_bits=12):
+        if level not in ("module", "function"):
+            raise ValueError(f"Неизвестный уровень фрагментов: {level}")
+        self.level = level
+        self.min_size = min_size
+        self.fragments = []
+        self.__vectors = []
+        self.__matrix = None
+        self.__lsh = RandomHyperplaneLSH(len(AST_TYPE_NAMES), lsh_bits, lsh_tables) if lsh_tables else None
+
+    def __len__(self):
+        return len(self.fragments)
+
+    @property
+    def matrix(self):
+        """Матрица векторов фрагментов (строка i соответствует fragments[i])."""
+        if self.__matrix is None or len(self.__matrix) != len(self.__vectors):
+            self.__matrix = np.vstack(self.__vectors) if self.__vectors else \
+                np.empty((0, len(AST_TYPE_NAMES)), dtype=np.float32)
+        return self.__matrix
+
+    def add(self, doc_id, arrays):
+        """Добавляет фрагменты AST документа (ASTArrays)."""
+        if self.level == "module":
+            roots = [0] if len(arrays) >= self.min_size else []
+        else:
+            roots = function_fragments(arrays, self.min_size).tolist()
+        vectors = [characteristic_vector(arrays, root, root + arrays.sizes[root]) for root in roots]
+        if self.__lsh is not None and vectors:
+            self.__lsh.add(len(self.__vectors), np.vstack(vectors))
+        for root, vector in zip(roots, vectors):
+            self.fragments.append(Fragment(doc_id, arrays.line_range(root), int(arrays.sizes[root])))
+            self.__vectors.append(vector)
+
+    def add_file(self, filename, doc_id=None, ast_cache=None):
+        """Добавляет файл; по умолчанию идентификатором документа служит имя файла."""
+        self.add(filename if doc_id is None else doc_id, ASTArrays.from_file(filename, ast_cache))
+
+    def query(self, vector, k=10, metric="cosine"):
+        """
+        Возвращает k ближайших фрагментов в виде списка (фрагмент, оценка): для metric="cosine" оценка -
+        косинусное сходство (по убыванию), для metric="l1" - расстояние L1 (по возрастанию).
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        if metric == "cosine" and self.__lsh is not None:
+            rows = self.__lsh.candidates(vector)
+        else:
+            rows = np.arange(len(self.fragments))
+        matrix = self.matrix[rows]
+        if metric == "cosine":
+            norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+            scores = np.divide(matrix @ vector, norms, out=np.zeros(len(rows), dtype=np.float32), where=norms > 0)
+            order = -scores
+        elif metric == "l1":
+            scores = np.abs(matrix - vector).sum(axis=1)
+            order = scores
+        else:
+            raise ValueError(f"Неизвестная метрика: {metric}")
+        k = min(k, len(rows))
+        if k <= 0:
+            return []
+        best = np.argpartition(order, k - 1)[:k]
+        best = best[np.argsort(order[best], kind="stable")]
+        return [(self.fragments[rows[index]], float(scores[index])) for index in best]
+
+    def query_file(self, filename, k=10, metric="cosine", ast_cache=None):
+        """Ищет фрагменты, структурно похожие на модуль целиком."""
+        return self.query(characteristic_vector(ASTArrays.from_file(filename, ast_cache)), k, metric)
+
+
+if __name__ == "__main__":
+    # Частное тестирование алгоритма
+    test_examples_dir = os.path.join(os.path.dirname(__file__), '..', 'test_examples')
+    index = ASTVectorIndex(level="module")
+    for name in sorted(os.listdir(test_examples_dir)):
+        if name.endswith(".py"):
+            index.add_file(os.path.join(test_examples_dir, name), name)
+    for fragment, score in index.query_file(os.path.join(test_examples_dir, "original_program.py"), k=5):
+        print(f"{fragment.doc_id}: {score:.3f}")
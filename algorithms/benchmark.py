@@ -0,0 +1,293 @@
+import ast
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# Статистика времени выполнения (все времена - в наносекундах)
+TimingStats = namedtuple("TimingStats", ["runs", "median", "p95", "mean", "stdev", "min", "max"])
+# Этапы метода поиска заимствований для пары файлов:
+#   load(path) - чтение файла, prepare(data) - токенизация или разбор, compare(target, origin, **options) - процент
+BenchmarkEngine = namedtuple("BenchmarkEngine", ["load", "prepare", "compare"])
+STAGES = ("load", "prepare", "compare")
+# Единица работы параллельного прогона: метод, пара файлов, номер повтора и параметры
+WorkUnit = namedtuple("WorkUnit", ["method_name", "target_path", "origin_path", "repetition", "options",
+                                   "measure_options"])
+
+
+def load_lines(file_path):
+    from algorithms.file_access import MappedFile
+    from algorithms.greedy_string_tiling import line_table
+    with MappedFile(file_path) as file:
+        return line_table(file)
+
+
+def load_text(file_path):
+    from algorithms.file_access import MappedFile
+    with MappedFile(file_path) as file:
+        return file.text()
+
+
+def load_bytes(file_path):
+    from algorithms.file_access import MappedFile
+    with MappedFile(file_path) as file:
+        return file.read_bytes()
+
+
+@lru_cache(maxsize=None)
+def default_ast_cache():
+    """Кэш AST в каталоге по умолчанию; создаётся при первом обращении, а не при импорте модуля."""
+    from algorithms.ast_cache import ASTCache
+    return ASTCache()
+
+
+def parse_ast_arrays(data):
+    from algorithms.ast_arrays import ASTArrays
+    return ASTArrays.from_tree(ast.parse(data))
+
+
+def cached_ast_arrays(data):
+    """Массивы AST через кэш ASTCache: разбор выполняется только при промахе кэша."""
+    from algorithms.ast_arrays import ASTArrays
+    return ASTArrays.from_flat(default_ast_cache().flatten(data))
+
+
+def parse_ast_vector(data):
+    from algorithms.ast_vectors import characteristic_vector
+    return characteristic_vector(parse_ast_arrays(data))
+
+
+def token_index(tokenizer):
+    """Возвращает prepare для Greedy String Tiling по токенам: исходный код -> TokenStringIndex."""
+    from tokenizers.token import TokenStringIndex
+    return lambda src: TokenStringIndex(tokenizer.tokenize(src))
+
+
+def greedy_engine():
+    from algorithms.greedy_string_tiling import compare_line_tables
+    return BenchmarkEngine(load_lines, lambda table: table, compare_line_tables)
+
+
+def heckel_engine():
+    from algorithms.heckel import compare_tokens_strs, get_tokens_str
+    return BenchmarkEngine(load_text, get_tokens_str, compare_tokens_strs)
+
+
+def ast_engine():
+    from algorithms.ast_find import compare_asts
+    return BenchmarkEngine(load_bytes, ast.parse, compare_asts)
+
+
+def ast_arrays_engine():
+    from algorithms.ast_arrays import arrays_plagiarism_percentage
+    return BenchmarkEngine(load_bytes, parse_ast_arrays, arrays_plagiarism_percentage)
+
+
+def ast_cached_engine():
+    from algorithms.ast_arrays import arrays_plagiarism_percentage
+    return BenchmarkEngine(load_bytes, cached_ast_arrays, arrays_plagiarism_percentage)
+
+
+def ast_vectors_engine():
+    from algorithms.ast_vectors import vector_similarity_percentage
+    return BenchmarkEngine(load_bytes, parse_ast_vector, vector_similarity_percentage)
+
+
+def greedy_tokens_python_engine():
+    from algorithms.greedy_string_tiling import compare_token_indexes
+    from algorithms.heckel import PythonTokenizer
+    return BenchmarkEngine(load_text, token_index(PythonTokenizer()), compare_token_indexes)
+
+
+def greedy_tokens_c_engine():
+    from algorithms.greedy_string_tiling import compare_token_indexes
+    from tokenizers.c_tokenizer import CTokenizer
+    return BenchmarkEngine(load_text, token_index(CTokenizer()), compare_token_indexes)
+
+
+# Методы поиска заимствований: имя -> функция, создающая BenchmarkEngine (см. get_engine). Модули методов
+# импортируются только при создании метода, поэтому импорт benchmark не загружает numpy и модули поиска.
+# Для каждого метода результат compare(prepare(load(...))) совпадает
+# с результатом соответствующей функции поиска (search_greedy_string_tiling, search_heckel,
+# calculate_plagiarism_percentage). Строки для Greedy String Tiling нормализуются и нумеруются при чтении
+# (LineTable), как и в search_greedy_string_tiling, поэтому prepare у него пустой.
+# ast_arrays и ast_cached - другая метрика, чем ast: массивы AST сравниваются только по типам узлов
+# (calculate_arrays_plagiarism_percentage), и проценты в общем случае отличаются от compare_asts.
+# ast_cached берёт массивы из кэша ASTCache, поэтому после первого прогона файлы не разбираются;
+# его результат совпадает с ast_arrays.
+# greedy_tokens_* совпадают с search_token_greedy_string_tiling с соответствующим токенизатором,
+# ast_vectors - косинусное сходство характеристических векторов модулей (ast_vectors.characteristic_vector).
+ENGINES = {
+    "greedy": greedy_engine,
+    "heckel": heckel_engine,
+    "ast": ast_engine,
+    "ast_arrays": ast_arrays_engine,
+    "ast_cached": ast_cached_engine,
+    "ast_vectors": ast_vectors_engine,
+    "greedy_tokens_python": greedy_tokens_python_engine,
+    "greedy_tokens_c": greedy_tokens_c_engine,
+}
+
+
+@lru_cache(maxsize=None)
+def get_engine(engine_name):
+    """Возвращает BenchmarkEngine метода engine_name из ENGINES; метод создаётся при первом обращении."""
+    return ENGINES[engine_name]()
+
+
+def percentile(sorted_samples, fraction):
+    """Перцентиль по ближайшему рангу для отсортированной выборки."""
+    return sorted_samples[max(math.ceil(fraction * len(sorted_samples)) - 1, 0)]
+
+
+def summarize(samples):
+    """Вычисляет TimingStats по списку времён в наносекундах."""
+    ordered = sorted(samples)
+    return TimingStats(len(ordered), statistics.median(ordered), percentile(ordered, 0.95), statistics.fmean(ordered),
+                       statistics.stdev(ordered) if len(ordered) > 1 else 0.0, ordered[0], ordered[-1])
+
+
+def measure(func, *args, warmup=3, min_runs=10, max_runs=10000, min_time=0.2, disable_gc=True, **kwargs):
+    """
+    Измеряет время вызова func(*args, **kwargs) по perf_counter_ns.
+    После warmup прогревающих вызовов (не учитываются) число повторов подбирается адаптивно: вызовы
+    продолжаются, пока не набрано min_runs замеров и min_time секунд суммарного времени, но не больше max_runs.
+    На время замеров сборщик мусора отключается (как в timeit), чтобы его паузы не попадали в отдельные замеры.
+    Возвращает (результат последнего вызова, TimingStats).
+    """
+    result = None
+    for _ in range(warmup):
+        result = func(*args, **kwargs)
+    gc_was_enabled = gc.isenabled()
+    if disable_gc:
+        gc.disable()
+    try:
+        samples = []
+        total = 0
+        min_total = int(min_time * 1e9)
+        while len(samples) < max_runs and (len(samples) < min_runs or total < min_total):
+            start = time.perf_counter_ns()
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter_ns() - start
+            samples.append(elapsed)
+            total += elapsed
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return result, summarize(samples)
+
+
+def benchmark_engine(engine_name, target_path, origin_path, measure_options=None, **options):
+    """
+    Измеряет отдельно этапы метода engine_name (см. ENGINES) для пары файлов и весь конвейер целиком.
+    Время этапов load и prepare - суммарное для обоих файлов. options передаются в compare.
+    Возвращает словарь {"percentage": ..., "stages": {этап: TimingStats}}.
+    """
+    engine = get_engine(engine_name)
+    measure_options = measure_options or {}
+
+    def load():
+        return engine.load(target_path), engine.load(origin_path)
+
+    def prepare(target, origin):
+        return engine.prepare(target), engine.prepare(origin)
+
+    def pipeline():
+        return engine.compare(*prepare(*load()), **options)
+
+    stages = {}
+    loaded, stages["load"] = measure(load, **measure_options)
+    prepared, stages["prepare"] = measure(prepare, *loaded, **measure_options)
+    percentage, stages["compare"] = measure(engine.compare, *prepared, **options, **measure_options)
+    _, stages["total"] = measure(pipeline, **measure_options)
+    return {"percentage": percentage, "stages": stages}
+
+
+def run_work_unit(unit):
+    """Выполняет единицу работы в рабочем процессе: время измеряется внутри процесса, без учёта планирования."""
+    return benchmark_engine(unit.method_name, unit.target_path, unit.origin_path, unit.measure_options,
+                            **unit.options)
+
+
+def run_work_units(units, workers=None, chunksize=1):
+    """
+    Выполняет единицы работы (WorkUnit) в пуле из workers процессов (по умолчанию - по числу процессоров)
+    и возвращает результаты в порядке units независимо от порядка завершения. Единицы передаются
+    процессам пачками по chunksize. При workers=1 единицы выполняются последовательно в текущем процессе.
+    Процессы делят процессор и кэши, поэтому для устойчивых замеров workers не должно превышать число ядер.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [run_work_unit(unit) for unit in units]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_work_unit, units, chunksize=chunksize))
+
+
+def git_revision():
+    """Возвращает хэш текущего коммита репозитория или None, если он недоступен."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(**extra):
+    """Описание окружения запуска: версии, платформа, таймер, время запуска и коммит."""
+    import numpy
+    clock = time.get_clock_info("perf_counter")
+    metadata = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "timer": {"name": "perf_counter_ns", "implementation": clock.implementation, "resolution": clock.resolution},
+        "time_unit": "ns",
+    }
+    metadata.update(extra)
+    return metadata
+
+
+def to_json(value):
+    """Преобразует результаты (TimingStats и вложенные словари) в объекты, сериализуемые в JSON."""
+    if isinstance(value, TimingStats):
+        return value._asdict()
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    return value
+
+
+def write_benchmark_json(path, results, metadata=None):
+    """Записывает результаты вместе с описанием запуска в JSON-файл."""
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"metadata": metadata or run_metadata(), "results": to_json(results)}, file,
+                  ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    # Частное тестирование алгоритма
+    test_examples_dir = os.path.join(os.path.dirname(__file__), '..', 'test_examples')
+    origin_path = os.path.join(test_examples_dir, "original_program.py")
+    target_path = os.path.join(test_examples_dir, "H_copy_type3_renamed_added_and_reordered.py")
+    for name in ENGINES:
+        result = benchmark_engine(name, target_path, origin_path)
+        print(f"{name}: {result['percentage']:.1f} %")
+        for stage, stats in result["stages"].items():
+            print(f"  {stage}: медиана {stats.median / 1000:.1f} мкс, p95 {stats.p95 / 1000:.1f} мкс, "
+                  f"σ {stats.stdev / 1000:.1f} мкс ({stats.runs} замеров)")
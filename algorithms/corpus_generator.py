@@ -0,0 +1,268 @@
+import json
+import os
+import random
+import re
+from collections import namedtuple
+
+# Категории клонов, как в test_examples: тип клона, доля переименованных идентификаторов,
+# добавление строк и перестановка функций
+CloneCategory = namedtuple("CloneCategory", ["clone_type", "rename_fraction", "add_lines", "reorder"])
+CLONE_CATEGORIES = {
+    "A": CloneCategory(1, 0.0, False, False),  # полная копия
+    "B": CloneCategory(2, 1 / 3, False, False),  # переименовано 33 % идентификаторов
+    "C": CloneCategory(2, 0.5, False, False),  # переименовано 50 % идентификаторов
+    "D": CloneCategory(2, 1.0, False, False),  # переименованы все идентификаторы
+    "E": CloneCategory(3, 0.0, True, False),  # добавлены строки
+    "F": CloneCategory(3, 0.0, False, True),  # переставлены функции
+    "G": CloneCategory(3, 0.0, True, True),  # добавлены строки и переставлены функции
+    "H": CloneCategory(3, 0.5, True, True),  # переименование, добавление строк и перестановка
+}
+LANGUAGES = {"python": ".py", "c": ".c"}
+WORDS = ("value", "count", "total", "index", "item", "result", "buffer", "node", "limit", "step", "score", "level",
+         "offset", "size", "weight", "state", "delta", "accum", "left", "right")
+IDENTIFIER_PATTERN = re.compile(r"\b[a-z]+_\d+\b")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = 1
+
+
+class ProgramGenerator:
+    """
+    Генератор синтетических программ из функций с присваиваниями, условиями, циклами и вызовами
+    ранее определённых функций. Каждая функция - отдельный блок строк; имена идентификаторов уникальны
+    в пределах программы и имеют вид слово_номер, поэтому их можно переименовывать заменой по границам слов.
+    """
+
+    def __init__(self, rng, language="python"):
+        if language not in LANGUAGES:
+            raise ValueError(f"Неизвестный язык: {language}")
+        self.rng = rng
+        self.language = language
+        self.identifiers = []
+        self.functions = []
+
+    def new_name(self):
+        name = f"{self.rng.choice(WORDS)}_{len(self.identifiers)}"
+        self.identifiers.append(name)
+        return name
+
+    def expression(self, variables):
+        operand = self.rng.choice(variables) if self.rng.random() < 0.5 else str(self.rng.randint(1, 99))
+        return f"{self.rng.choice(variables)} {self.rng.choice('+-*')} {operand}"
+
+    def statements(self, variables, depth, count):
+        """Возвращает строки count операторов с отступом уровня depth; variables дополняется новыми переменными."""
+        python = self.language == "python"
+        indent = "    " * depth
+        lines = []
+        for _ in range(count):
+            kind = self.rng.random()
+            if kind < 0.15 and depth < 3:
+                condition = f"{self.rng.choice(variables)} > {self.rng.randint(0, 50)}"
+                lines.append(f"{indent}if {condition}:" if python else f"{indent}if ({condition}) {{")
+                lines.extend(self.statements(list(variables), depth + 1, self.rng.randint(1, 3)))
+                if not python:
+                    lines.append(f"{indent}}}")
+            elif kind < 0.25 and depth < 3:
+                counter = self.new_name()
+                bound = self.rng.randint(2, 20)
+                lines.append(f"{indent}for {counter} in range({bound}):" if python else
+                             f"{indent}for (int {counter} = 0; {counter} < {bound}; {counter}++) {{")
+                lines.extend(self.statements(variables + [counter], depth + 1, self.rng.randint(1, 3)))
+                if not python:
+                    lines.append(f"{indent}}}")
+            elif kind < 0.4 and depth == 1:
+                variable = self.new_name()
+                value = self.expression(variables)
+                lines.append(f"{indent}{variable} = {value}" if python else f"{indent}int {variable} = {value};")
+                variables.append(variable)
+            elif kind < 0.5 and self.functions:
+                name, arity = self.rng.choice(self.functions)
+                call = f"{name}({', '.join(self.rng.choice(variables) for _ in range(arity))})"
+                target = self.rng.choice(variables)
+                lines.append(f"{indent}{target} += {call}" if python else f"{indent}{target} += {call};")
+            else:
+                target = self.rng.choice(variables)
+                lines.append(f"{indent}{target} = {self.expression(variables)}" if python else
+                             f"{indent}{target} = {self.expression(variables)};")
+        return lines
+
+    def function(self):
+        """Возвращает строки новой функции (для C - вместе с закрывающей скобкой)."""
+        name = self.new_name()
+        params = [self.new_name() for _ in range(self.rng.randint(1, 3))]
+        if self.language == "python":
+            lines = [f"def {name}({', '.join(params)}):"]
+        else:
+            lines = [f"int {name}({', '.join('int ' + param for param in params)}) {{"]
+        variables = list(params)
+        lines.extend(self.statements(variables, 1, self.rng.randint(3, 10)))
+        result = self.rng.choice(variables)
+        lines.append(f"    return {result}" if self.language == "python" else f"    return {result};")
+        if self.language == "c":
+            lines.append("}")
+        self.functions.append((name, len(params)))
+        return lines
+
+    def program(self, line_count):
+        """
+        Генерирует программу примерно из line_count строк: (пролог, список блоков-функций).
+        Пролог C объявляет все функции, поэтому функции можно переставлять.
+        """
+        blocks = []
+        total = 0
+        while total < line_count:
+            block = self.function()
+            blocks.append(block)
+            total += len(block) + 1
+        if self.language == "python":
+            prologue = ["# Синтетическая программа"]
+        else:
+            prologue = ["/* Синтетическая программа */"]
+            prologue.extend(f"int {block[0][len('int '):-len(' {')]};" for block in blocks)
+        return prologue, blocks
+
+
+def render(prologue, blocks):
+    """Собирает строки программы: пролог и функции, разделённые пустыми строками."""
+    lines = list(prologue)
+    for block in blocks:
+        lines.append("")
+        lines.extend(block)
+    return lines
+
+
+def make_clone(generator, prologue, blocks, category):
+    """
+    Строит клон программы категории category (буква из CLONE_CATEGORIES).
+    Каждая строка хранится вместе с номером исходной строки (с 1) или None для добавленных строк.
+    Возвращает список пар (строка, номер исходной строки).
+    """
+    rng = generator.rng
+    settings = CLONE_CATEGORIES[category]
+    numbered_prologue = [(line, number) for number, line in enumerate(prologue, 1)]
+    numbered_blocks = []
+    number = len(prologue)
+    for block in blocks:
+        number += 1  # пустая строка перед функцией
+        numbered_blocks.append([(line, number + offset) for offset, line in enumerate(block, 1)])
+        number += len(block)
+
+    if settings.add_lines:
+        for block in numbered_blocks:
+            # Строка вставляется перед оператором тела функции первого уровня вложенности
+            positions = [position for position, (line, _) in enumerate(block)
+                         if line.startswith("    ") and not line[4].isspace() and line[4] != "}"]
+            if positions and rng.random() < 0.5:
+                position = rng.choice(positions)
+                variable = generator.new_name()
+                value = rng.randint(1, 99)
+                line = f"    {variable} = {value}" if generator.language == "python" else f"    int {variable} = {value};"
+                block.insert(position, (line, None))
+    if settings.reorder:
+        rng.shuffle(numbered_blocks)
+
+    lines = list(numbered_prologue)
+    for block in numbered_blocks:
+        lines.append(("", None))
+        lines.extend(block)
+
+    if settings.rename_fraction:
+        names = [name for name in generator.identifiers if rng.random() < settings.rename_fraction] \
+            if settings.rename_fraction < 1 else list(generator.identifiers)
+        if names:
+            renames = {name: f"{rng.choice(WORDS)}{name.rsplit('_', 1)[1]}" for name in names}
+            lines = [(IDENTIFIER_PATTERN.sub(lambda match: renames.get(match.group(), match.group()), line), origin)
+                     for line, origin in lines]
+    return lines
+
+
+def clone_segments(numbered_lines):
+    """
+    Возвращает известные места клона: список [первая строка клона, первая строка оригинала, число строк]
+    для максимальных отрезков подряд идущих строк, перенесённых из оригинала (номера с 1, пустые строки не в счёт).
+    """
+    segments = []
+    for clone_line, (line, origin_line) in enumerate(numbered_lines, 1):
+        if origin_line is None or not line.strip():
+            continue
+        if segments:
+            clone_start, origin_start, length = segments[-1]
+            if clone_start + length == clone_line and origin_start + length == origin_line:
+                segments[-1][2] += 1
+                continue
+        segments.append([clone_line, origin_line, 1])
+    return segments
+
+
+def write_lines(path, lines):
+    with open(path, "w", encoding="utf-8", newline="\n") as file:
+        file.write("\n".join(lines))
+        file.write("\n")
+
+
+def generate_corpus(directory, file_count=10, file_lines=100, language="python", clone_ratio=0.5, categories=None,
+                    seed=0):
+    """
+    Детерминированно (по seed) генерирует корпус из file_count файлов примерно по file_lines строк в directory.
+    Доля clone_ratio файлов - клоны случайно выбранных оригиналов, категории клонов (по умолчанию A-H)
+    чередуются по кругу. В manifest.json записываются параметры, список файлов и для каждого клона -
+    оригинал, категория и совпадающие отрезки строк (см. clone_segments). Возвращает манифест.
+    """
+    categories = list(categories or CLONE_CATEGORIES)
+    if language not in LANGUAGES:
+        raise ValueError(f"Неизвестный язык: {language}")
+    extension = LANGUAGES[language]
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    clone_count = min(int(file_count * clone_ratio), file_count - 1) if file_count > 1 else 0
+    origin_count = file_count - clone_count
+    width = len(str(file_count))
+    manifest = {"format": MANIFEST_FORMAT, "seed": seed, "language": language, "file_lines": file_lines,
+                "files": [], "clones": []}
+    # Оригиналы не хранятся в памяти: для клона оригинал генерируется повторно по своему зерну
+    origin_seeds = [rng.getrandbits(64) for _ in range(origin_count)]
+    origin_names = [f"origin_{number:0{width}d}{extension}" for number in range(origin_count)]
+    for name, origin_seed in zip(origin_names, origin_seeds):
+        write_lines(os.path.join(directory, name), render(*ProgramGenerator(random.Random(origin_seed), language)
+                                                          .program(file_lines)))
+        manifest["files"].append(name)
+    for number in range(clone_count):
+        category = categories[number % len(categories)]
+        origin = rng.randrange(origin_count)
+        generator = ProgramGenerator(random.Random(origin_seeds[origin]), language)
+        prologue, blocks = generator.program(file_lines)
+        generator.rng.seed(rng.getrandbits(64))
+        numbered_lines = make_clone(generator, prologue, blocks, category)
+        name = f"clone_{number:0{width}d}_{category}{extension}"
+        write_lines(os.path.join(directory, name), [line for line, _ in numbered_lines])
+        manifest["files"].append(name)
+        manifest["clones"].append({"file": name, "origin": origin_names[origin], "category": category,
+                                   "clone_type": CLONE_CATEGORIES[category].clone_type,
+                                   "segments": clone_segments(numbered_lines)})
+    with open(os.path.join(directory, MANIFEST_NAME), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=1)
+    return manifest
+
+
+def generate_clone_pair(directory, file_lines=100, category="H", language="python", seed=0):
+    """Генерирует оригинал и один его клон категории category; возвращает (путь к клону, путь к оригиналу)."""
+    manifest = generate_corpus(directory, 2, file_lines, language, 0.5, [category], seed)
+    clone = manifest["clones"][0]
+    return os.path.join(directory, clone["file"]), os.path.join(directory, clone["origin"])
+
+
+def load_manifest(directory):
+    with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as file:
+        return json.load(file)
+
+
+if __name__ == "__main__":
+    # Частное тестирование алгоритма
+    import tempfile
+    from algorithms.greedy_string_tiling import search_greedy_string_tiling
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        manifest = generate_corpus(corpus_dir, file_count=16, file_lines=200)
+        for clone in manifest["clones"]:
+            percentage = search_greedy_string_tiling(os.path.join(corpus_dir, clone["file"]),
+                                                     os.path.join(corpus_dir, clone["origin"]))
+            print(f"{clone['file']} ({clone['origin']}): {percentage:.1f} %, отрезков {len(clone['segments'])}")
@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def max_diagonal_runs(target_ids, origin_ids, target_marked, origin_marked, block_size=256):
+    """
+    Вычисляет длины совпадений вдоль диагоналей K[i, j] = E[i, j] * (1 + K[i + 1, j + 1]),
+    где E[i, j] - строки target[i] и origin[j] равны и обе не помечены.
+    Матрица считается снизу вверх блоками по block_size строк, поэтому в памяти одновременно
+    находится не более block_size * len(origin_ids) значений.
+    Возвращает (максимальная длина, отсортированный список (i, j) с этой длиной).
+    """
+    target_ids = np.asarray(target_ids)
+    origin_ids = np.asarray(origin_ids)
+    origin_free = ~np.asarray(origin_marked, dtype=bool)
+    target_free = ~np.asarray(target_marked, dtype=bool)
+    width = len(origin_ids)
+    next_row = np.zeros(width + 1, dtype=np.int32)
+    max_match = 0
+    matches = []
+    for block_end in range(len(target_ids), 0, -block_size):
+        block_start = max(block_end - block_size, 0)
+        equal = (target_ids[block_start:block_end, None] == origin_ids[None, :]) & origin_free[None, :] & \
+            target_free[block_start:block_end, None]
+        runs = np.zeros((block_end - block_start, width + 1), dtype=np.int32)
+        for row in range(block_end - block_start - 1, -1, -1):
+            np.multiply(equal[row], next_row[1:] + 1, out=runs[row, :width])
+            next_row = runs[row]
+        block_max = int(runs.max(initial=0))
+        if block_max == 0 or block_max < max_match:
+            continue
+        if block_max > max_match:
+            max_match = block_max
+            matches = []
+        rows, columns = np.nonzero(runs == max_match)
+        matches.extend(zip((rows + block_start).tolist(), columns.tolist()))
+    return max_match, sorted(matches)
+
+
+def vectorized_greedy_string_tiling(target_ids, origin_ids, min_match_length=4, block_size=256):
+    """
+    Greedy String Tiling на массивах NumPy: на каждой итерации длины совпадений всех пар (i, j)
+    пересчитываются функцией max_diagonal_runs, а максимум и его позиции находятся редукциями массивов.
+    Совпадения размечаются в порядке (i, j), как в greedy_string_tiling.naive_greedy_string_tiling.
+    """
+    min_match_length = max(min_match_length, 1)
+    target_ids = np.asarray(target_ids, dtype=np.int64)
+    origin_ids = np.asarray(origin_ids, dtype=np.int64)
+    target_marked = np.zeros(len(target_ids), dtype=bool)
+    origin_marked = np.zeros(len(origin_ids), dtype=bool)
+    tiles = []
+
+    while True:
+        max_match, matches = max_diagonal_runs(target_ids, origin_ids, target_marked, origin_marked, block_size)
+        if max_match < min_match_length:
+            break
+        for i, j in matches:
+            if not target_marked[i:i + max_match].any() and not origin_marked[j:j + max_match].any():
+                target_marked[i:i + max_match] = True
+                origin_marked[j:j + max_match] = True
+                tiles.append((i, j, max_match))
+
+    return tiles
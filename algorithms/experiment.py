@@ -1,11 +1,8 @@
+import argparse
 import os
+import statistics
 import string
-import time
-from matplotlib import pyplot as plt
-from ast_find import calculate_plagiarism_percentage
-from greedy_string_tiling import search_greedy_string_tiling
-from heckel import search_heckel
-import numpy as np
+from algorithms.benchmark import ENGINES, WorkUnit, measure, run_metadata, run_work_units, write_benchmark_json
 
 # Путь к директории с тестовыми примерами
 test_examples_dir = os.path.join(os.path.dirname(__file__), '..', 'test_examples')
@@ -20,33 +17,95 @@ def load_test_example(example_name):
     with open(example_path, 'r', encoding='utf-8') as file:
         return file.read()
 
-def calc_plagiarism_matrix(find_plagiarism, origin_filename, target_filenames, method_name, test_count=10):
+def calc_plagiarism_matrix(method, origin_filename, target_filenames, method_name=None, test_count=10, *,
+                           measure_options=None, repetitions=1, workers=None, chunksize=1, **options):
     """
-    Вычисляет матрицу плагиата для заданного метода.
-    Сохраняет время выполнения и процент совпадений в соответствующие файлы.
+    Вычисляет матрицу плагиата для одного метода.
+    method - имя метода из benchmark.ENGINES (options передаются его сравнению, см. calc_plagiarism_matrices)
+    или, как раньше, функция поиска find_plagiarism(target_path, origin_path, **options). Для функции
+    нужно задать method_name (имя файлов результатов); она вызывается test_count раз в текущем процессе,
+    и измеряется только время вызова целиком (для method_name 'greedy' по умолчанию min_match_length=6).
     """
+    if callable(method):
+        if method_name is None:
+            raise TypeError("Для функции поиска нужно указать method_name")
+        calc_function_plagiarism_matrix(method, origin_filename, target_filenames, method_name, test_count,
+                                        **options)
+        return
+    if not isinstance(method, str):
+        raise TypeError(f"method должен быть именем метода из benchmark.ENGINES или функцией поиска, "
+                        f"получено {type(method).__name__}")
+    if method_name is not None:
+        raise TypeError("method_name задаётся только для функции поиска; для метода из ENGINES это его имя")
+    calc_plagiarism_matrices({method: options}, origin_filename, target_filenames,
+                             measure_options=measure_options, repetitions=repetitions, workers=workers,
+                             chunksize=chunksize)
+
+def calc_function_plagiarism_matrix(find_plagiarism, origin_filename, target_filenames, method_name, test_count=10,
+                                    **options):
+    """
+    Вычисляет матрицу плагиата для функции поиска find_plagiarism: для каждого тестового примера
+    функция вызывается test_count раз (без прогревающих вызовов), результаты записываются так же,
+    как в calc_plagiarism_matrices, с единственным этапом total.
+    """
+    if method_name == 'greedy':
+        # Для метода GST используется дополнительный аргумент min_match_length
+        options.setdefault('min_match_length', 6)
+    results = {}
+    for target_filename in target_filenames:
+        percentage, stats = measure(find_plagiarism, os.path.join(test_examples_dir, target_filename),
+                                    os.path.join(test_examples_dir, origin_filename), warmup=0,
+                                    min_runs=test_count, max_runs=test_count, min_time=0, **options)
+        results[target_filename] = {"percentage": percentage, "repetitions": [{"total": stats}]}
+    write_plagiarism_matrix(method_name, results,
+                            run_metadata(method=method_name, function=find_plagiarism.__qualname__,
+                                         origin=origin_filename, options=options, test_count=test_count))
+
+def calc_plagiarism_matrices(methods, origin_filename, target_filenames, *, measure_options=None, repetitions=1,
+                             workers=None, chunksize=1):
+    """
+    Вычисляет матрицы плагиата для методов methods (имя из benchmark.ENGINES -> параметры сравнения).
+    Единицы работы (метод, тестовый пример, повтор) выполняются параллельно в пуле из workers процессов
+    (см. benchmark.run_work_units); этапы чтения, токенизации (разбора) и сравнения измеряются отдельно
+    внутри рабочих процессов. Для каждого метода в {method_name}_time.csv записывается медиана (по повторам)
+    медианного времени всего конвейера (чтение, токенизация и сравнение) в мс, в {method_name}_percentage.csv -
+    процент совпадений, в {method_name}_benchmark.json - статистика всех этапов каждого повтора и описание запуска.
+    По умолчанию выполняется один повтор: каждый повтор - это measure() с прогревом и по умолчанию не менее
+    чем 10 замерами (min_runs), поэтому он уже содержит столько же замеров, сколько прежние test_count=10 вызовов.
+    """
+    for method_name in methods:
+        if not isinstance(method_name, str):
+            raise TypeError(f"Метод задаётся именем из benchmark.ENGINES, получено {type(method_name).__name__}")
+        if method_name not in ENGINES:
+            raise ValueError(f"Неизвестный метод: {method_name!r}; доступны {', '.join(ENGINES)}")
+    units = [WorkUnit(method_name, os.path.join(test_examples_dir, target_filename),
+                      os.path.join(test_examples_dir, origin_filename), repetition, options, measure_options)
+             for method_name, options in methods.items()
+             for target_filename in target_filenames
+             for repetition in range(repetitions)]
+    unit_results = iter(run_work_units(units, workers, chunksize))
+    for method_name, options in methods.items():
+        results = {}
+        for target_filename in target_filenames:
+            runs = [next(unit_results) for _ in range(repetitions)]
+            results[target_filename] = {"percentage": runs[0]["percentage"],
+                                        "repetitions": [run["stages"] for run in runs]}
+        write_plagiarism_matrix(method_name, results,
+                                run_metadata(method=method_name, origin=origin_filename, options=options,
+                                             measure_options=measure_options or {}, repetitions=repetitions,
+                                             workers=workers or os.cpu_count(), chunksize=chunksize))
+
+def write_plagiarism_matrix(method_name, results, metadata):
+    """Записывает результаты метода (тестовый пример -> процент и статистика повторов) в CSV и JSON."""
     time_out_path = os.path.join(results_dir, method_name + '_time.csv')
     percentage_out_path = os.path.join(results_dir, method_name + '_percentage.csv')
+    benchmark_out_path = os.path.join(results_dir, method_name + '_benchmark.json')
     with open(time_out_path, 'w') as time_out, open(percentage_out_path, 'w') as percentage_out:
-        for target_filename in target_filenames:
-            total_percentage = 0.0
-            total_time = 0.0
-            for _ in range(test_count):
-                start_time = time.time()
-                # Для метода GST используется дополнительный аргумент min_match_length
-                if method_name == 'greedy':
-                    percentage = find_plagiarism(os.path.join(test_examples_dir, target_filename),
-                                                 os.path.join(test_examples_dir, origin_filename),
-                                                 min_match_length=6)
-                else:
-                    percentage = find_plagiarism(os.path.join(test_examples_dir, target_filename),
-                                                 os.path.join(test_examples_dir, origin_filename))
-                total_time += (time.time() - start_time)
-                total_percentage += percentage
-            avg_percentage = total_percentage / test_count
-            avg_time = (total_time / test_count) * 1000
-            percentage_out.write(f"{avg_percentage}\n")
-            time_out.write(f"{avg_time}\n")
+        for result in results.values():
+            total_time = statistics.median(stages['total'].median for stages in result['repetitions'])
+            percentage_out.write(f"{result['percentage']}\n")
+            time_out.write(f"{total_time / 1e6}\n")
+    write_benchmark_json(benchmark_out_path, results, metadata)
 
 def merge_data(type):
     """
@@ -71,10 +130,12 @@ def merge_data(type):
             outfile.write(
                 f'{string.ascii_uppercase[i]},{greedy_data[i]},{heckel_data[i]},{ast_data[i]},{avg_score}\n')
 
-def plot_results0(variant, title, ylabel):
+def plot_results0(variant, title, ylabel, show=True):
     """
-    Строит графики результатов для времени выполнения и процента совпадений.
+    Строит линейный график результатов variant (время или процент совпадений) для трёх методов
+    с подписями значений у точек. При show=False график только сохраняется в файл.
     """
+    from matplotlib import pyplot as plt
     greedy_file = os.path.join(results_dir, f'greedy_{variant}.csv')
     heckel_file = os.path.join(results_dir, f'heckel_{variant}.csv')
     ast_file = os.path.join(results_dir, f'ast_{variant}.csv')
@@ -113,12 +174,18 @@ def plot_results0(variant, title, ylabel):
         plt.grid(True)
         plot_path = os.path.join(results_dir, f'{variant}_plot.png')
         plt.savefig(plot_path)
-        plt.show()
+        if show:
+            plt.show()
+        plt.close()
 
-def plot_results(variant, title, ylabel):
+def plot_results(variant, title, ylabel, show=True):
     """
-    Строит графики результатов для времени выполнения и процента совпадений.
+    Строит столбчатую диаграмму результатов variant: для каждого тестового примера - три столбца методов.
+    matplotlib и numpy импортируются при вызове, поэтому запуск с --no-plot их не загружает.
+    При show=False диаграмма только сохраняется в файл (для запуска без дисплея).
     """
+    from matplotlib import pyplot as plt
+    import numpy as np
     greedy_file = os.path.join(results_dir, f'greedy_{variant}.csv')
     heckel_file = os.path.join(results_dir, f'heckel_{variant}.csv')
     ast_file = os.path.join(results_dir, f'ast_{variant}.csv')
@@ -170,15 +237,31 @@ def plot_results(variant, title, ylabel):
         plt.tight_layout()
         plot_path = os.path.join(results_dir, f'{variant}_plot.png')
         plt.savefig(plot_path, dpi=300)
-        plt.show()
+        if show:
+            plt.show()
+        plt.close()
 
 
 
 
-def main():
+def parse_args(argv=None):
+    """Разбирает аргументы командной строки эксперимента."""
+    parser = argparse.ArgumentParser(description='Сравнение методов поиска заимствований на тестовых примерах.')
+    parser.add_argument('--no-plot', action='store_true',
+                        help='не строить графики (matplotlib не импортируется)')
+    parser.add_argument('--no-show', action='store_true',
+                        help='сохранить графики в файлы, не открывая окна (для запуска без дисплея)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='число рабочих процессов (по умолчанию - по числу процессоров)')
+    parser.add_argument('--repetitions', type=int, default=1, help='число повторов замеров')
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """
     Основная функция, выполняющая тестирование и построение графиков.
+    argv - аргументы командной строки (см. parse_args), по умолчанию - sys.argv[1:].
     """
+    args = parse_args(argv)
     target_filenames = [
         'A_copy_type1_complete.py',
         'B_copy_type2_renamed_variables_33.py',
@@ -190,24 +273,22 @@ def main():
         'H_copy_type3_renamed_added_and_reordered.py'
     ]
 
-    calc_plagiarism_matrix(
-        find_plagiarism=calculate_plagiarism_percentage, origin_filename='original_program.py',
-        target_filenames=target_filenames, method_name='ast',
-    )
-    calc_plagiarism_matrix(
-        find_plagiarism=search_greedy_string_tiling, origin_filename='original_program.py',
-        target_filenames=target_filenames, method_name='greedy',
-    )
-    calc_plagiarism_matrix(
-        find_plagiarism=search_heckel, origin_filename='original_program.py',
-        target_filenames=target_filenames, method_name='heckel',
-    )
+    # Для метода GST используется дополнительный аргумент min_match_length
+    methods = {
+        'ast': {},
+        'greedy': {'min_match_length': 6},
+        'heckel': {},
+    }
+    calc_plagiarism_matrices(methods, origin_filename='original_program.py', target_filenames=target_filenames,
+                             repetitions=args.repetitions, workers=args.workers)
 
     merge_data('time')
     merge_data('percentage')
 
-    plot_results('time', 'Сравнение времени выполнения', 'Время выполнения, мс')
-    plot_results('percentage', 'Сравнение процентного заимствования', 'Процент заимствования, %')
+    if not args.no_plot:
+        plot_results('time', 'Сравнение времени выполнения', 'Время выполнения, мс', show=not args.no_show)
+        plot_results('percentage', 'Сравнение процентного заимствования', 'Процент заимствования, %',
+                     show=not args.no_show)
 
     # Вывод средних значений по времени и проценту заимствований
     print_average_results()
@@ -0,0 +1,89 @@
+import mmap
+from array import array
+import numpy as np
+
+
+class MappedFile:
+    """
+    Файл, отображённый в память, с компактным индексом начал строк (array('q')).
+    Строки декодируются из UTF-8 только при обращении к ним, поэтому в памяти не хранится копия
+    всего текста в виде списка строк. Последовательность строк совпадает с результатом readlines()
+    в текстовом режиме для файлов с переводами строк '\\n' и '\\r\\n'.
+    """
+    CHUNK_SIZE = 16 * 1024 * 1024  # Размер части файла при поиске переводов строк
+
+    def __init__(self, file_path, encoding="utf-8"):
+        self.file_path = file_path
+        self.encoding = encoding
+        with open(file_path, "rb") as file:
+            try:
+                self.__data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Пустой файл нельзя отобразить в память
+                self.__data = b""
+        self.__offsets = MappedFile.__build_line_offsets(self.__data)
+
+    @staticmethod
+    def __build_line_offsets(data):
+        offsets = array("q", [0])
+        size = len(data)
+        for chunk_start in range(0, size, MappedFile.CHUNK_SIZE):
+            chunk = np.frombuffer(data, dtype=np.uint8, count=min(MappedFile.CHUNK_SIZE, size - chunk_start),
+                                  offset=chunk_start)
+            offsets.frombytes((np.flatnonzero(chunk == ord("\n")) + chunk_start + 1).astype(np.int64).tobytes())
+        if offsets[-1] != size:
+            offsets.append(size)
+        return offsets
+
+    def __len__(self):
+        return len(self.__offsets) - 1
+
+    def line_view(self, index):
+        """Возвращает байты строки (вместе с переводом строки) без копирования."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Номер строки вне файла")
+        return memoryview(self.__data)[self.__offsets[index]:self.__offsets[index + 1]]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        line = str(self.line_view(index), self.encoding)
+        return line[:-2] + "\n" if line.endswith("\r\n") else line
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def view(self):
+        """
+        Возвращает байты всего файла (memoryview) без копирования.
+        memoryview нужно освободить (release() или with) до закрытия файла.
+        """
+        return memoryview(self.__data)
+
+    def read_bytes(self):
+        """Возвращает содержимое файла в виде bytes."""
+        return bytes(self.__data)
+
+    def text(self):
+        """
+        Декодирует содержимое файла целиком прямо из отображения, без промежуточной копии в bytes;
+        переводы строк '\r\n' и '\r' заменяются, только если в файле есть '\r'.
+        """
+        with memoryview(self.__data) as view:
+            text = str(view, self.encoding)
+        if self.__data.find(b"\r") < 0:
+            return text
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    def close(self):
+        if isinstance(self.__data, mmap.mmap):
+            self.__data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,49 +1,278 @@
 import os
+from array import array
+from collections import Counter, namedtuple
+import numpy as np
+from algorithms.diagonal_runs import vectorized_greedy_string_tiling
+from algorithms.file_access import MappedFile
+from algorithms.suffix_array import iterate_suffix_array_tiling, suffix_array_greedy_string_tiling
+from algorithms.threshold import ThresholdDecision, decide
+from tokenizers.token import TokenStringIndex
+
+# Строки файла без копии текста: ids - номера различных строк (array('i')), keys - различные строки
+# (bytes без пробельных символов по краям) в порядке номеров, lengths - длины строк в символах (array('i'))
+LineTable = namedtuple("LineTable", ["ids", "keys", "lengths"])
+# ASCII-символы, которые str.strip() считает пробельными
+ASCII_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
 
 def load_file_content(file_path):
-    """Загружает содержимое файла и возвращает его построчно."""
+    """
+    Загружает содержимое файла и возвращает его построчно (список строк, как readlines()).
+    Файл отображается в память (MappedFile) и закрывается после чтения; каждая строка декодируется один раз.
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-        return lines
+        with MappedFile(file_path) as file:
+            return list(file)
     except FileNotFoundError:
         print(f"Ошибка: Файл '{file_path}' не найден.")
         return None
 
-def is_marked_match(marked_dict, start, length):
-    """Проверяет, является ли данная строка уже частью найденного совпадения."""
-    return any(start + i in marked_dict for i in range(length))
+def load_line_table(file_path):
+    """
+    Загружает строки файла в LineTable или возвращает None, если файл не найден.
+    Строки берутся срезами отображения в память (MappedFile.line_view) и нормализуются как line.strip()
+    прямо в байтах; в памяти остаются только различные строки, а не список всех строк файла.
+    """
+    try:
+        with MappedFile(file_path) as file:
+            return line_table(file)
+    except FileNotFoundError:
+        print(f"Ошибка: Файл '{file_path}' не найден.")
+        return None
 
-def mark_positions(marked_dict, start, length):
+def line_table(file):
+    """Строит LineTable по строкам MappedFile (см. load_line_table)."""
+    key_ids = {}
+    ids = array("i")
+    lengths = array("i")
+    for index in range(len(file)):
+        key = bytes(file.line_view(index)).strip(ASCII_WHITESPACE)
+        if key.isascii():
+            length = len(key)
+        else:
+            # Пробельные символы вне ASCII и длина в символах требуют декодирования строки
+            line = str(key, file.encoding).strip()
+            key = line.encode(file.encoding)
+            length = len(line)
+        ids.append(key_ids.setdefault(key, len(key_ids)))
+        lengths.append(length)
+    return LineTable(ids, list(key_ids), lengths)
+
+def merge_line_tables(target, origin):
+    """Переводит номера строк двух LineTable в общие идентификаторы: одинаковые строки получают одинаковые номера."""
+    line_ids = {}
+    merged = []
+    for table in (target, origin):
+        key_map = np.array([line_ids.setdefault(key, len(line_ids)) for key in table.keys], dtype=np.intc)
+        merged.append(array("i", key_map[np.frombuffer(table.ids, dtype=np.intc)].tobytes()))
+    return merged[0], merged[1]
+
+def is_marked_match(marked, start, length):
+    """Проверяет, является ли данная строка уже частью найденного совпадения (marked - bytearray меток строк)."""
+    return marked.find(1, start, start + length) >= 0
+
+def mark_positions(marked, start, length):
     """Помечает строки как совпадающие."""
-    for i in range(length):
-        marked_dict[start + i] = True
+    marked[start:start + length] = b"\x01" * length
+
+def intern_lines(lines, line_ids):
+    """
+    Нормализует строки (strip) и заменяет каждую целочисленным идентификатором из словаря line_ids,
+    дополняя его новыми строками. Одинаковые строки двух файлов получают одинаковые идентификаторы.
+    """
+    return array("i", [line_ids.setdefault(line.strip(), len(line_ids)) for line in lines])
+
+def search_greedy_string_tiling(target_file, origin_file, min_match_length=4, algorithm="rkr", tokenizer=None,
+                                token_cache=None):
+    """
+    Основная функция для поиска заимствований методом Greedy String Tiling.
+    algorithm - "rkr" (Running Karp-Rabin), "suffix_array" (суффиксный массив, для длинных файлов),
+    "vectorized" (длины совпадений всех пар строк на массивах NumPy, для файлов средней длины)
+    или "naive" (полный перебор пар строк), результаты совпадают.
+    Если задан tokenizer (например, CTokenizer или heckel.PythonTokenizer), сравниваются последовательности
+    символов токенов, а не строки файлов (см. search_token_greedy_string_tiling).
+    """
+    if tokenizer is not None:
+        return search_token_greedy_string_tiling(target_file, origin_file, tokenizer, min_match_length, algorithm,
+                                                 token_cache)
+
+    target_table = load_line_table(target_file)
+    origin_table = load_line_table(origin_file)
+
+    if target_table is None or origin_table is None:
+        return None
+
+    return compare_line_tables(target_table, origin_table, min_match_length, algorithm)
+
+def compare_line_tables(target_table, origin_table, min_match_length=4, algorithm="rkr"):
+    """Процент совпадения строк двух LineTable (как calculate_tiles_percentage для списков строк)."""
+    target_ids, origin_ids = merge_line_tables(target_table, origin_table)
+    tiles = tile_sequences(target_ids, origin_ids, min_match_length, algorithm)
+    return calculate_lengths_percentage(target_table.lengths, tiles)
+
+def greedy_string_tiling(target_lines, origin_lines, min_match_length=4, algorithm="rkr"):
+    """Возвращает список совпавших фрагментов (i, j, k): строки target[i:i+k] совпадают со строками origin[j:j+k]."""
+    line_ids = {}
+    return tile_sequences(intern_lines(target_lines, line_ids), intern_lines(origin_lines, line_ids),
+                          min_match_length, algorithm)
+
+def tile_sequences(target_ids, origin_ids, min_match_length=4, algorithm="rkr"):
+    """Greedy String Tiling двух последовательностей целых чисел (идентификаторов строк или кодов токенов)."""
+    if algorithm == "naive":
+        return naive_greedy_string_tiling(target_ids, origin_ids, min_match_length)
+    if algorithm == "rkr":
+        return rkr_greedy_string_tiling(target_ids, origin_ids, min_match_length)
+    if algorithm == "suffix_array":
+        return suffix_array_greedy_string_tiling(target_ids, origin_ids, min_match_length)
+    if algorithm == "vectorized":
+        return vectorized_greedy_string_tiling(target_ids, origin_ids, min_match_length)
+    raise ValueError(f"Неизвестный алгоритм Greedy String Tiling: {algorithm}")
+
+def calculate_tiles_percentage(target_lines, tiles):
+    """Вычисляет процент совпадения как долю символов совпавших строк (без пробельных символов по краям)."""
+    return calculate_lengths_percentage([len(line.strip()) for line in target_lines], tiles)
+
+def calculate_lengths_percentage(lengths, tiles):
+    """Процент совпадения по длинам строк target: доля суммарной длины строк, покрытых фрагментами tiles."""
+    total_matched_length = sum(sum(lengths[i:i + k]) for i, _, k in tiles)
+    total_length = sum(lengths)
+    return (total_matched_length / total_length) * 100 if total_length > 0 else 0
+
+def load_token_index(file_path, tokenizer, token_cache=None):
+    """Токенизирует файл и возвращает строку символов токенов со смещениями в исходном коде (TokenStringIndex)."""
+    try:
+        with MappedFile(file_path) as file:
+            src = file.text()
+    except FileNotFoundError:
+        print(f"Ошибка: Файл '{file_path}' не найден.")
+        return None
+    tokens = token_cache.tokenize(src, tokenizer)[0] if token_cache is not None else tokenizer.tokenize(src)
+    return TokenStringIndex(tokens)
+
+def token_greedy_string_tiling(target_index, origin_index, min_match_length=4, algorithm="rkr"):
+    """
+    Greedy String Tiling по последовательностям символов токенов двух TokenStringIndex.
+    Возвращает совпавшие фрагменты ((start, end) в target, (start, end) в origin, число токенов).
+    """
+    target_codes = array("i", map(ord, target_index.token_str))
+    origin_codes = array("i", map(ord, origin_index.token_str))
+    return [(target_index.source_range(i, i + k), origin_index.source_range(j, j + k), k)
+            for i, j, k in tile_sequences(target_codes, origin_codes, min_match_length, algorithm)]
 
-def search_greedy_string_tiling(target_file, origin_file, min_match_length=4):
-    """Основная функция для поиска заимствований методом Greedy String Tiling."""
-    target_lines = load_file_content(target_file)
-    origin_lines = load_file_content(origin_file)
+def search_token_greedy_string_tiling(target_file, origin_file, tokenizer, min_match_length=4, algorithm="rkr",
+                                      token_cache=None):
+    """
+    Greedy String Tiling по токенам: устойчив к переименованию переменных, так как имена не входят в токены.
+    Процент совпадения - доля токенов target, покрытых найденными фрагментами.
+    """
+    target_index = load_token_index(target_file, tokenizer, token_cache)
+    origin_index = load_token_index(origin_file, tokenizer, token_cache)
 
-    if target_lines is None or origin_lines is None:
+    if target_index is None or origin_index is None:
         return None
 
+    return compare_token_indexes(target_index, origin_index, min_match_length, algorithm)
+
+
+def compare_token_indexes(target_index, origin_index, min_match_length=4, algorithm="rkr"):
+    """Вычисляет процент токенов target_index, покрытых фрагментами token_greedy_string_tiling."""
+    tiles = token_greedy_string_tiling(target_index, origin_index, min_match_length, algorithm)
+    total_matched_length = sum(k for _, _, k in tiles)
+    return (total_matched_length / len(target_index)) * 100 if len(target_index) > 0 else 0
+
+def threshold_greedy_string_tiling(target_file, origin_file, threshold, min_match_length=4, tokenizer=None,
+                                   token_cache=None):
+    """
+    Проверяет, достигает ли процент совпадения (как в search_greedy_string_tiling) порога threshold.
+    Разметка останавливается, как только нижняя граница достигает порога или верхняя опускается ниже него;
+    возвращает ThresholdDecision или None, если файл не найден.
+    """
+    if tokenizer is not None:
+        target_index = load_token_index(target_file, tokenizer, token_cache)
+        origin_index = load_token_index(origin_file, tokenizer, token_cache)
+        if target_index is None or origin_index is None:
+            return None
+        target_ids = array("i", map(ord, target_index.token_str))
+        origin_ids = array("i", map(ord, origin_index.token_str))
+        weights = [1] * len(target_ids)
+    else:
+        target_table = load_line_table(target_file)
+        origin_table = load_line_table(origin_file)
+        if target_table is None or origin_table is None:
+            return None
+        target_ids, origin_ids = merge_line_tables(target_table, origin_table)
+        weights = target_table.lengths
+    return threshold_tile_sequences(target_ids, origin_ids, weights, threshold, min_match_length)
+
+def threshold_tile_sequences(target_ids, origin_ids, weights, threshold, min_match_length=4):
+    """
+    Проверка порога для Greedy String Tiling последовательностей: процент - доля суммарного веса weights
+    элементов target, покрытых фрагментами. Фрагменты размечаются итерациями iterate_suffix_array_tiling,
+    после каждой итерации границы пересчитываются.
+    """
+    total_weight = sum(weights)
+    if total_weight == 0:
+        return ThresholdDecision(0 >= threshold, 0, 0)
+    target_marked = bytearray(len(target_ids))
+    origin_counts = Counter(origin_ids)
+    matched_weight = 0
+    decision = decide(0, tiling_upper_bound(target_ids, weights, target_marked, origin_counts, min_match_length)
+                      * 100 / total_weight, threshold)
+    if decision is not None:
+        return decision
+    for tiles in iterate_suffix_array_tiling(target_ids, origin_ids, min_match_length):
+        for i, j, k in tiles:
+            mark_positions(target_marked, i, k)
+            origin_counts.subtract(origin_ids[j:j + k])
+            matched_weight += sum(weights[i:i + k])
+        upper_weight = matched_weight + tiling_upper_bound(target_ids, weights, target_marked, origin_counts,
+                                                           min_match_length)
+        decision = decide(matched_weight * 100 / total_weight, upper_weight * 100 / total_weight, threshold)
+        if decision is not None:
+            return decision
+    percent = matched_weight * 100 / total_weight
+    return ThresholdDecision(percent >= threshold, percent, percent)
+
+def tiling_upper_bound(target_ids, weights, target_marked, origin_counts, min_match_length):
+    """
+    Верхняя граница веса, который ещё могут покрыть новые фрагменты: непомеченные элементы target,
+    которые встречаются среди непомеченных элементов origin и образуют подряд отрезки длины не меньше min_match_length.
+    """
+    bound = 0
+    run_weight = 0
+    run_length = 0
+    for i, line_id in enumerate(target_ids):
+        if not target_marked[i] and origin_counts[line_id] > 0:
+            run_weight += weights[i]
+            run_length += 1
+            continue
+        if run_length >= min_match_length:
+            bound += run_weight
+        run_weight = 0
+        run_length = 0
+    if run_length >= min_match_length:
+        bound += run_weight
+    return bound
+
+def naive_greedy_string_tiling(target_ids, origin_ids, min_match_length=4):
+    """
+    Greedy String Tiling полным перебором пар строк: O(n * m * k) на каждой итерации.
+    Строки задаются идентификаторами из intern_lines.
+    """
     tiles = []
-    target_marked = {}
-    origin_marked = {}
-    total_matched_length = 0
+    target_marked = bytearray(len(target_ids))
+    origin_marked = bytearray(len(origin_ids))
     max_match = min_match_length + 1
 
     while max_match > min_match_length:
         max_match = min_match_length
         matches = []
 
-        for i in range(len(target_lines)):
-            for j in range(len(origin_lines)):
+        for i in range(len(target_ids)):
+            for j in range(len(origin_ids)):
                 k = 0
-                while i + k < len(target_lines) and j + k < len(origin_lines) and \
-                        target_lines[i + k].strip() == origin_lines[j + k].strip() and \
-                        not is_marked_match(target_marked, i + k, 1) and \
-                        not is_marked_match(origin_marked, j + k, 1):
+                while i + k < len(target_ids) and j + k < len(origin_ids) and \
+                        target_ids[i + k] == origin_ids[j + k] and \
+                        not target_marked[i + k] and not origin_marked[j + k]:
                     k += 1
                 if k > max_match:
                     matches = [(i, j, k)]
@@ -57,13 +286,91 @@ def search_greedy_string_tiling(target_file, origin_file, min_match_length=4):
                 mark_positions(target_marked, i, k)
                 mark_positions(origin_marked, j, k)
                 tiles.append((i, j, k))
-                total_matched_length += sum(len(target_lines[i + n].strip()) for n in range(k))
 
-    # Вычисляем процент совпадения
-    total_length = sum(len(line.strip()) for line in target_lines)
-    plagiarism_percent = (total_matched_length / total_length) * 100 if total_length > 0 else 0
+    return tiles
+
+# Основание и модуль хэша Карпа-Рабина по последовательности идентификаторов строк
+# (модуль - простое число Мерсенна 2^61 - 1)
+RKR_HASH_BASE = 1000003
+RKR_HASH_MODULUS = (1 << 61) - 1
+
+def window_hashes(line_ids, marked, length):
+    """Возвращает {хэш окна: [начала окон]} для всех окон длины length без помеченных строк."""
+    windows = {}
+    power = pow(RKR_HASH_BASE, length, RKR_HASH_MODULUS)
+    window_hash = 0
+    marked_count = 0
+    for end, line_id in enumerate(line_ids):
+        window_hash = (window_hash * RKR_HASH_BASE + line_id) % RKR_HASH_MODULUS
+        marked_count += marked[end]
+        start = end - length + 1
+        if start > 0:
+            window_hash = (window_hash - line_ids[start - 1] * power) % RKR_HASH_MODULUS
+            marked_count -= marked[start - 1]
+        if start >= 0 and not marked_count:
+            windows.setdefault(window_hash, []).append(start)
+    return windows
+
+def scan_pattern(target_ids, origin_ids, target_marked, origin_marked, length):
+    """
+    Находит максимальные непомеченные совпадения длины не меньше length.
+    Совпадение считается от левой границы (предыдущие строки различаются или помечены) и продолжается вправо,
+    пока строки совпадают и не помечены. Возвращает (максимальная длина, список (i, j) с этой длиной).
+    """
+    origin_windows = window_hashes(origin_ids, origin_marked, length)
+    max_match = 0
+    matches = []
+    for window_hash, target_starts in window_hashes(target_ids, target_marked, length).items():
+        origin_starts = origin_windows.get(window_hash)
+        if origin_starts is None:
+            continue
+        for i in target_starts:
+            for j in origin_starts:
+                if i and j and not target_marked[i - 1] and not origin_marked[j - 1] and \
+                        target_ids[i - 1] == origin_ids[j - 1]:
+                    continue
+                k = 0
+                while i + k < len(target_ids) and j + k < len(origin_ids) and \
+                        target_ids[i + k] == origin_ids[j + k] and \
+                        not target_marked[i + k] and not origin_marked[j + k]:
+                    k += 1
+                if k < length or k < max_match:
+                    continue
+                if k > max_match:
+                    max_match = k
+                    matches = []
+                matches.append((i, j))
+    return max_match, sorted(matches)
+
+def rkr_greedy_string_tiling(target_ids, origin_ids, min_match_length=4):
+    """
+    Greedy String Tiling с хэшированием Карпа-Рабина (RKR-GST) и убывающей длиной поиска.
+    Окна строк длины search_length хэшируются, совпадения ищутся через хэш-таблицу окон origin.
+    Если совпадений длины search_length нет, длина поиска уменьшается вдвое, но не ниже min_match_length.
+    Фрагменты размечаются в том же порядке, что и в naive_greedy_string_tiling, поэтому результаты совпадают.
+    """
+    min_match_length = max(min_match_length, 1)
+    target_marked = bytearray(len(target_ids))
+    origin_marked = bytearray(len(origin_ids))
+    tiles = []
+    search_length = min(len(target_ids), len(origin_ids))
+
+    while search_length >= min_match_length:
+        max_match, matches = scan_pattern(target_ids, origin_ids, target_marked, origin_marked, search_length)
+        if not matches:
+            if search_length == min_match_length:
+                break
+            search_length = max(search_length // 2, min_match_length)
+            continue
+        for i, j in matches:
+            if not is_marked_match(target_marked, i, max_match) and not is_marked_match(origin_marked, j, max_match):
+                mark_positions(target_marked, i, max_match)
+                mark_positions(origin_marked, j, max_match)
+                tiles.append((i, j, max_match))
+        # После разметки все оставшиеся совпадения строго короче max_match
+        search_length = min(search_length, max_match - 1)
 
-    return plagiarism_percent
+    return tiles
 
 def run_greedy_string_tiling():
     # Получение абсолютного пути к текущему файлу
@@ -1,46 +1,15 @@
 from abc import ABC, abstractmethod
+import os
 import re
-from operator import attrgetter
-
-# Класс, представляющий токен
-class Token:
-    def __init__(self, symbol, start, end):
-        self.__symbol = symbol
-        self.__start = start
-        self.__end = end
-
-    @property
-    def symbol(self):
-        return self.__symbol
-
-    @property
-    def start(self):
-        return self.__start
-
-    @property
-    def end(self):
-        return self.__end
-
-    @staticmethod
-    def get_tokens_str_from_token_list(token_list):
-        token_str = ""
-        for token in sorted(token_list, key=lambda tok: tok.start):
-            token_str += token.symbol
-        return token_str
-
-    @staticmethod
-    def find_border_tokens_str_in_token_list(token_list, token_str):
-        for i in range(len(token_list)):
-            j = 0
-            while j < len(token_str) and i + j < len(token_list) and token_list[i + j].symbol == token_str[j]:
-                j += 1
-            if j == len(token_str):
-                return token_list[i].start, token_list[i + j - 1].end
-            i += 1
-        return None
+import numpy as np
+from algorithms.file_access import MappedFile
+from algorithms.threshold import ThresholdDecision, decide
+from tokenizers.source_buffer import SourceBuffer
+from tokenizers.token import Token, TokenStream
 
 # Абстрактный класс для токенизации Python кода
 class PythonTokenizer(ABC):
+    VERSION = 1  # Увеличивается при любом изменении результата токенизации (используется в ключе кэша)
     BORDER = "$"
     NOT_TOKEN = "."  # Используется при токенизации, не является конечным токеном
     SUBSTITUTE = "1"  # Используется для замены строковых и символьных констант в тексте программы
@@ -93,7 +62,7 @@ class PythonTokenizer(ABC):
 
     # Обработка исходного кода для токенизации
     def _process(self, src):
-        tokens = []
+        tokens = TokenStream()
 
         # Замена символьных и строковых констант
         src = PythonTokenizer.replace_strings(src)
@@ -146,7 +115,7 @@ class PythonTokenizer(ABC):
         # Токенизация управляющих конструкций
         tokens += PythonTokenizer.search_tokens(src, r'\bcontinue\b|\bbreak\b|\bpass\b|\breturn\b', "control")
 
-        return sorted(tokens, key=attrgetter('start', 'end'))
+        return tokens.sorted()
 
     # Поиск токенов
     @staticmethod
@@ -159,12 +128,7 @@ class PythonTokenizer(ABC):
     # Замена токенов в исходном коде
     @staticmethod
     def replace_tokens_in_src(src, tokens, replace=".", is_full_replace=True):
-        for token in tokens:
-            if is_full_replace is True:
-                src = src[:token.start] + replace * (token.end - token.start) + src[token.end:]
-            else:
-                src = src[:token.start] + replace * (token.end - token.start - 1) + src[token.end - 1:]
-        return src
+        return SourceBuffer(src).mask(tokens, replace, is_full_replace).render()
 
     # Замена строковых констант
     @staticmethod
@@ -175,15 +139,71 @@ class PythonTokenizer(ABC):
         return src
 
 # Функция для поиска заимствований методом Хеккеля
-def search_heckel(target_filename, origin_filename, length_n_gramm=4):
-    with open(origin_filename, encoding='utf-8') as origin_file, open(target_filename, encoding='utf-8') as target_file:
-        tokenizer = PythonTokenizer()
-        origin_tokens = Token.get_tokens_str_from_token_list(tokenizer.tokenize(origin_file.read()))
-        target_tokens = Token.get_tokens_str_from_token_list(tokenizer.tokenize(target_file.read()))
+#   token_cache - необязательный TokenCache: неизменённые файлы не токенизируются повторно
+#   use_hashes - сравнивать 64-битные хэши n-грамм вместо строк (см. split_into_n_gramm_hashes)
+#   winnow_window - размер окна просеивания (winnowing): сравниваются только отобранные отпечатки, включает use_hashes
+def search_heckel(target_filename, origin_filename, length_n_gramm=4, token_cache=None, use_hashes=False,
+                  winnow_window=None):
+    origin_tokens = get_tokens_str_from_file(origin_filename, token_cache)
+    target_tokens = get_tokens_str_from_file(target_filename, token_cache)
+    return compare_tokens_strs(target_tokens, origin_tokens, length_n_gramm, use_hashes, winnow_window)
+
+# Функция для вычисления коэффициента Жаккара (в процентах) множеств n-грамм двух строк токенов
+def compare_tokens_strs(target_tokens, origin_tokens, length_n_gramm=4, use_hashes=False, winnow_window=None):
+    if use_hashes or winnow_window:
+        origin_hashes = split_into_n_gramm_hashes(origin_tokens, length_n_gramm, winnow_window)
+        target_hashes = split_into_n_gramm_hashes(target_tokens, length_n_gramm, winnow_window)
+        intersection_size = len(np.intersect1d(origin_hashes, target_hashes, assume_unique=True))
+        return round(intersection_size / (len(origin_hashes) + len(target_hashes) - intersection_size) * 100)
     origin_n_gramms = split_into_n_gramms(origin_tokens, length_n_gramm)
     target_n_gramms = split_into_n_gramms(target_tokens, length_n_gramm)
     return round(len(origin_n_gramms & target_n_gramms) / len(origin_n_gramms | target_n_gramms) * 100)
 
+# Функция для проверки, достигает ли коэффициент Жаккара множеств хэшей n-грамм (в процентах, без округления) порога
+#   Сначала отсекаются пары с сильно различающимися размерами множеств: J <= min(|A|, |B|) / max(|A|, |B|).
+#   Затем меньшее множество пересекается с большим частями по chunk_size хэшей; после каждой части известны
+#   границы пересечения, и вычисление останавливается, как только границы коэффициента определяют ответ.
+def threshold_heckel(target_filename, origin_filename, threshold, length_n_gramm=4, token_cache=None,
+                     winnow_window=None, chunk_size=1024):
+    origin_tokens = get_tokens_str_from_file(origin_filename, token_cache)
+    target_tokens = get_tokens_str_from_file(target_filename, token_cache)
+    origin_hashes = split_into_n_gramm_hashes(origin_tokens, length_n_gramm, winnow_window)
+    target_hashes = split_into_n_gramm_hashes(target_tokens, length_n_gramm, winnow_window)
+    smaller, larger = sorted((origin_hashes, target_hashes), key=len)
+    if len(larger) == 0:
+        return ThresholdDecision(0 >= threshold, 0, 0)
+
+    def jaccard(intersection_size):
+        return intersection_size / (len(smaller) + len(larger) - intersection_size) * 100
+
+    decision = decide(0, jaccard(len(smaller)), threshold)
+    if decision is not None:
+        return decision
+    intersection_size = 0
+    for chunk_start in range(0, len(smaller), chunk_size):
+        chunk = smaller[chunk_start:chunk_start + chunk_size]
+        positions = np.minimum(np.searchsorted(larger, chunk), len(larger) - 1)
+        intersection_size += int(np.count_nonzero(larger[positions] == chunk))
+        remaining = len(smaller) - chunk_start - len(chunk)
+        decision = decide(jaccard(intersection_size), jaccard(intersection_size + remaining), threshold)
+        if decision is not None:
+            return decision
+    return ThresholdDecision(jaccard(intersection_size) >= threshold, jaccard(intersection_size),
+                             jaccard(intersection_size))
+
+# Функция для получения строки токенов файла (с использованием кэша токенизации, если он задан)
+def get_tokens_str_from_file(filename, token_cache=None):
+    with MappedFile(filename) as file:
+        src = file.text()
+    return get_tokens_str(src, token_cache)
+
+# Функция для получения строки токенов исходного кода (с использованием кэша токенизации, если он задан)
+def get_tokens_str(src, token_cache=None):
+    tokenizer = PythonTokenizer()
+    if token_cache is not None:
+        return token_cache.get_tokens_str(src, tokenizer)
+    return Token.get_tokens_str_from_token_list(tokenizer.tokenize(src))
+
 # Функция для разбиения строки токенов на n-граммы
 def split_into_n_gramms(token_str, length_n_gramm):
     if length_n_gramm <= 0:
@@ -193,10 +213,67 @@ def split_into_n_gramms(token_str, length_n_gramm):
         n_gramms.append(token_str[i:i + length_n_gramm])
     return set(n_gramms)
 
+# Основание полиномиального хэша Рабина — Карпа (нечётное, поэтому обратимо по модулю 2^64) и обратный к нему элемент
+HASH_BASE = 0x100000001B3
+HASH_BASE_INVERSE = pow(HASH_BASE, -1, 2 ** 64)
+
+# Функция для перевода строки токенов в массив кодов символов
+def get_token_codes(token_str):
+    return np.frombuffer(token_str.encode('utf-32-le'), dtype='<u4').astype(np.uint64)
+
+# Функция для вычисления хэшей Рабина — Карпа всех n-грамм (по позициям) за O(len(token_codes))
+#   hash(i) = sum(code[i + k] * HASH_BASE^(n - 1 - k)) mod 2^64 вычисляется через префиксные суммы
+#   code[j] * HASH_BASE^(-j), поэтому стоимость не зависит от длины n-граммы.
+#   Арифметика uint64 в numpy выполняется по модулю 2^64.
+def get_n_gramm_hashes(token_codes, length_n_gramm):
+    if isinstance(token_codes, str):
+        token_codes = get_token_codes(token_codes)
+    count = len(token_codes) - length_n_gramm + 1
+    if length_n_gramm <= 0 or count <= 0:
+        return np.empty(0, dtype=np.uint64)
+    token_codes = np.asarray(token_codes, dtype=np.uint64)
+    powers = np.full(len(token_codes), HASH_BASE, dtype=np.uint64)
+    powers[0] = 1
+    powers = np.cumprod(powers, dtype=np.uint64)
+    inverse_powers = np.full(len(token_codes), HASH_BASE_INVERSE, dtype=np.uint64)
+    inverse_powers[0] = 1
+    inverse_powers = np.cumprod(inverse_powers, dtype=np.uint64)
+    prefix = np.zeros(len(token_codes) + 1, dtype=np.uint64)
+    np.cumsum(token_codes * inverse_powers, dtype=np.uint64, out=prefix[1:])
+    return (prefix[length_n_gramm:] - prefix[:count]) * powers[length_n_gramm - 1:]
+
+# Функция для отбора отпечатков просеиванием (winnowing, как в MOSS)
+#   В каждом окне из window_size подряд идущих хэшей n-грамм выбирается минимальный, при равенстве - самый правый.
+#   Любой общий фрагмент длиной не менее window_size + length_n_gramm - 1 токенов даёт хотя бы один общий отпечаток,
+#   а число отпечатков уменьшается примерно в (window_size + 1) / 2 раз.
+#   Возвращает позиции отобранных n-грамм и их хэши.
+def winnow_n_gramm_hashes(hashes, window_size):
+    if window_size <= 0:
+        raise ValueError("Размер окна просеивания должен быть положительным")
+    if len(hashes) == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.uint64)
+    window_size = min(window_size, len(hashes))
+    windows = np.lib.stride_tricks.sliding_window_view(hashes, window_size)
+    positions = np.arange(len(windows)) + (window_size - 1 - np.argmin(windows[:, ::-1], axis=1))
+    positions = positions[np.concatenate(([True], positions[1:] != positions[:-1]))]
+    return positions, hashes[positions]
+
+# Функция для получения множества n-грамм в виде отсортированного массива уникальных 64-битных хэшей
+#   Результат совпадает с split_into_n_gramms с точностью до коллизий хэшей: для двух множеств
+#   по m n-грамм ожидаемое число ложных совпадений порядка m^2 / 2^64 (около 5e-8 при m = 10^6).
+#   При заданном winnow_window в множество попадают только отпечатки, отобранные winnow_n_gramm_hashes.
+def split_into_n_gramm_hashes(token_str, length_n_gramm, winnow_window=None):
+    hashes = get_n_gramm_hashes(token_str, length_n_gramm)
+    if winnow_window:
+        hashes = winnow_n_gramm_hashes(hashes, winnow_window)[1]
+    return np.unique(hashes)
+
 # Тестирование функции
 if __name__ == "__main__":
-    file1_path = "../test_examples/original_program.py"
-    file2_path = "../test_examples/F_copy_type3_reordered_lines.py"
+    # Частное тестирование алгоритма (запуск из корня проекта: python -m algorithms.heckel)
+    test_examples_dir = os.path.join(os.path.dirname(__file__), '..', 'test_examples')
+    file1_path = os.path.join(test_examples_dir, "original_program.py")
+    file2_path = os.path.join(test_examples_dir, "F_copy_type3_reordered_lines.py")
 
     plagiarism_percentage = search_heckel(target_filename=file2_path, origin_filename=file1_path)
     print("Процент заимствований между файлами:", plagiarism_percentage, "%")
@@ -0,0 +1,159 @@
+import math
+import os
+from collections import defaultdict
+from itertools import combinations
+import numpy as np
+from algorithms.heckel import get_tokens_str_from_file, split_into_n_gramm_hashes
+
+# Константы перемешивающей функции splitmix64 (биекция на 64-битных числах)
+GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+MIX_MULTIPLIER_1 = np.uint64(0xBF58476D1CE4E5B9)
+MIX_MULTIPLIER_2 = np.uint64(0x94D049BB133111EB)
+EMPTY_SLOT = np.iinfo(np.uint64).max
+
+
+def mix64(values, seed):
+    """Перемешивает 64-битные значения функцией splitmix64 с заданным зерном (вычисления по модулю 2^64)."""
+    z = values + np.uint64(seed) * GOLDEN_GAMMA
+    z = (z ^ (z >> np.uint64(30))) * MIX_MULTIPLIER_1
+    z = (z ^ (z >> np.uint64(27))) * MIX_MULTIPLIER_2
+    return z ^ (z >> np.uint64(31))
+
+
+def minhash_signature(fingerprints, num_perm=128, seed=1, block_size=16):
+    """
+    Вычисляет MinHash-сигнатуру множества 64-битных отпечатков n-грамм (см. heckel.split_into_n_gramm_hashes).
+    Каждая из num_perm случайных перестановок задаётся перемешиванием splitmix64 со своим зерном;
+    перестановки обрабатываются блоками, чтобы объём памяти не превышал block_size * len(fingerprints).
+    """
+    fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+    signature = np.full(num_perm, EMPTY_SLOT, dtype=np.uint64)
+    if len(fingerprints) == 0:
+        return signature
+    for block_start in range(0, num_perm, block_size):
+        seeds = np.arange(block_start, min(block_start + block_size, num_perm), dtype=np.uint64) + np.uint64(seed)
+        signature[block_start:block_start + len(seeds)] = mix64(fingerprints[None, :], seeds[:, None]).min(axis=1)
+    return signature
+
+
+def estimate_jaccard(signature1, signature2, confidence=0.95):
+    """
+    Оценивает коэффициент Жаккара по двум сигнатурам.
+    Возвращает (оценка, граница ошибки): по неравенству Хёффдинга истинное значение отличается от оценки
+    не более чем на границу ошибки с вероятностью confidence.
+    """
+    if len(signature1) != len(signature2):
+        raise ValueError("Сигнатуры должны иметь одинаковую длину")
+    estimate = float(np.mean(signature1 == signature2))
+    error_bound = math.sqrt(math.log(2 / (1 - confidence)) / (2 * len(signature1)))
+    return estimate, error_bound
+
+
+def choose_bands_rows(threshold, num_perm=128):
+    """Подбирает разбиение сигнатуры (bands, rows) с bands * rows = num_perm и порогом (1/bands)^(1/rows), ближайшим к threshold."""
+    divisors = [rows for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    rows = min(divisors, key=lambda rows: abs((rows / num_perm) ** (1 / rows) - threshold))
+    return num_perm // rows, rows
+
+
+class LSHIndex:
+    """
+    Индекс LSH по полосам MinHash-сигнатур. Сигнатура делится на bands полос по rows значений;
+    документы, совпавшие хотя бы в одной полосе, становятся кандидатами. Пара с коэффициентом Жаккара J
+    становится кандидатом с вероятностью 1 - (1 - J^rows)^bands, порог срабатывания примерно (1/bands)^(1/rows).
+    """
+
+    def __init__(self, bands=32, rows=4):
+        self.bands = bands
+        self.rows = rows
+        self.signatures = {}
+        self.__buckets = [defaultdict(list) for _ in range(bands)]
+
+    @property
+    def num_perm(self):
+        return self.bands * self.rows
+
+    @property
+    def threshold(self):
+        return (1 / self.bands) ** (1 / self.rows)
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def __band_keys(self, signature):
+        if len(signature) != self.num_perm:
+            raise ValueError(f"Ожидается сигнатура длины {self.num_perm}, получена длины {len(signature)}")
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def add(self, doc_id, signature):
+        """Добавляет документ в индекс."""
+        if doc_id in self.signatures:
+            raise KeyError(f"Документ {doc_id!r} уже добавлен в индекс")
+        signature = np.asarray(signature, dtype=np.uint64)
+        self.signatures[doc_id] = signature
+        for bucket, key in zip(self.__buckets, self.__band_keys(signature)):
+            bucket[key].append(doc_id)
+
+    def query(self, signature, threshold=None):
+        """
+        Возвращает кандидатов для сигнатуры в виде списка (документ, оценка Жаккара, граница ошибки),
+        отсортированного по убыванию оценки; при заданном threshold отбрасывает кандидатов с меньшей оценкой.
+        """
+        signature = np.asarray(signature, dtype=np.uint64)
+        candidates = set()
+        for bucket, key in zip(self.__buckets, self.__band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+        result = []
+        for doc_id in candidates:
+            estimate, error_bound = estimate_jaccard(signature, self.signatures[doc_id])
+            if threshold is None or estimate >= threshold:
+                result.append((doc_id, estimate, error_bound))
+        return sorted(result, key=lambda item: -item[1])
+
+    def candidate_pairs(self, threshold=None):
+        """
+        Возвращает пары-кандидаты (документ 1, документ 2, оценка Жаккара, граница ошибки) по всему индексу.
+        Сравниваются только документы из общих корзин, поэтому время близко к линейному по числу документов.
+        """
+        pairs = set()
+        for bucket in self.__buckets:
+            for doc_ids in bucket.values():
+                if len(doc_ids) > 1:
+                    pairs.update(combinations(doc_ids, 2))
+        result = []
+        for doc_id1, doc_id2 in pairs:
+            estimate, error_bound = estimate_jaccard(self.signatures[doc_id1], self.signatures[doc_id2])
+            if threshold is None or estimate >= threshold:
+                result.append((doc_id1, doc_id2, estimate, error_bound))
+        return sorted(result, key=lambda item: (-item[2], str(item[0]), str(item[1])))
+
+
+def get_file_signature(filename, length_n_gramm=4, num_perm=128, token_cache=None, winnow_window=None):
+    """Вычисляет MinHash-сигнатуру множества n-грамм токенов файла (или отпечатков, отобранных просеиванием)."""
+    token_str = get_tokens_str_from_file(filename, token_cache)
+    return minhash_signature(split_into_n_gramm_hashes(token_str, length_n_gramm, winnow_window), num_perm)
+
+
+def search_similar_pairs(filenames, threshold=0.5, bands=None, rows=None, length_n_gramm=4, token_cache=None,
+                         winnow_window=None):
+    """
+    Находит в корпусе пары файлов с оценкой коэффициента Жаккара не ниже threshold без полного попарного сравнения.
+    Если bands и rows не заданы, они подбираются под порог для сигнатуры из 128 значений.
+    """
+    if bands is None or rows is None:
+        bands, rows = choose_bands_rows(threshold)
+    index = LSHIndex(bands, rows)
+    for filename in filenames:
+        signature = get_file_signature(filename, length_n_gramm, index.num_perm, token_cache, winnow_window)
+        index.add(filename, signature)
+    return index.candidate_pairs(threshold)
+
+
+if __name__ == "__main__":
+    # Частное тестирование алгоритма
+    test_examples_dir = os.path.join(os.path.dirname(__file__), '..', 'test_examples')
+    filenames = sorted(os.path.join(test_examples_dir, name) for name in os.listdir(test_examples_dir)
+                       if name.endswith(".py"))
+    for filename1, filename2, estimate, error_bound in search_similar_pairs(filenames, threshold=0.6):
+        print(f"{os.path.basename(filename1)} ~ {os.path.basename(filename2)}: "
+              f"{estimate * 100:.1f} ± {error_bound * 100:.1f} %")
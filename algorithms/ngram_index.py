@@ -0,0 +1,315 @@
+import json
+import os
+import tempfile
+import numpy as np
+from algorithms.heckel import get_n_gramm_hashes, get_tokens_str_from_file, winnow_n_gramm_hashes
+
+
+def get_fingerprint_counts(token_str, length_n_gramm=4, winnow_window=None):
+    """Возвращает отсортированные уникальные хэши n-грамм строки токенов и число вхождений каждого из них."""
+    hashes = get_n_gramm_hashes(token_str, length_n_gramm)
+    if winnow_window:
+        hashes = winnow_n_gramm_hashes(hashes, winnow_window)[1]
+    fingerprints, counts = np.unique(hashes, return_counts=True)
+    return fingerprints, counts.astype(np.int64)
+
+
+class NGramIndex:
+    """
+    Инвертированный индекс на диске: отпечаток n-граммы -> список (номер документа, число вхождений).
+    Индекс состоит из сегментов - неизменяемых наборов массивов .npy для подряд идущих документов,
+    которые открываются через отображение в память, поэтому процесс запросов не загружает индекс
+    в оперативную память целиком:
+        keys - отсортированные уникальные отпечатки (uint64);
+        offsets - границы списков документов для каждого отпечатка (int64, длина len(keys) + 1);
+        postings_docs, postings_counts - номера документов внутри сегмента и числа вхождений;
+        doc_sizes, doc_totals - число различных отпечатков документа и сумма чисел вхождений;
+        documents - идентификаторы документов сегмента (в JSON).
+    Номера удалённых документов хранятся в массиве removed поколения и исключаются из результатов.
+    Добавленные и удалённые документы накапливаются в памяти и учитываются в запросах сразу,
+    а на диск попадают при вызове commit().
+    """
+    FORMAT = 2
+    MANIFEST = "index.json"
+    ARRAYS = ("keys", "offsets", "postings_docs", "postings_counts", "doc_sizes", "doc_totals", "documents")
+    REMOVED = "removed"
+
+    def __init__(self, directory, length_n_gramm=None, winnow_window=None, token_cache=None):
+        self.directory = directory
+        self.token_cache = token_cache
+        os.makedirs(directory, exist_ok=True)
+        manifest = self.__read_manifest()
+        if manifest is None:
+            manifest = {"format": NGramIndex.FORMAT, "generation": 0, "segments": [], "removed": 0,
+                        "length_n_gramm": length_n_gramm or 4, "winnow_window": winnow_window}
+        elif manifest["format"] != NGramIndex.FORMAT:
+            raise ValueError(f"Неподдерживаемый формат индекса: {manifest['format']}")
+        for name, value in (("length_n_gramm", length_n_gramm), ("winnow_window", winnow_window)):
+            if value is not None and value != manifest[name]:
+                raise ValueError(f"Индекс построен с {name}={manifest[name]}, передано {value}")
+        self.length_n_gramm = manifest["length_n_gramm"]
+        self.winnow_window = manifest["winnow_window"]
+        self.__generation = manifest["generation"]
+        self.__segments = manifest["segments"]
+        self.__segment_arrays = [self.__load_segment(segment) for segment, _ in self.__segments]
+        self.__documents = [json.loads(doc_id) for arrays in self.__segment_arrays for doc_id in arrays["documents"]]
+        removed = np.load(self.__array_path(NGramIndex.REMOVED, self.__generation)) if manifest["removed"] else []
+        self.__removed = set(int(number) for number in removed)
+        self.__doc_numbers = {doc_id: number for number, doc_id in enumerate(self.__documents)
+                              if number not in self.__removed}
+        self.__pending = {}
+
+    def __read_manifest(self):
+        try:
+            with open(os.path.join(self.directory, NGramIndex.MANIFEST), encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def __array_path(self, name, number):
+        return os.path.join(self.directory, f"{name}.{number}.npy")
+
+    def __load_segment(self, segment):
+        arrays = {name: np.load(self.__array_path(name, segment), mmap_mode="r")
+                  for name in NGramIndex.ARRAYS if name != "documents"}
+        arrays["documents"] = np.load(self.__array_path("documents", segment))
+        return arrays
+
+    @property
+    def documents(self):
+        """Идентификаторы всех документов индекса с учётом ещё не сохранённых изменений."""
+        committed = [doc_id for number, doc_id in enumerate(self.__documents) if number not in self.__removed]
+        return committed + list(self.__pending)
+
+    def __len__(self):
+        return len(self.__doc_numbers) + len(self.__pending)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.__pending or doc_id in self.__doc_numbers
+
+    def fingerprints(self, token_str):
+        """Вычисляет отпечатки строки токенов с параметрами индекса: (отпечатки, числа вхождений)."""
+        return get_fingerprint_counts(token_str, self.length_n_gramm, self.winnow_window)
+
+    def add(self, doc_id, token_str):
+        """Добавляет документ по строке токенов."""
+        if doc_id in self:
+            raise KeyError(f"Документ {doc_id!r} уже добавлен в индекс")
+        self.__pending[doc_id] = self.fingerprints(token_str)
+
+    def add_file(self, filename, doc_id=None):
+        """Добавляет файл; по умолчанию идентификатором документа служит имя файла."""
+        self.add(filename if doc_id is None else doc_id, get_tokens_str_from_file(filename, self.token_cache))
+
+    def remove(self, doc_id):
+        """Удаляет документ из индекса."""
+        if doc_id in self.__pending:
+            del self.__pending[doc_id]
+        elif doc_id in self.__doc_numbers:
+            self.__removed.add(self.__doc_numbers.pop(doc_id))
+        else:
+            raise KeyError(f"Документа {doc_id!r} нет в индексе")
+
+    def query(self, token_str, threshold=None, weighted=False):
+        """
+        Сравнивает строку токенов со всеми документами индекса за один проход по спискам документов
+        каждого сегмента.
+        Возвращает список (документ, коэффициент Жаккара), отсортированный по убыванию коэффициента;
+        при заданном threshold отбрасывает документы с меньшим коэффициентом.
+        При weighted=True множества n-грамм считаются мультимножествами (учитываются числа вхождений).
+        """
+        fingerprints, counts = self.fingerprints(token_str)
+        query_size = int(counts.sum()) if weighted else len(fingerprints)
+        intersections = np.concatenate([np.empty(0, dtype=np.int64)] + [
+            NGramIndex.__intersections(arrays, fingerprints, counts, weighted) for arrays in self.__segment_arrays])
+        doc_sizes = np.concatenate([np.empty(0, dtype=np.int64)] + [
+            np.asarray(arrays["doc_totals"] if weighted else arrays["doc_sizes"]) for arrays in self.__segment_arrays])
+        unions = doc_sizes + query_size - intersections
+        scores = np.divide(intersections, unions, out=np.zeros(len(unions)), where=unions > 0)
+        result = [(doc_id, float(score)) for number, (doc_id, score) in enumerate(zip(self.__documents, scores))
+                  if number not in self.__removed]
+        for doc_id, (doc_fingerprints, doc_counts) in self.__pending.items():
+            result.append((doc_id, NGramIndex.__jaccard(fingerprints, counts, doc_fingerprints, doc_counts,
+                                                        weighted)))
+        if threshold is not None:
+            result = [item for item in result if item[1] >= threshold]
+        return sorted(result, key=lambda item: (-item[1], str(item[0])))
+
+    def query_file(self, filename, threshold=None, weighted=False):
+        return self.query(get_tokens_str_from_file(filename, self.token_cache), threshold, weighted)
+
+    @staticmethod
+    def __intersections(arrays, fingerprints, counts, weighted):
+        keys = arrays["keys"]
+        offsets = arrays["offsets"]
+        positions = np.searchsorted(keys, fingerprints)
+        found = positions < len(keys)
+        found[found] = keys[positions[found]] == fingerprints[found]
+        positions = positions[found]
+        starts = np.asarray(offsets[positions])
+        lengths = np.asarray(offsets[positions + 1]) - starts
+        # Индексы всех элементов найденных списков документов одним массивом
+        postings = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        docs = np.asarray(arrays["postings_docs"][postings])
+        if weighted:
+            weights = np.minimum(np.asarray(arrays["postings_counts"][postings]), np.repeat(counts[found], lengths))
+        else:
+            weights = None
+        return np.bincount(docs, weights=weights, minlength=len(arrays["doc_sizes"])).astype(np.int64)
+
+    @staticmethod
+    def __jaccard(fingerprints1, counts1, fingerprints2, counts2, weighted):
+        _, indices1, indices2 = np.intersect1d(fingerprints1, fingerprints2, assume_unique=True, return_indices=True)
+        if weighted:
+            intersection = int(np.minimum(counts1[indices1], counts2[indices2]).sum())
+            union = int(counts1.sum()) + int(counts2.sum()) - intersection
+        else:
+            intersection = len(indices1)
+            union = len(fingerprints1) + len(fingerprints2) - intersection
+        return intersection / union if union else 0.0
+
+    def commit(self):
+        """
+        Сохраняет накопленные изменения в новом поколении индекса.
+        Добавленные документы записываются новым сегментом, который сливается только с последними
+        сегментами, если они содержат не больше документов, чем он (как в LSM-дереве): каждый документ
+        переписывается O(log N) раз, а удалённые документы сливаемых сегментов отбрасываются.
+        Остальные сегменты не перезаписываются; удаления хранятся номерами в массиве removed.
+        Файлы предыдущего поколения удаляются только следующим commit(), поэтому читатели,
+        успевшие прочитать старый манифест, могут открыть его массивы.
+        """
+        generation = self.__generation + 1
+        segments = list(self.__segments)
+        segment_arrays = list(self.__segment_arrays)
+        documents = self.__documents
+        removed = self.__removed
+        if self.__pending:
+            merged = 1
+            merged_count = len(self.__pending)
+            while merged <= len(segments) and segments[-merged][1] <= merged_count:
+                merged_count += segments[-merged][1]
+                merged += 1
+            merged -= 1
+            base = len(documents) - sum(count for _, count in segments[len(segments) - merged:])
+            postings = [NGramIndex.__segment_postings(arrays) for arrays in segment_arrays[len(segments) - merged:]]
+            postings.append(NGramIndex.__pending_postings(self.__pending))
+            kept = np.array([number not in removed for number in range(base, len(documents))]
+                            + [True] * len(self.__pending), dtype=bool)
+            new_documents = [doc_id for number, doc_id in enumerate(documents[base:], base) if number not in removed]
+            new_documents += list(self.__pending)
+            arrays = NGramIndex.__build_segment(postings, kept)
+            arrays["documents"] = np.array([json.dumps(doc_id, ensure_ascii=False) for doc_id in new_documents],
+                                           dtype=str)
+            for name in NGramIndex.ARRAYS:
+                np.save(self.__array_path(name, generation), arrays[name])
+            del segments[len(segments) - merged:], segment_arrays[len(segment_arrays) - merged:]
+            segments.append([generation, len(new_documents)])
+            segment_arrays.append(self.__load_segment(generation))
+            documents = documents[:base] + new_documents
+            removed = set(number for number in removed if number < base)
+        if removed:
+            np.save(self.__array_path(NGramIndex.REMOVED, generation), np.array(sorted(removed), dtype=np.int64))
+        manifest = {"format": NGramIndex.FORMAT, "generation": generation, "segments": segments,
+                    "removed": len(removed), "length_n_gramm": self.length_n_gramm,
+                    "winnow_window": self.winnow_window}
+        self.__write_manifest(manifest)
+        kept_files = self.__files(self.__segments, self.__generation) | self.__files(segments, generation)
+        self.__generation = generation
+        self.__segments = segments
+        self.__segment_arrays = segment_arrays
+        self.__documents = documents
+        self.__removed = removed
+        self.__doc_numbers = {doc_id: number for number, doc_id in enumerate(documents) if number not in removed}
+        self.__pending = {}
+        self.__remove_unused_files(kept_files)
+
+    @staticmethod
+    def __segment_postings(arrays):
+        """Списки документов сегмента поэлементно: (отпечатки, номера документов, числа вхождений, размеры)."""
+        lengths = np.diff(np.asarray(arrays["offsets"]))
+        return (np.repeat(np.asarray(arrays["keys"]), lengths), np.asarray(arrays["postings_docs"]),
+                np.asarray(arrays["postings_counts"]), np.asarray(arrays["doc_sizes"]),
+                np.asarray(arrays["doc_totals"]))
+
+    @staticmethod
+    def __pending_postings(pending):
+        """Списки документов ещё не сохранённых документов в виде __segment_postings."""
+        fingerprints = [doc_fingerprints for doc_fingerprints, _ in pending.values()]
+        counts = [doc_counts for _, doc_counts in pending.values()]
+        sizes = np.array([len(doc_fingerprints) for doc_fingerprints in fingerprints], dtype=np.int64)
+        return (np.concatenate([np.empty(0, dtype=np.uint64)] + fingerprints),
+                np.repeat(np.arange(len(pending)), sizes), np.concatenate([np.empty(0, dtype=np.int64)] + counts),
+                sizes, np.array([doc_counts.sum() for doc_counts in counts], dtype=np.int64))
+
+    @staticmethod
+    def __build_segment(postings, kept):
+        """
+        Сливает списки документов частей postings (номера документов каждой части - свои, с нуля)
+        в массивы одного сегмента, отбрасывая документы, для которых kept ложно.
+        """
+        keys, docs, counts, doc_sizes, doc_totals = [], [], [], [], []
+        base = 0
+        renumber = np.cumsum(kept) - 1
+        for part_keys, part_docs, part_counts, part_sizes, part_totals in postings:
+            part_kept = kept[base:base + len(part_sizes)]
+            alive = part_kept[part_docs]
+            keys.append(part_keys[alive])
+            docs.append(renumber[base + part_docs[alive]])
+            counts.append(part_counts[alive])
+            doc_sizes.append(part_sizes[part_kept])
+            doc_totals.append(part_totals[part_kept])
+            base += len(part_sizes)
+        keys = np.concatenate(keys).astype(np.uint64)
+        docs = np.concatenate(docs).astype(np.int32)
+        counts = np.concatenate(counts).astype(np.int64)
+        order = np.lexsort((docs, keys))
+        keys, docs, counts = keys[order], docs[order], counts[order]
+        unique_keys, starts = np.unique(keys, return_index=True)
+        return {"keys": unique_keys, "offsets": np.append(starts, len(keys)).astype(np.int64),
+                "postings_docs": docs, "postings_counts": counts,
+                "doc_sizes": np.concatenate(doc_sizes).astype(np.int64),
+                "doc_totals": np.concatenate(doc_totals).astype(np.int64)}
+
+    def __files(self, segments, generation):
+        """Имена файлов поколения generation с сегментами segments."""
+        files = {os.path.basename(self.__array_path(name, segment)) for segment, _ in segments
+                 for name in NGramIndex.ARRAYS}
+        files.add(os.path.basename(self.__array_path(NGramIndex.REMOVED, generation)))
+        return files
+
+    def __remove_unused_files(self, kept_files):
+        names = NGramIndex.ARRAYS + (NGramIndex.REMOVED,)
+        for file_name in os.listdir(self.directory):
+            parts = file_name.split(".")
+            if len(parts) == 3 and parts[0] in names and parts[1].isdigit() and parts[2] == "npy" \
+                    and file_name not in kept_files:
+                try:
+                    os.remove(os.path.join(self.directory, file_name))
+                except FileNotFoundError:
+                    pass
+
+    def __write_manifest(self, manifest):
+        # Манифест заменяется атомарно, поэтому читатели видят либо старое, либо новое поколение индекса
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(manifest, file, ensure_ascii=False)
+            os.replace(temp_path, os.path.join(self.directory, NGramIndex.MANIFEST))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+if __name__ == "__main__":
+    # Частное тестирование алгоритма
+    test_examples_dir = os.path.join(os.path.dirname(__file__), '..', 'test_examples')
+    filenames = sorted(os.path.join(test_examples_dir, name) for name in os.listdir(test_examples_dir)
+                       if name.endswith(".py"))
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = NGramIndex(index_dir)
+        for filename in filenames:
+            index.add_file(filename, os.path.basename(filename))
+        index.commit()
+        for doc_id, score in NGramIndex(index_dir).query_file(os.path.join(test_examples_dir, "original_program.py")):
+            print(f"{doc_id}: {score * 100:.1f} %")
@@ -0,0 +1,219 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from algorithms.ast_clones import search_ast_clones
+from algorithms.benchmark import get_engine, measure, run_metadata, summarize, write_benchmark_json
+from algorithms.corpus_generator import generate_clone_pair, generate_corpus
+from algorithms.minhash_lsh import search_similar_pairs
+
+# Варианты сравнения пары файлов: метка -> (метод из benchmark.ENGINES, параметры сравнения).
+# heckel, ast* и greedy_tokens_python разбирают только Python, поэтому для C сравниваются варианты
+# Greedy String Tiling по строкам и по токенам CTokenizer
+PAIR_ENGINES = {
+    "greedy_rkr": ("greedy", {"algorithm": "rkr"}),
+    "greedy_suffix_array": ("greedy", {"algorithm": "suffix_array"}),
+    "greedy_vectorized": ("greedy", {"algorithm": "vectorized"}),
+    "greedy_naive": ("greedy", {"algorithm": "naive"}),
+    "greedy_tokens_python": ("greedy_tokens_python", {"algorithm": "suffix_array"}),
+    "greedy_tokens_c": ("greedy_tokens_c", {"algorithm": "suffix_array"}),
+    "heckel": ("heckel", {}),
+    "heckel_hashed": ("heckel", {"use_hashes": True}),
+    "heckel_winnowed": ("heckel", {"winnow_window": 4}),
+    "ast": ("ast", {}),
+    "ast_arrays": ("ast_arrays", {}),
+    "ast_cached": ("ast_cached", {}),
+    "ast_vectors": ("ast_vectors", {}),
+}
+PAIR_LANGUAGES = {
+    "python": tuple(label for label in PAIR_ENGINES if label != "greedy_tokens_c"),
+    "c": ("greedy_rkr", "greedy_suffix_array", "greedy_vectorized", "greedy_naive", "greedy_tokens_c"),
+}
+# Поиск похожих пар во всём корпусе (только Python): метка -> функция от списка файлов
+CORPUS_ENGINES = {
+    "minhash_lsh": search_similar_pairs,
+    "ast_clones": search_ast_clones,
+}
+MEASURE_OPTIONS = {"warmup": 1, "min_runs": 3, "max_runs": 20, "min_time": 0.5}
+# Наборы размеров: quick - быстрый прогон по умолчанию, full (--full) - до 1 млн строк в файле пары
+# и 100 тыс. файлов корпуса (долгий прогон; медленные методы отсекаются бюджетом времени)
+SCALING_PRESETS = {
+    "quick": {"pair_sizes": (100, 1000, 10000), "corpus_sizes": (10, 30, 100, 300), "time_budget": 2.0},
+    "full": {"pair_sizes": (100, 1000, 10000, 100000, 1000000), "corpus_sizes": (10, 100, 1000, 10000, 100000),
+             "time_budget": 60.0},
+}
+
+
+def peak_memory(func, *args, **kwargs):
+    """Возвращает пиковый объём памяти (в байтах), выделенной при вызове func, по tracemalloc."""
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return peak - start
+
+
+def measure_point(func, size, measure_options):
+    """Замер одной точки кривой: время (TimingStats), пиковая память и результат."""
+    result, stats = measure(func, **measure_options)
+    return {"size": size, "time": stats, "peak_memory": peak_memory(func), "result": result}
+
+
+def run_size_series(sizes, prepare, engines, time_budget, measure_options):
+    """
+    Измеряет engines (метка -> функция от подготовленных входных данных) для каждого размера из sizes
+    (по возрастанию). prepare(size) возвращает входные данные. Каждый метод сначала запускается один раз:
+    если этот пробный запуск дольше time_budget секунд, в серию записывается только он (без замера памяти),
+    и метод на больших размерах не запускается. Метод не запускается и на следующем размере, если медиана,
+    пересчитанная на этот размер хотя бы линейно, превышает бюджет.
+    """
+    budget = time_budget * 1e9
+    sizes = sorted(sizes)
+    series = {label: [] for label in engines}
+    active = dict(engines)
+    for position, size in enumerate(sizes):
+        if not active:
+            break
+        inputs = prepare(size)
+        next_size = sizes[position + 1] if position + 1 < len(sizes) else size
+        for label, func in list(active.items()):
+            start = time.perf_counter_ns()
+            result = func(*inputs)
+            elapsed = time.perf_counter_ns() - start
+            if elapsed > budget:
+                point = {"size": size, "time": summarize([elapsed]), "peak_memory": None, "result": result}
+            else:
+                point = measure_point(lambda: func(*inputs), size, measure_options)
+            series[label].append(point)
+            memory = "-" if point["peak_memory"] is None else f"{point['peak_memory'] / 2 ** 20:.2f} МБ"
+            print(f"{label}, {size}: {point['time'].median / 1e6:.2f} мс, {memory}")
+            if point["time"].median * next_size / size > budget:
+                del active[label]
+    return series
+
+
+def pair_scaling(corpus_dir, language="python", sizes=(100, 1000, 10000), engines=None, category="H",
+                 time_budget=10.0, measure_options=None, seed=0):
+    """Кривые времени и памяти сравнения оригинала с клоном category в зависимости от числа строк файла."""
+    engines = engines or PAIR_LANGUAGES[language]
+
+    def prepare(size):
+        return generate_clone_pair(os.path.join(corpus_dir, f"pair_{language}_{category}_{size}"), size, category,
+                                   language, seed)
+
+    def pipeline(engine_name, options):
+        engine = get_engine(engine_name)
+        return lambda target, origin: engine.compare(engine.prepare(engine.load(target)),
+                                                     engine.prepare(engine.load(origin)), **options)
+
+    return run_size_series(sizes, prepare, {label: pipeline(*PAIR_ENGINES[label]) for label in engines},
+                           time_budget, measure_options or MEASURE_OPTIONS)
+
+
+def corpus_scaling(corpus_dir, sizes=(10, 100, 1000), file_lines=100, engines=None, time_budget=10.0,
+                   measure_options=None, seed=0):
+    """Кривые времени и памяти поиска похожих пар в корпусе Python в зависимости от числа файлов."""
+    engines = engines or tuple(CORPUS_ENGINES)
+
+    def prepare(size):
+        directory = os.path.join(corpus_dir, f"corpus_{size}_{file_lines}")
+        manifest = generate_corpus(directory, size, file_lines, "python", seed=seed)
+        return [os.path.join(directory, name) for name in manifest["files"]],
+
+    series = run_size_series(sizes, prepare, {label: CORPUS_ENGINES[label] for label in engines}, time_budget,
+                             measure_options or MEASURE_OPTIONS)
+    # Список найденных пар велик и в отчёте не нужен: остаётся только их число
+    for points in series.values():
+        for point in points:
+            point["result"] = len(point["result"])
+    return series
+
+
+def plot_scaling(results, path):
+    """
+    Строит графики времени и пиковой памяти от размера входных данных (логарифмические оси) для каждой серии.
+    matplotlib импортируется только здесь; если он не установлен, графики не строятся.
+    """
+    try:
+        from matplotlib import pyplot as plt
+    except ImportError:
+        print("matplotlib не установлен, графики не построены")
+        return None
+    figure, axes = plt.subplots(len(results), 2, figsize=(12, 4 * len(results)), squeeze=False)
+    for row, (title, series) in enumerate(results.items()):
+        for column, (key, scale, ylabel) in enumerate((("time", 1e-6, "Время (медиана), мс"),
+                                                       ("peak_memory", 2 ** -20, "Пиковая память, МБ"))):
+            axis = axes[row][column]
+            for label, points in series.items():
+                # У запусков, прерванных по бюджету времени, пиковая память не измерялась
+                points = [point for point in points if point[key] is not None]
+                values = [(point[key].median if key == "time" else point[key]) * scale for point in points]
+                axis.plot([point["size"] for point in points], values, marker="o", label=label)
+            axis.set_xscale("log")
+            axis.set_yscale("log")
+            axis.set_title(title)
+            axis.set_xlabel("Число файлов" if title.startswith("corpus") else "Число строк")
+            axis.set_ylabel(ylabel)
+            axis.grid(True, which="both", linestyle="--", alpha=0.5)
+            axis.legend()
+    figure.tight_layout()
+    figure.savefig(path, dpi=150)
+    plt.close(figure)
+    return path
+
+
+def run_scaling_benchmark(results_dir=None, pair_sizes=None, corpus_sizes=None, time_budget=None, corpus_dir=None,
+                          preset="quick"):
+    """
+    Строит кривые масштабирования для всех методов: сравнение пары файлов Python и C и поиск по корпусу Python.
+    Размеры и бюджет времени, которые не заданы явно, берутся из набора SCALING_PRESETS[preset].
+    Результаты записываются в scaling_benchmark.json (с описанием запуска), графики - в scaling_plot.png.
+    Синтетические файлы создаются во временном каталоге, если corpus_dir не задан.
+    """
+    pair_sizes = pair_sizes or SCALING_PRESETS[preset]["pair_sizes"]
+    corpus_sizes = corpus_sizes or SCALING_PRESETS[preset]["corpus_sizes"]
+    time_budget = time_budget or SCALING_PRESETS[preset]["time_budget"]
+    results_dir = results_dir or os.path.join(os.path.dirname(__file__), '..', 'results')
+    os.makedirs(results_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        corpus_dir = corpus_dir or temporary_dir
+        results = {f"pairs_{language}": pair_scaling(corpus_dir, language, pair_sizes, time_budget=time_budget)
+                   for language in PAIR_LANGUAGES}
+        results["corpus_python"] = corpus_scaling(corpus_dir, corpus_sizes, time_budget=time_budget)
+    write_benchmark_json(os.path.join(results_dir, "scaling_benchmark.json"), results,
+                         run_metadata(preset=preset, pair_sizes=list(pair_sizes), corpus_sizes=list(corpus_sizes),
+                                      time_budget=time_budget, measure_options=MEASURE_OPTIONS))
+    plot_scaling(results, os.path.join(results_dir, "scaling_plot.png"))
+    return results
+
+
+def parse_args(argv=None):
+    """Разбирает аргументы командной строки замеров масштабирования."""
+    parser = argparse.ArgumentParser(description='Кривые масштабирования методов поиска заимствований.')
+    parser.add_argument('--full', action='store_true',
+                        help='полный набор размеров: до 1 млн строк в файле и 100 тыс. файлов корпуса')
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help='бюджет времени одного запуска метода, с (по умолчанию - из набора размеров)')
+    parser.add_argument('--corpus-dir', default=None,
+                        help='каталог для синтетических файлов (по умолчанию - временный)')
+    parser.add_argument('--results-dir', default=None, help='каталог для результатов')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Запускает run_scaling_benchmark с аргументами командной строки (см. parse_args)."""
+    args = parse_args(argv)
+    run_scaling_benchmark(args.results_dir, time_budget=args.time_budget, corpus_dir=args.corpus_dir,
+                          preset="full" if args.full else "quick")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import heapq
+import numpy as np
+
+
+def suffix_array(sequence):
+    """
+    Строит суффиксный массив последовательности целых чисел удвоением префиксов: O(n log^2 n).
+    На каждом шаге суффиксы сортируются по паре рангов (префикс длины k, следующий префикс длины k).
+    """
+    sequence = np.asarray(sequence, dtype=np.int64)
+    length = len(sequence)
+    if length == 0:
+        return np.empty(0, dtype=np.int64)
+    rank = np.unique(sequence, return_inverse=True)[1].astype(np.int64)
+    step = 1
+    while True:
+        second = np.full(length, -1, dtype=np.int64)
+        second[:max(length - step, 0)] = rank[step:]
+        order = np.lexsort((second, rank))
+        first_sorted, second_sorted = rank[order], second[order]
+        is_new_rank = np.empty(length, dtype=bool)
+        is_new_rank[0] = True
+        is_new_rank[1:] = (first_sorted[1:] != first_sorted[:-1]) | (second_sorted[1:] != second_sorted[:-1])
+        rank = np.empty(length, dtype=np.int64)
+        rank[order] = np.cumsum(is_new_rank) - 1
+        if rank[order[-1]] == length - 1:
+            return order
+        step *= 2
+
+
+def lcp_array(sequence, suffixes):
+    """
+    Вычисляет массив LCP алгоритмом Касаи за O(n): lcp[r] - длина общего префикса суффиксов suffixes[r - 1]
+    и suffixes[r], lcp[0] = 0.
+    """
+    sequence = list(sequence)
+    length = len(sequence)
+    rank = [0] * length
+    for position, suffix in enumerate(suffixes.tolist()):
+        rank[suffix] = position
+    suffixes = suffixes.tolist()
+    lcp = [0] * length
+    common = 0
+    for i in range(length):
+        if rank[i] == 0:
+            common = 0
+            continue
+        j = suffixes[rank[i] - 1]
+        while i + common < length and j + common < length and sequence[i + common] == sequence[j + common]:
+            common += 1
+        lcp[rank[i]] = common
+        if common:
+            common -= 1
+    return lcp
+
+
+def iterate_maximal_matches(target, origin, min_length=1, target_marked=None, origin_marked=None):
+    """
+    Выдаёт все максимальные совпадения (i, j, k): target[i:i+k] == origin[j:j+k], совпадение нельзя продлить
+    ни влево, ни вправо, k >= min_length, - в порядке невозрастания k.
+    Последовательности объединяются через уникальные разделители; соседние суффиксы суффиксного массива
+    объединяются в интервалы в порядке убывания LCP (интервалы дерева LCP-интервалов), и при объединении
+    двух интервалов с границей LCP = k выдаются пары суффиксов target и origin из разных интервалов с разными
+    предшествующими элементами (максимальность слева). Суффиксы интервала сгруппированы по последовательности
+    и предшествующему элементу, меньшая группа присоединяется к большей, поэтому время - O(n log n) плюс
+    число выданных совпадений. Если заданы target_marked и origin_marked, совпадения, целиком помеченные
+    в одной из последовательностей к моменту выдачи, пропускаются.
+    """
+    target = [int(value) for value in target]
+    origin = [int(value) for value in origin]
+    min_length = max(min_length, 1)
+    # Разделители меньше любых значений последовательностей и не совпадают между собой
+    lowest = min(target + origin, default=0)
+    sequence = target + [lowest - 1] + origin + [lowest - 2]
+    suffixes = suffix_array(sequence)
+    lcp = np.asarray(lcp_array(sequence, suffixes), dtype=np.int64)
+    suffixes = suffixes.tolist()
+    origin_start = len(target) + 1
+    marked = (target_marked, origin_marked)
+
+    # Интервал суффиксов [left, right] хранится в левом конце: groups[left] = (группы target, группы origin),
+    # группа - список начал суффиксов с одинаковым предшествующим элементом (None - суффикс без предшествующего)
+    groups = []
+    for suffix in suffixes:
+        if suffix < origin_start - 1:
+            groups.append(({target[suffix - 1] if suffix else None: [suffix]}, {}))
+        elif suffix >= origin_start and suffix < len(sequence) - 1:
+            j = suffix - origin_start
+            groups.append(({}, {origin[j - 1] if j else None: [j]}))
+        else:
+            groups.append(({}, {}))
+    sizes = [1] * len(suffixes)
+    left_end = list(range(len(suffixes)))
+    right_end = list(range(len(suffixes)))
+
+    boundaries = np.flatnonzero(lcp >= min_length)
+    for boundary in boundaries[np.argsort(-lcp[boundaries], kind="stable")].tolist():
+        common = int(lcp[boundary])
+        left, right = left_end[boundary - 1], boundary
+        smaller, larger = (groups[left], groups[right]) if sizes[left] <= sizes[right] else \
+            (groups[right], groups[left])
+        matches = []
+        for side in (0, 1):
+            side_marked, other_marked = marked[side], marked[1 - side]
+            for previous, positions in smaller[side].items():
+                for other_previous, other_positions in larger[1 - side].items():
+                    if previous == other_previous and previous is not None:
+                        continue
+                    for position in positions:
+                        if side_marked is not None and side_marked.find(0, position, position + common) < 0:
+                            continue
+                        for other_position in other_positions:
+                            if other_marked is not None and \
+                                    other_marked.find(0, other_position, other_position + common) < 0:
+                                continue
+                            matches.append((position, other_position, common) if side == 0 else
+                                           (other_position, position, common))
+        for side in (0, 1):
+            for previous, positions in smaller[side].items():
+                larger[side].setdefault(previous, []).extend(positions)
+        # Объединённый интервал [left, right_end[right]] хранит группы в левом конце
+        new_right = right_end[right]
+        groups[left] = larger
+        groups[right] = None
+        sizes[left] += sizes[right]
+        right_end[left] = new_right
+        left_end[new_right] = left
+        yield from matches
+
+
+def maximal_matches(target, origin, min_length=1):
+    """Возвращает отсортированный список всех максимальных совпадений (см. iterate_maximal_matches)."""
+    return sorted(iterate_maximal_matches(target, origin, min_length))
+
+
+def unmarked_segments(i, j, length, target_marked, origin_marked):
+    """
+    Разбивает совпадение (i, j, length) на максимальные отрезки без помеченных позиций.
+    Границы отрезков находятся поиском в bytearray меток, без перебора позиций совпадения.
+    """
+    segments = []
+    shift = 0
+    while shift < length:
+        # Начало отрезка - ближайшая позиция, свободная в обеих последовательностях
+        while True:
+            target_free = target_marked.find(0, i + shift, i + length)
+            origin_free = origin_marked.find(0, j + shift, j + length)
+            if target_free < 0 or origin_free < 0:
+                return segments
+            next_shift = max(target_free - i, origin_free - j)
+            if next_shift == shift:
+                break
+            shift = next_shift
+        target_end = target_marked.find(1, i + shift, i + length)
+        origin_end = origin_marked.find(1, j + shift, j + length)
+        end = min(length if target_end < 0 else target_end - i, length if origin_end < 0 else origin_end - j)
+        segments.append((i + shift, j + shift, end - shift))
+        shift = end
+    return segments
+
+
+def iterate_suffix_array_tiling(target_ids, origin_ids, min_match_length=4):
+    """
+    Greedy String Tiling по максимальным совпадениям из суффиксного массива; выдаёт список фрагментов
+    (i, j, k), размеченных на каждой итерации, что позволяет остановить разметку досрочно.
+    Совпадения (из iterate_maximal_matches) хранятся в куче по убыванию длины; помеченные на предыдущих итерациях позиции
+    учитываются лениво - совпадение разбивается на непомеченные отрезки только при извлечении из кучи.
+    На каждой итерации размечаются все совпадения максимальной длины в порядке (i, j),
+    как в greedy_string_tiling.naive_greedy_string_tiling, поэтому результаты совпадают.
+    """
+    min_match_length = max(min_match_length, 1)
+    target_marked = bytearray(len(target_ids))
+    origin_marked = bytearray(len(origin_ids))
+    # Совпадения поступают из генератора по невозрастанию длины и добавляются в кучу только перед итерацией
+    # своей длины; целиком помеченные к этому моменту совпадения генератор пропускает
+    pending = iterate_maximal_matches(target_ids, origin_ids, min_match_length, target_marked, origin_marked)
+    next_match = next(pending, None)
+    heap = []
+
+    while heap or next_match is not None:
+        max_match = max(-heap[0][0] if heap else 0, next_match[2] if next_match is not None else 0)
+        while next_match is not None and next_match[2] == max_match:
+            heapq.heappush(heap, (-max_match, next_match[0], next_match[1]))
+            next_match = next(pending, None)
+        matches = []
+        while heap and -heap[0][0] == max_match:
+            _, i, j = heapq.heappop(heap)
+            segments = unmarked_segments(i, j, max_match, target_marked, origin_marked)
+            if segments == [(i, j, max_match)]:
+                matches.append((i, j))
+                continue
+            for segment_i, segment_j, k in segments:
+                if k >= min_match_length:
+                    heapq.heappush(heap, (-k, segment_i, segment_j))
+        tiles = []
+        for i, j in matches:
+            if target_marked.find(1, i, i + max_match) < 0 and origin_marked.find(1, j, j + max_match) < 0:
+                target_marked[i:i + max_match] = b"\x01" * max_match
+                origin_marked[j:j + max_match] = b"\x01" * max_match
+                tiles.append((i, j, max_match))
+            else:
+                # Совпадение пересекается с метками этой итерации и будет разбито при следующем извлечении
+                heapq.heappush(heap, (-max_match, i, j))
+        if tiles:
+            yield tiles
+
+
+def suffix_array_greedy_string_tiling(target_ids, origin_ids, min_match_length=4):
+    """Greedy String Tiling по максимальным совпадениям из суффиксного массива (см. iterate_suffix_array_tiling)."""
+    return [tile for tiles in iterate_suffix_array_tiling(target_ids, origin_ids, min_match_length) for tile in tiles]
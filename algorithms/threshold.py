@@ -0,0 +1,14 @@
+from collections import namedtuple
+
+# Результат проверки порога сходства: превышен ли порог (оценка >= порога)
+# и границы оценки сходства в процентах, известные к моменту принятия решения
+ThresholdDecision = namedtuple("ThresholdDecision", ["exceeds", "lower_bound", "upper_bound"])
+
+
+def decide(lower_bound, upper_bound, threshold):
+    """Возвращает ThresholdDecision, если границы уже определяют ответ, иначе None."""
+    if lower_bound >= threshold:
+        return ThresholdDecision(True, lower_bound, upper_bound)
+    if upper_bound < threshold:
+        return ThresholdDecision(False, lower_bound, upper_bound)
+    return None
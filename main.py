@@ -1,7 +1,8 @@
 from algorithms.experiment import main as run_experiment
 
-def main():
-    run_experiment()
+def main(argv=None):
+    # Аргументы командной строки передаются эксперименту (см. algorithms.experiment.parse_args)
+    run_experiment(argv)
 
 if __name__ == "__main__":
     main()
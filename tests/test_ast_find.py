@@ -0,0 +1,66 @@
+import ast
+import importlib.util
+import itertools
+import os
+import random
+import pytest
+from algorithms.ast_find import ASTComparator, IterativeASTComparator, calculate_plagiarism_percentage
+
+test_examples_dir = os.path.join(os.path.dirname(__file__), '..', 'test_examples')
+EXAMPLES = sorted(name for name in os.listdir(test_examples_dir) if name.endswith(".py"))
+# Модули стандартной библиотеки без global и nonlocal (на них ASTComparator завершается AttributeError)
+STDLIB_MODULES = ("heapq", "textwrap", "bisect", "colorsys", "fnmatch", "shlex", "string", "calendar",
+                  "difflib", "statistics", "json.decoder", "json.encoder")
+
+
+def parse_example(name):
+    with open(os.path.join(test_examples_dir, name), encoding="utf-8") as file:
+        return ast.parse(file.read())
+
+
+def parse_module(module_name):
+    spec = importlib.util.find_spec(module_name)
+    with open(spec.origin, encoding="utf-8") as file:
+        return ast.parse(file.read())
+
+
+def comparator_counts(comparator_type, tree1, tree2):
+    comparator = comparator_type(tree1, tree2)
+    return comparator.compare(), comparator.mismatches, comparator.total
+
+
+@pytest.mark.parametrize("target_name,origin_name", list(itertools.product(EXAMPLES, repeat=2)))
+def test_examples_match_recursive(target_name, origin_name):
+    """Счётчики IterativeASTComparator совпадают с ASTComparator на всех парах тестовых примеров."""
+    target, origin = parse_example(target_name), parse_example(origin_name)
+    assert comparator_counts(IterativeASTComparator, target, origin) == \
+        comparator_counts(ASTComparator, target, origin)
+
+
+def test_random_stdlib_pairs_match_recursive():
+    """Счётчики совпадают на случайных парах модулей стандартной библиотеки и их поддеревьев."""
+    rnd = random.Random(0)
+    trees = {name: parse_module(name) for name in STDLIB_MODULES}
+    for _ in range(30):
+        tree1, tree2 = trees[rnd.choice(STDLIB_MODULES)], trees[rnd.choice(STDLIB_MODULES)]
+        node1 = rnd.choice(list(ast.walk(tree1)))
+        node2 = rnd.choice(list(ast.walk(tree2)))
+        for first, second in ((tree1, tree2), (node1, node2)):
+            assert comparator_counts(IterativeASTComparator, first, second) == \
+                comparator_counts(ASTComparator, first, second)
+
+
+def test_deep_tree_without_recursion():
+    """Дерево глубже ограничения рекурсии сравнивается без RecursionError."""
+    expression = ast.Constant(0)
+    for _ in range(20000):
+        expression = ast.BinOp(expression, ast.Add(), ast.Constant(1))
+    comparator = IterativeASTComparator(expression, expression)
+    assert comparator.compare()
+    assert comparator.total == 20000 * 3 + 1
+
+
+def test_calculate_plagiarism_percentage_on_copy():
+    """Файл полностью совпадает сам с собой."""
+    path = os.path.join(test_examples_dir, "original_program.py")
+    assert calculate_plagiarism_percentage(path, path) == 100
@@ -0,0 +1,100 @@
+import os
+import random
+import pytest
+from algorithms.diagonal_runs import max_diagonal_runs, vectorized_greedy_string_tiling
+from algorithms.greedy_string_tiling import greedy_string_tiling, search_greedy_string_tiling, tile_sequences
+from algorithms.suffix_array import lcp_array, maximal_matches, suffix_array
+
+test_examples_dir = os.path.join(os.path.dirname(__file__), '..', 'test_examples')
+EXAMPLES = sorted(name for name in os.listdir(test_examples_dir) if name.endswith(".py"))
+
+
+def random_sequences(seed, count=300, alphabet=4, max_length=60):
+    """Случайные пары последовательностей с маленьким алфавитом, чтобы совпадений было много."""
+    rnd = random.Random(seed)
+    for _ in range(count):
+        target = [rnd.randrange(alphabet) for _ in range(rnd.randint(0, max_length))]
+        origin = [rnd.randrange(alphabet) for _ in range(rnd.randint(0, max_length))]
+        yield target, origin, rnd.randint(1, 5)
+
+
+@pytest.mark.parametrize("algorithm", ["rkr", "suffix_array", "vectorized"])
+def test_random_sequences_match_naive(algorithm):
+    """Фрагменты совпадают с полным перебором (naive) на случайных последовательностях."""
+    for target, origin, min_match_length in random_sequences(seed=0):
+        expected = tile_sequences(target, origin, min_match_length, "naive")
+        assert tile_sequences(target, origin, min_match_length, algorithm) == expected
+
+
+@pytest.mark.parametrize("algorithm", ["rkr", "suffix_array", "vectorized"])
+@pytest.mark.parametrize("target_name", EXAMPLES)
+def test_examples_match_naive(algorithm, target_name):
+    """Фрагменты и процент совпадения на тестовых примерах совпадают с полным перебором (naive)."""
+    target_path = os.path.join(test_examples_dir, target_name)
+    origin_path = os.path.join(test_examples_dir, "original_program.py")
+    with open(target_path, encoding="utf-8") as target, open(origin_path, encoding="utf-8") as origin:
+        target_lines, origin_lines = target.readlines(), origin.readlines()
+    for min_match_length in (2, 4, 6):
+        assert greedy_string_tiling(target_lines, origin_lines, min_match_length, algorithm) == \
+            greedy_string_tiling(target_lines, origin_lines, min_match_length, "naive")
+        assert search_greedy_string_tiling(target_path, origin_path, min_match_length, algorithm) == \
+            search_greedy_string_tiling(target_path, origin_path, min_match_length, "naive")
+
+
+def naive_maximal_matches(target, origin, min_length):
+    """Максимальные совпадения полным перебором пар позиций."""
+    matches = []
+    for i in range(len(target)):
+        for j in range(len(origin)):
+            if i > 0 and j > 0 and target[i - 1] == origin[j - 1]:
+                continue
+            k = 0
+            while i + k < len(target) and j + k < len(origin) and target[i + k] == origin[j + k]:
+                k += 1
+            if k >= max(min_length, 1):
+                matches.append((i, j, k))
+    return sorted(matches)
+
+
+def test_suffix_array_and_lcp_match_sorting():
+    """Суффиксный массив и LCP совпадают с сортировкой суффиксов и прямым сравнением соседних."""
+    rnd = random.Random(1)
+    for _ in range(200):
+        sequence = [rnd.randrange(3) for _ in range(rnd.randint(1, 50))]
+        suffixes = suffix_array(sequence)
+        assert list(suffixes) == sorted(range(len(sequence)), key=lambda i: sequence[i:])
+        lcp = list(lcp_array(sequence, suffixes))
+        for position in range(1, len(sequence)):
+            first, second = sequence[suffixes[position - 1]:], sequence[suffixes[position]:]
+            common = 0
+            while common < min(len(first), len(second)) and first[common] == second[common]:
+                common += 1
+            assert lcp[position] == common
+
+
+def test_maximal_matches_match_naive():
+    """Все максимальные совпадения суффиксного массива совпадают с полным перебором."""
+    for target, origin, min_length in random_sequences(seed=2, count=200, alphabet=3, max_length=40):
+        assert maximal_matches(target, origin, min_length) == naive_maximal_matches(target, origin, min_length)
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 256])
+def test_diagonal_runs_blocks_match_naive(block_size):
+    """Разбиение матрицы на блоки строк не меняет ни длины совпадений по диагоналям, ни фрагменты."""
+    rnd = random.Random(3)
+    for target, origin, min_length in random_sequences(seed=3, count=150, alphabet=3, max_length=30):
+        target_marked = bytearray(rnd.random() < 0.2 for _ in target)
+        origin_marked = bytearray(rnd.random() < 0.2 for _ in origin)
+        runs = {}
+        for i in range(len(target)):
+            for j in range(len(origin)):
+                k = 0
+                while i + k < len(target) and j + k < len(origin) and target[i + k] == origin[j + k] and \
+                        not target_marked[i + k] and not origin_marked[j + k]:
+                    k += 1
+                runs[i, j] = k
+        max_match = max(runs.values(), default=0)
+        expected = sorted(position for position, k in runs.items() if k == max_match) if max_match else []
+        assert max_diagonal_runs(target, origin, target_marked, origin_marked, block_size) == (max_match, expected)
+        assert vectorized_greedy_string_tiling(target, origin, min_length, block_size) == \
+            tile_sequences(target, origin, min_length, "naive")
@@ -0,0 +1,77 @@
+import json
+import os
+import random
+import re
+import pytest
+from tokenizers.c_tokenizer import CTokenizer
+from tokenizers.staged_c_tokenizer import SegmentPattern, StagedCTokenizer, check_equivalence, generate_c_source
+
+test_examples_dir = os.path.join(os.path.dirname(__file__), '..', 'test_examples')
+# Синтетические программы на C и их токены, полученные исходной реализацией CTokenizer
+with open(os.path.join(os.path.dirname(__file__), 'fixtures', 'c_tokens.json'), encoding='utf-8') as file:
+    BASELINE_TOKENS = json.load(file)
+
+
+@pytest.mark.parametrize("tokenizer_type", [CTokenizer, StagedCTokenizer])
+@pytest.mark.parametrize("name", sorted(BASELINE_TOKENS))
+def test_tokens_match_baseline(tokenizer_type, name):
+    """Символы и смещения токенов совпадают с исходной реализацией CTokenizer."""
+    expected = BASELINE_TOKENS[name]
+    tokens = tokenizer_type().tokenize(expected["source"])
+    assert "".join(token.symbol for token in tokens) == expected["symbols"]
+    assert [token.start for token in tokens] == expected["starts"]
+    assert [token.end for token in tokens] == expected["ends"]
+
+
+def test_staged_matches_c_tokenizer():
+    """StagedCTokenizer совпадает с CTokenizer на тестовых примерах и синтетическом корпусе C."""
+    sources = {}
+    for file_name in sorted(os.listdir(test_examples_dir)):
+        if file_name.endswith(".py"):
+            with open(os.path.join(test_examples_dir, file_name), encoding='utf-8') as file:
+                sources[file_name] = file.read()
+    for seed in range(100, 130):
+        sources[f"synthetic_{seed}.c"] = generate_c_source(seed)
+    assert check_equivalence(sources) == {}
+
+
+# Фрагменты с совпадениями выражений этапов; случайные правки вокруг них дают и совпадения, и промахи
+SEGMENT_SEEDS = ["int (*f(int a)) (int b) {\n", "char *(*p)(int, char) = g;\n", "int main(int argc) {\n",
+                 "double (*table[4])(void);\n", "x = 1; int *f(void) { return 0; }\n"]
+
+
+def mutated_source(rnd):
+    """Несколько фрагментов SEGMENT_SEEDS подряд со случайными вставками, удалениями и заменами символов."""
+    src = list("".join(rnd.choice(SEGMENT_SEEDS) for _ in range(rnd.randint(1, 4))))
+    for _ in range(rnd.randint(0, 4)):
+        position = rnd.randint(0, len(src))
+        operation = rnd.random()
+        if operation < 0.4:
+            src.insert(position, rnd.choice(" *();{}=\nab[]"))
+        elif src and operation < 0.7:
+            del src[min(position, len(src) - 1)]
+        elif src:
+            src[min(position, len(src) - 1)] = rnd.choice(" *();{}=\nab[]")
+    return "".join(src)
+
+
+@pytest.mark.parametrize("name", ["FUNC_PTR", "FUNC_PTR_DEF", "FUNC"])
+def test_segment_pattern_matches_finditer(name):
+    """SegmentPattern.finditer выдаёт те же совпадения, что re.finditer, на случайно изменённом коде."""
+    segment_pattern = getattr(StagedCTokenizer, name)
+    rnd = random.Random(0)
+    matched = 0
+    for _ in range(3000):
+        src = mutated_source(rnd)
+        expected = [(match.span(), match.groups()) for match in re.finditer(segment_pattern.pattern, src)]
+        assert [(match.span(), match.groups()) for match in segment_pattern.finditer(src)] == expected
+        matched += bool(expected)
+    assert matched > 300
+
+
+def test_segment_pattern_with_lookbehind_and_lookahead():
+    """Просмотр назад видит текст перед отрезком, просмотр вперёд - разделитель после него."""
+    segment_pattern = SegmentPattern(r'(?<=;)\s*\w+(?=;)', r';', r'\w')
+    src = "a; b ;c;d e;"
+    assert [match.span() for match in segment_pattern.finditer(src)] == \
+        [match.span() for match in re.finditer(segment_pattern.pattern, src)]
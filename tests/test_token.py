@@ -0,0 +1,84 @@
+import json
+import os
+import random
+import tempfile
+import pytest
+from algorithms.heckel import PythonTokenizer, get_tokens_str
+from tokenizers.token import Token, TokenStream, TokenStringIndex
+from tokenizers.token_cache import TokenCache
+
+test_examples_dir = os.path.join(os.path.dirname(__file__), '..', 'test_examples')
+# Строки токенов тестовых примеров, полученные исходной реализацией PythonTokenizer и Token
+with open(os.path.join(os.path.dirname(__file__), 'fixtures', 'heckel_token_strs.json'), encoding='utf-8') as file:
+    BASELINE_TOKEN_STRS = json.load(file)
+
+
+def baseline_get_tokens_str_from_token_list(token_list):
+    """Исходная реализация Token.get_tokens_str_from_token_list."""
+    token_str = ""
+    for token in sorted(token_list, key=lambda tok: tok.start):
+        token_str += token.symbol
+    return token_str
+
+
+def baseline_find_border_tokens_str_in_token_list(token_list, token_str):
+    """Исходная реализация Token.find_border_tokens_str_in_token_list."""
+    for i in range(len(token_list)):
+        j = 0
+        while j < len(token_str) and i + j < len(token_list) and token_list[i + j].symbol == token_str[j]:
+            j += 1
+        if j == len(token_str):
+            return token_list[i].start, token_list[i + j - 1].end
+    return None
+
+
+def random_tokens(rnd, max_count=40, shuffled=False):
+    """Случайные токены с символами из маленького алфавита и возрастающими (или перемешанными) началами."""
+    tokens = []
+    position = 0
+    for _ in range(rnd.randint(0, max_count)):
+        position += rnd.randint(0, 3)
+        tokens.append(Token(rnd.choice("ABC"), position, position + rnd.randint(1, 5)))
+    if shuffled:
+        rnd.shuffle(tokens)
+    return tokens
+
+
+@pytest.mark.parametrize("name", sorted(BASELINE_TOKEN_STRS))
+def test_get_tokens_str_matches_baseline(name):
+    """get_tokens_str (без кэша и через TokenCache) совпадает с исходной реализацией на тестовых примерах."""
+    with open(os.path.join(test_examples_dir, name), encoding='utf-8') as file:
+        src = file.read()
+    assert get_tokens_str(src) == BASELINE_TOKEN_STRS[name]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        token_cache = TokenCache(cache_dir)
+        assert get_tokens_str(src, token_cache) == BASELINE_TOKEN_STRS[name]
+        assert get_tokens_str(src, token_cache) == BASELINE_TOKEN_STRS[name]
+    assert TokenStringIndex(PythonTokenizer().tokenize(src)).token_str == BASELINE_TOKEN_STRS[name]
+
+
+def test_get_tokens_str_from_token_list_matches_baseline():
+    """Строка токенов совпадает с исходной для списков и TokenStream, в том числе неупорядоченных."""
+    rnd = random.Random(0)
+    for _ in range(300):
+        tokens = random_tokens(rnd, shuffled=rnd.random() < 0.5)
+        expected = baseline_get_tokens_str_from_token_list(tokens)
+        assert Token.get_tokens_str_from_token_list(tokens) == expected
+        assert Token.get_tokens_str_from_token_list(TokenStream(tokens)) == expected
+
+
+def test_find_border_tokens_str_matches_baseline():
+    """Поиск фрагмента в списке токенов совпадает с исходным, включая пустой и отсутствующий фрагмент."""
+    rnd = random.Random(1)
+    for _ in range(300):
+        tokens = random_tokens(rnd)
+        symbols = "".join(token.symbol for token in tokens)
+        start = rnd.randint(0, len(symbols))
+        fragments = ["", symbols[start:start + rnd.randint(1, 6)], "".join(rnd.choice("ABC") for _ in range(3)),
+                     "D"]
+        for fragment in fragments:
+            expected = baseline_find_border_tokens_str_in_token_list(tokens, fragment)
+            assert Token.find_border_tokens_str_in_token_list(tokens, fragment) == expected
+            assert Token.find_border_tokens_str_in_token_list(TokenStream(tokens), fragment) == expected
+            if fragment:
+                assert TokenStringIndex(tokens).find(fragment) == expected
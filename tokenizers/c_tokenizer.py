@@ -1,7 +1,9 @@
 import re
-from operator import attrgetter
+from bisect import bisect_left
+from itertools import islice
 from tokenizers.tokenizer import Tokenizer
-from tokenizers.token import Token
+from tokenizers.token import Token, TokenStream
+from tokenizers.source_buffer import SourceBuffer
 
 
 class CTokenizer(Tokenizer):
@@ -34,6 +36,8 @@ class CTokenizer(Tokenizer):
         "control": "G",  # - Governance - управляющие конструкции
         "struct": "V",  # - Var - структуры
     }
+    TERNARY = re.compile(r'(?<=[;}{()\w])\s*(=|\breturn\b)?([^;<>=]+(==|>=|<=|>|<)[^;<>=?]+)(\?[^:;]+)(:[^;]+;)',
+                         re.ASCII)
 
     @staticmethod
     def replace_comments(src):
@@ -63,7 +67,7 @@ class CTokenizer(Tokenizer):
         return src
 
     def _process(self, src):
-        tokens = []
+        tokens = TokenStream()
 
         # Замена символьных и строковых констант, например, чтобы ';' - не вносило ошибки в токенизацию
         src = CTokenizer.replace_strings(src)
@@ -98,27 +102,9 @@ class CTokenizer(Tokenizer):
         while_from_do_tokens = CTokenizer.search_tokens(src, r'while\s*\([^;{]+\)\s*;', "cycle")
         src = CTokenizer.replace_tokens_in_src(src, while_from_do_tokens)
 
-        # Удаление закрывающей } в switch
-        #   Специальный символ $ используется в дальнейшем при токенизации как окончание switch
-        src = CTokenizer.replace_close_brace_in_switch(src, "$")
-
-        # Удаление break из switch
-        for match in re.finditer(r'(\bcase|\bdefault)[^:]*:.*?(\bbreak\s*;\s*}?)', src, flags=re.ASCII + re.DOTALL):
-            src = src[:match.start(2)] + CTokenizer.NOT_TOKEN * (match.end(2) - match.start(2) - 1) + src[match.end(2) - 1:]
-
-        # Удаление ключевого слова switch, чтобы оно не было токенизировано как определение функции
-        for match in re.finditer(r'\bswitch[^{]*{', src, flags=re.ASCII):
-            src = src[:match.start()] + ';' * (match.end() - match.start()) + src[match.end():]
-
         # Токенизация switch
-        for match in re.finditer(r'(\b((case|default)\b[^:]*?:)\s*[{\w])([^}$]*?(?=(}|\$|\bcase\b|\bdefault\b)))', src, flags=re.ASCII):  # $ используется
-            token = Token(CTokenizer.TOKENS["if"], match.start(1), match.end(1))
-            if src[token.end - 1] != "{":
-                tokens.append(Token("{", token.end - 2, token.end - 2))
-            tokens.append(token)
-            src = src[:match.start(2)] + ';' * (match.end(2) - match.start(2)) + src[match.end(2):]
-            if src[match.start(5)] != "}":
-                tokens.append(Token("}", match.start(5) - 1, match.start(5) - 1))
+        switch_tokens, src = CTokenizer.get_tokens_switch(src)
+        tokens += switch_tokens
 
         # Токенизация условных конструкций
         if_else_tokens = CTokenizer.search_tokens(src, r'\b(if|else\s*if)\s*\([^{;]+?\)\s*(?=[{\w*.])|\belse\b', "if")
@@ -214,7 +200,7 @@ class CTokenizer(Tokenizer):
         for match in re.finditer(r'}', src, flags=re.ASCII):
             tokens.append(Token("}", match.start(), match.end()))
 
-        return sorted(tokens, key=attrgetter('start', 'end'))
+        return tokens.sorted()
 
     @staticmethod
     def search_tokens(src, pattern, token_key, flags=re.ASCII):
@@ -225,12 +211,7 @@ class CTokenizer(Tokenizer):
 
     @staticmethod
     def replace_tokens_in_src(src, tokens, replace=".", is_full_replace=True):
-        for token in tokens:
-            if is_full_replace is True:
-                src = src[:token.start] + replace * (token.end - token.start) + src[token.end:]
-            else:
-                src = src[:token.start] + replace * (token.end - token.start - 1) + src[token.end - 1:]
-        return src
+        return SourceBuffer(src).mask(tokens, replace, is_full_replace).render()
 
     @staticmethod
     def get_tokens_missing_curly_braces(src):
@@ -244,8 +225,10 @@ class CTokenizer(Tokenizer):
             tokens.append(Token("{", match.start(1) - 1, match.start(1) - 1))
             tokens.append(Token("}", match.end(1) - 1, match.end(1) - 1))
 
+        buffer = SourceBuffer(src)
         for match in re.finditer(r'\bfor\s*\((([^;]*;\s*){2}[^)]*)\)', src, flags=re.ASCII):
-            src = src[:match.start(1)] + "." * (match.end(1) - match.start(1)) + src[match.end(1):]
+            buffer.mask_range(match.start(1), match.end(1), ".")
+        src = buffer.render()
 
         keywords = ["while", "if", "for"]
         for word in keywords:
@@ -255,8 +238,9 @@ class CTokenizer(Tokenizer):
                 if i + 4 < len(src) and word != "if":
                     if src[i] == 'e' and src[i + 1] == 'l' and src[i + 2] == 's' and src[i + 3] == 'e' \
                             and not str.isalpha(src[i + 4]):
-                        while i < len(src) and src[i] != ';':
-                            i += 1
+                        i = src.find(';', i)
+                        if i < 0:
+                            i = len(src)
                         tokens.append(Token("}", i, i))
                         continue
                 tokens.append(Token("}", match.end(2) - 1, match.end(2) - 1))
@@ -265,24 +249,83 @@ class CTokenizer(Tokenizer):
 
     @staticmethod
     def replace_close_brace_in_switch(src, symbol):
+        buffer = SourceBuffer(src)
+        # Скобки находятся в строке один раз, поиск парной скобки переходит от скобки к скобке;
+        # буфер изменяется только при замене скобки, заменённые скобки учитываются как символ symbol
+        braces = [(match.start(), match.group()) for match in re.finditer(r'[{}]', src)]
+        brace_starts = [start for start, _ in braces]
+        replaced = {}
         for match in re.finditer(r'\bswitch\b[^{]+{', src, flags=re.ASCII):
-            i = match.end()
             count_close_brace = 1
-            while i < len(src):
-                if src[i] == '{':
+            for position, brace in islice(braces, bisect_left(brace_starts, match.end()), None):
+                brace = replaced.get(position, brace)
+                if brace == '{':
                     count_close_brace += 1
-                if src[i] == '}':
+                if brace == '}':
                     count_close_brace -= 1
                     if count_close_brace == 0:
-                        src = src[:i] + symbol + src[i + 1:]
+                        buffer[position] = symbol
+                        replaced[position] = symbol
                         break
-                i += 1
-        return src
+        return buffer.render()
+
+    @staticmethod
+    def get_tokens_switch(src):
+        """Токенизирует switch: возвращает (токены, исходный код с заменёнными switch, break и метками case)."""
+        tokens = []
+
+        # Удаление закрывающей } в switch
+        #   Специальный символ $ используется в дальнейшем при токенизации как окончание switch
+        src = CTokenizer.replace_close_brace_in_switch(src, "$")
+
+        # Удаление break из switch
+        buffer = SourceBuffer(src)
+        for match in re.finditer(r'(\bcase|\bdefault)[^:]*:.*?(\bbreak\s*;\s*}?)', src, flags=re.ASCII + re.DOTALL):
+            buffer.mask_range(match.start(2), match.end(2) - 1, CTokenizer.NOT_TOKEN)
+        src = buffer.render()
+
+        # Удаление ключевого слова switch, чтобы оно не было токенизировано как определение функции
+        for match in re.finditer(r'\bswitch[^{]*{', src, flags=re.ASCII):
+            buffer.mask_range(match.start(), match.end(), ';')
+        src = buffer.render()
+
+        for match in re.finditer(r'(\b((case|default)\b[^:]*?:)\s*[{\w])([^}$]*?(?=(}|\$|\bcase\b|\bdefault\b)))', src, flags=re.ASCII):  # $ используется
+            token = Token(CTokenizer.TOKENS["if"], match.start(1), match.end(1))
+            if buffer[token.end - 1] != "{":
+                tokens.append(Token("{", token.end - 2, token.end - 2))
+            tokens.append(token)
+            buffer.mask_range(match.start(2), match.end(2), ';')
+            if buffer[match.start(5)] != "}":
+                tokens.append(Token("}", match.start(5) - 1, match.start(5) - 1))
+        return tokens, buffer.render()
+
+    @staticmethod
+    def find_ternary_operators(src):
+        """
+        Эквивалент TERNARY.finditer(src), который ищет только вокруг символов '?'.
+        Совпадение не содержит ';' до '?' и заканчивается на первой ';' после него,
+        поэтому поиск ограничивается окном между соседними ';'.
+        """
+        pos = 0
+        while True:
+            question = src.find("?", pos)
+            if question < 0:
+                return
+            end = src.find(";", question)
+            if end < 0:
+                return
+            match = CTokenizer.TERNARY.search(src, max(pos, src.rfind(";", 0, question) + 1), end + 1)
+            if match is None:
+                pos = end + 1
+                continue
+            yield match
+            pos = match.end()
 
     @staticmethod
     def get_tokens_ternary_operator(src, replace='.'):
         tokens = []
-        for match in re.finditer(r'(?<=[;}{()\w])\s*(=|\breturn\b)?([^;<>=]+(==|>=|<=|>|<)[^;<>=?]+)(\?[^:;]+)(:[^;]+;)', src, flags=re.ASCII):
+        buffer = SourceBuffer(src)
+        for match in CTokenizer.find_ternary_operators(src):
             tokens.append(Token(CTokenizer.TOKENS["if"], match.start(4), match.start(4)))
             tokens.append(Token("{", match.start(4), match.start(4) + 1))
             tokens.append(Token("}", match.end(4) - 1, match.end(4) - 1))
@@ -292,14 +335,14 @@ class CTokenizer(Tokenizer):
             if match[1] == "=":
                 tokens.append(Token(CTokenizer.TOKENS["assign"], match.start(4), match.start(4) + 2))
                 tokens.append(Token(CTokenizer.TOKENS["assign"], match.start(5), match.start(5) + 2))
-                src = src[:match.start(1)] + "." + src[match.start(1) + 1:]
+                buffer[match.start(1)] = "."
             if match[1] == "return":
                 tokens.append(Token(CTokenizer.TOKENS["return"], match.start(4), match.start(4) + 2))
                 tokens.append(Token(CTokenizer.TOKENS["return"], match.start(5), match.start(5) + 2))
-                src = src[:match.start(1)] + "." * (match.end(1) - match.start(1)) + src[match.end(1):]
-            src = src[:match.start(5)] + ";" + src[match.start(5) + 1:]
-            src = src[:match.start(2)] + replace * (match.end(2) - match.start(2)) + src[match.end(2):]
-        return tokens, src
+                buffer.mask_range(match.start(1), match.end(1), ".")
+            buffer[match.start(5)] = ";"
+            buffer.mask_range(match.start(2), match.end(2), replace)
+        return tokens, buffer.render()
 
     @staticmethod
     def get_function_names(src):
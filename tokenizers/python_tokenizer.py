@@ -1,7 +1,9 @@
 import re
-from operator import attrgetter
+from bisect import bisect_left
+from itertools import islice
 from tokenizers.tokenizer import Tokenizer
-from tokenizers.token import Token
+from tokenizers.token import Token, TokenStream
+from tokenizers.source_buffer import SourceBuffer
 
 
 class PythonTokenizer(Tokenizer):
@@ -63,7 +65,7 @@ class PythonTokenizer(Tokenizer):
         return src
 
     def _process(self, src):
-        tokens = []
+        tokens = TokenStream()
 
         # Замена символьных и строковых констант, например, чтобы ';' - не вносило ошибки в токенизацию
         src = PythonTokenizer.replace_strings(src)
@@ -103,22 +105,26 @@ class PythonTokenizer(Tokenizer):
         src = PythonTokenizer.replace_close_brace_in_switch(src, "$")
 
         # Удаление break из switch
+        buffer = SourceBuffer(src)
         for match in re.finditer(r'(\bcase|\bdefault)[^:]*:.*?(\bbreak\s*;\s*}?)', src, flags=re.ASCII + re.DOTALL):
-            src = src[:match.start(2)] + PythonTokenizer.NOT_TOKEN * (match.end(2) - match.start(2) - 1) + src[match.end(2) - 1:]
+            buffer.mask_range(match.start(2), match.end(2) - 1, PythonTokenizer.NOT_TOKEN)
+        src = buffer.render()
 
         # Удаление ключевого слова switch, чтобы оно не было токенизировано как определение функции
         for match in re.finditer(r'\bswitch[^{]*{', src, flags=re.ASCII):
-            src = src[:match.start()] + ';' * (match.end() - match.start()) + src[match.end():]
+            buffer.mask_range(match.start(), match.end(), ';')
+        src = buffer.render()
 
         # Токенизация switch
         for match in re.finditer(r'(\b((case|default)\b[^:]*?:)\s*[{\w])([^}$]*?(?=(}|\$|\bcase\b|\bdefault\b)))', src, flags=re.ASCII):  # $ используется
             token = Token(PythonTokenizer.TOKENS["if"], match.start(1), match.end(1))
-            if src[token.end - 1] != "{":
+            if buffer[token.end - 1] != "{":
                 tokens.append(Token("{", token.end - 2, token.end - 2))
             tokens.append(token)
-            src = src[:match.start(2)] + ';' * (match.end(2) - match.start(2)) + src[match.end(2):]
-            if src[match.start(5)] != "}":
+            buffer.mask_range(match.start(2), match.end(2), ';')
+            if buffer[match.start(5)] != "}":
                 tokens.append(Token("}", match.start(5) - 1, match.start(5) - 1))
+        src = buffer.render()
 
         # Токенизация условных конструкций
         if_else_tokens = PythonTokenizer.search_tokens(src, r'\b(if|else\s*if)\s*\([^{;]+?\)\s*(?=[{\w*.])|\belse\b', "if")
@@ -214,7 +220,7 @@ class PythonTokenizer(Tokenizer):
         for match in re.finditer(r'}', src, flags=re.ASCII):
             tokens.append(Token("}", match.start(), match.end()))
 
-        return sorted(tokens, key=attrgetter('start', 'end'))
+        return tokens.sorted()
 
     @staticmethod
     def search_tokens(src, pattern, token_key, flags=re.ASCII):
@@ -225,12 +231,7 @@ class PythonTokenizer(Tokenizer):
 
     @staticmethod
     def replace_tokens_in_src(src, tokens, replace=".", is_full_replace=True):
-        for token in tokens:
-            if is_full_replace is True:
-                src = src[:token.start] + replace * (token.end - token.start) + src[token.end:]
-            else:
-                src = src[:token.start] + replace * (token.end - token.start - 1) + src[token.end - 1:]
-        return src
+        return SourceBuffer(src).mask(tokens, replace, is_full_replace).render()
 
     @staticmethod
     def get_tokens_missing_curly_braces(src):
@@ -244,8 +245,10 @@ class PythonTokenizer(Tokenizer):
             tokens.append(Token("{", match.start(1) - 1, match.start(1) - 1))
             tokens.append(Token("}", match.end(1) - 1, match.end(1) - 1))
 
+        buffer = SourceBuffer(src)
         for match in re.finditer(r'\bfor\s*\((([^;]*;\s*){2}[^)]*)\)', src, flags=re.ASCII):
-            src = src[:match.start(1)] + "." * (match.end(1) - match.start(1)) + src[match.end(1):]
+            buffer.mask_range(match.start(1), match.end(1), ".")
+        src = buffer.render()
 
         keywords = ["while", "if", "for"]
         for word in keywords:
@@ -265,23 +268,30 @@ class PythonTokenizer(Tokenizer):
 
     @staticmethod
     def replace_close_brace_in_switch(src, symbol):
+        buffer = SourceBuffer(src)
+        # Скобки находятся в строке один раз, поиск парной скобки переходит от скобки к скобке;
+        # буфер изменяется только при замене скобки, заменённые скобки учитываются как символ symbol
+        braces = [(match.start(), match.group()) for match in re.finditer(r'[{}]', src)]
+        brace_starts = [start for start, _ in braces]
+        replaced = {}
         for match in re.finditer(r'\bswitch\b[^{]+{', src, flags=re.ASCII):
-            i = match.end()
             count_close_brace = 1
-            while i < len(src):
-                if src[i] == '{':
+            for position, brace in islice(braces, bisect_left(brace_starts, match.end()), None):
+                brace = replaced.get(position, brace)
+                if brace == '{':
                     count_close_brace += 1
-                if src[i] == '}':
+                if brace == '}':
                     count_close_brace -= 1
                     if count_close_brace == 0:
-                        src = src[:i] + symbol + src[i + 1:]
+                        buffer[position] = symbol
+                        replaced[position] = symbol
                         break
-                i += 1
-        return src
+        return buffer.render()
 
     @staticmethod
     def get_tokens_ternary_operator(src, replace='.'):
         tokens = []
+        buffer = SourceBuffer(src)
         for match in re.finditer(r'(?<=[;}{()\w])\s*(=|\breturn\b)?([^;<>=]+(==|>=|<=|>|<)[^;<>=?]+)(\?[^:;]+)(:[^;]+;)', src, flags=re.ASCII):
             tokens.append(Token(PythonTokenizer.TOKENS["if"], match.start(4), match.start(4)))
             tokens.append(Token("{", match.start(4), match.start(4) + 1))
@@ -292,14 +302,14 @@ class PythonTokenizer(Tokenizer):
             if match[1] == "=":
                 tokens.append(Token(PythonTokenizer.TOKENS["assign"], match.start(4), match.start(4) + 2))
                 tokens.append(Token(PythonTokenizer.TOKENS["assign"], match.start(5), match.start(5) + 2))
-                src = src[:match.start(1)] + "." + src[match.start(1) + 1:]
+                buffer[match.start(1)] = "."
             if match[1] == "return":
                 tokens.append(Token(PythonTokenizer.TOKENS["return"], match.start(4), match.start(4) + 2))
                 tokens.append(Token(PythonTokenizer.TOKENS["return"], match.start(5), match.start(5) + 2))
-                src = src[:match.start(1)] + "." * (match.end(1) - match.start(1)) + src[match.end(1):]
-            src = src[:match.start(5)] + ";" + src[match.start(5) + 1:]
-            src = src[:match.start(2)] + replace * (match.end(2) - match.start(2)) + src[match.end(2):]
-        return tokens, src
+                buffer.mask_range(match.start(1), match.end(1), ".")
+            buffer[match.start(5)] = ";"
+            buffer.mask_range(match.start(2), match.end(2), replace)
+        return tokens, buffer.render()
 
     @staticmethod
     def get_function_names(src):
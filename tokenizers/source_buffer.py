@@ -0,0 +1,49 @@
+import sys
+from array import array
+
+# Тип элементов массива символов Юникода ('u' объявлен устаревшим начиная с Python 3.13)
+_TYPECODE = "w" if sys.version_info >= (3, 13) else "u"
+
+
+class SourceBuffer:
+    """
+    Изменяемый буфер исходного кода для маскирования токенов.
+    Маскирование заменяет символы на месте без изменения длины, поэтому смещения токенов остаются верными,
+    а сборка строки для следующего прохода регулярных выражений выполняется один раз за O(n).
+    """
+
+    def __init__(self, src):
+        self.__chars = array(_TYPECODE, src)
+        self.__text = src
+
+    def __len__(self):
+        return len(self.__chars)
+
+    def __getitem__(self, index):
+        return self.__chars[index]
+
+    def __setitem__(self, index, symbol):
+        self.mask_range(index, index + 1, symbol)
+
+    def __str__(self):
+        return self.render()
+
+    def mask_range(self, start, end, replace="."):
+        """Заменяет символы в диапазоне [start, end) символом replace."""
+        if len(replace) != 1:
+            raise ValueError("Символ замены должен состоять из одного символа")
+        if end > start:
+            self.__chars[start:end] = array(_TYPECODE, replace * (end - start))
+            self.__text = None
+
+    def mask(self, tokens, replace=".", is_full_replace=True):
+        """Маскирует все токены за один проход; при is_full_replace=False последний символ токена сохраняется."""
+        for token in tokens:
+            self.mask_range(token.start, token.end if is_full_replace is True else token.end - 1, replace)
+        return self
+
+    def render(self):
+        """Возвращает текущее содержимое буфера в виде строки (строка кэшируется до следующего изменения)."""
+        if self.__text is None:
+            self.__text = self.__chars.tounicode()
+        return self.__text
@@ -0,0 +1,320 @@
+import os
+import random
+import re
+from array import array
+from tokenizers.c_tokenizer import CTokenizer
+from tokenizers.token import TokenStream
+from tokenizers.source_buffer import SourceBuffer
+
+
+def _compile(pattern, flags=re.ASCII):
+    return re.compile(pattern, flags)
+
+
+class SegmentPattern:
+    """
+    Выражение этапа токенизации, совпадения которого не содержат символов-разделителей separators
+    и обязательно содержат опорный фрагмент anchor. Поэтому совпадения лежат внутри отрезков между соседними
+    разделителями, где встречается anchor, и finditer проходит только такие отрезки, а не весь исходный код.
+    Просмотр вперёд в конце выражения может видеть следующий за отрезком разделитель.
+    """
+
+    def __init__(self, pattern, separators, anchor):
+        self.pattern = _compile(pattern)
+        self.separators = _compile(separators)
+        self.anchor = _compile(anchor)
+
+    def finditer(self, src):
+        """Эквивалент re.finditer(pattern, src): те же совпадения в том же порядке."""
+        reversed_src = None
+        pos = 0
+        for anchor in self.anchor.finditer(src):
+            if anchor.start() < pos:
+                continue
+            # Левая граница отрезка ищется по развёрнутой строке: ближайший разделитель перед anchor
+            if reversed_src is None:
+                reversed_src = src[::-1]
+            left = self.separators.search(reversed_src, len(src) - anchor.start())
+            segment_start = len(src) - left.start() if left else 0
+            right = self.separators.search(src, anchor.start())
+            segment_end = right.start() if right else len(src)
+            for match in self.pattern.finditer(src, max(pos, segment_start), segment_end + 1):
+                yield match
+                pos = match.end()
+            pos = max(pos, segment_end)
+
+
+class StagedCTokenizer(CTokenizer):
+    """
+    Альтернативный движок токенизации C с тем же результатом, что и CTokenizer (символы токенов и смещения).
+    Этапы и вспомогательные сканеры (тернарный оператор, пропущенные фигурные скобки, switch) общие с CTokenizer,
+    отличается поиск по самым дорогим выражениям: указатели на функцию и определения функций ищутся
+    только в отрезках исходного кода, где они возможны (SegmentPattern). Токены этапа собираются сразу
+    в массивы TokenStream, без промежуточных объектов Token.
+    Одно общее выражение-альтернатива для этапов не подходит: совпадения разных выражений пересекаются
+    (например, a | b++ - это и побитовая операция, и инкремент), а альтернатива находит в каждой позиции
+    только одно из них.
+    """
+    FUNC_PTR = SegmentPattern(r'\w+(\s*\*\s*)*\s*\((\s*\*\s*)+[\w+\[\]]+\s*\)\s*\([^=;]*\)\s*(?=[;=])',
+                              r'[=;]', r'\(\s*\*')
+    FUNC_PTR_DEF = SegmentPattern(r'[\w*\[\]\s]+\s+\([\w*\[\]\s]+\([\w*\[\]\s]+\)\)\s*\([\w*\[\]\s]+\)\s*(?={)',
+                                  r'[^\w*\[\]\s()]', r'\)\)')
+    FUNC = SegmentPattern(r'\w+((\s*\*\s*)+|\s+)\w+\s*\([^{;]*\)\s*(?={)', r'[{;]', r'\)\s*(?={)')
+    CYCLE = _compile(r'\b(for|while)\b\s*\([^{]+?\)\s*(?=[{\w*])')
+    DO = _compile(r'\bdo\b')
+    WHILE_FROM_DO = _compile(r'while\s*\([^;{]+\)\s*;')
+    IF_ELSE = _compile(r'\b(if|else\s*if)\s*\([^{;]+?\)\s*(?=[{\w*.])|\belse\b')
+    CALL = _compile(r'[^-+*/%|$<>^\s]\s*\b(\w+\s*\([^;{]*?\)\s*)(?=;)')
+    CAST = _compile(r'\(\s*\w+(\s*\*?\s*)*\)\s*(?=[\w\(' + CTokenizer.NOT_TOKEN + r'])')
+    STRUCT_PTR = _compile(r'(struct|union)\s*\w+(\s*\*+\s*)+\w+')
+    STRUCTS_AND_RETURN = [
+        (_compile(r'(struct|union)(\s+\w+)?\s*(?={)'), "struct"),
+        (_compile(r'(struct|union)\s+\w+\s+\w+[\[\]\d]*(\s*,\s*\w+[\[\]\d]*\s*)*\s*(?=[;=])'), "struct"),
+        (_compile(r'\breturn\b[^;]*;'), "return"),
+    ]
+    RETURN = _compile(r'\breturn\b')
+    PTR = _compile(r'({int_types}|{char_types}|{float_types}|void)(\s*\*+\s*)+(\s*const\s+)?\w+[\[\]\d:]*'
+                   r'(\s*,(\s*\*+\s*)+(\s*const\s+)?\w+[\[\]\d]*\s*)*\s*(?=[;=])'
+                   .format(int_types=CTokenizer.INT_TYPES, char_types=CTokenizer.CHAR_TYPES,
+                           float_types=CTokenizer.FLOAT_TYPES))
+    DECLARATIONS = [
+        (_compile(r'({types})\s+\w+[\[\]\d:]*(\s*,\s*\w+[\[\]\d]*\s*)*\s*(?=[;=])'.format(types=types)), token_key)
+        for types, token_key in [(CTokenizer.CHAR_TYPES, "char"), (CTokenizer.FLOAT_TYPES, "double"),
+                                 (CTokenizer.INT_TYPES, "int")]
+    ] + [(_compile(r'\bcontinue\s*;|\bbreak\s*;|\bgoto\s+\w+;'), "control")]
+    COMPOUND_ASSIGN = _compile(r'(<<|>>|&|\^|\||\+|-|\*|/|%)=')
+    OPERATORS = [
+        (_compile(r'\w+\+\+|\+\+\w+'), "math"),
+        (_compile(r'\w+--|--\w+'), "math"),
+        (_compile(r'(?<=[\w\d)])\s*\*'), "math"),
+        (_compile(r'(?<=@)\*'), "math"),
+        (_compile(r'(?<![@={}><|&\s+-.])\s*[+\-/%]\s*(?![>\s+-])'), "math"),
+        (_compile(r'(?<=@)[+\-/%]\s*(?![>\s+-])'), "math"),
+        (_compile(r'&&|\|\||!'), "logic"),
+        (_compile(r'\w+\s*(<<|>>|&|\^|\|)\s*\w+'), "shift"),
+        (_compile(r'(?<=@)(<<|>>|&|\^|\|)\s*\w+'), "shift"),
+        (_compile(r'~'), "shift"),
+        (_compile(r'==|((?<!-)>)|(?<!<)<[^<]|<=|>=|!='), "compare"),
+    ]
+    ASSIGN_BRACES = _compile(r'[=@]\s*{[^;]*}\s*;')
+    ASSIGN = _compile(r'(?<!=)[=@][^=;]+;?')
+    BRACES = _compile(r'[{}]')
+
+    def _process(self, src):
+        tokens = TokenStream()
+
+        # Замена символьных и строковых констант и директив #define
+        src = CTokenizer.replace_macros(CTokenizer.replace_strings(src))
+
+        # Токенизация тернарного оператора
+        ternary_tokens, src = CTokenizer.get_tokens_ternary_operator(src)
+        tokens += ternary_tokens
+
+        # Токенизация указателей на функцию и определений функций, возвращающих указатель на функцию
+        for pattern, token_key in [(StagedCTokenizer.FUNC_PTR, "ptr"), (StagedCTokenizer.FUNC_PTR_DEF, "func")]:
+            stage_tokens = StagedCTokenizer.scan(src, pattern, token_key)
+            src = StagedCTokenizer.mask(src, stage_tokens)
+            tokens += stage_tokens
+
+        # Получение токенов не расставленных фигурных скобок после for, while, do, if, else
+        tokens += CTokenizer.get_tokens_missing_curly_braces(src)
+
+        # Токенизация циклов
+        cycle_tokens = StagedCTokenizer.scan(src, StagedCTokenizer.CYCLE, "cycle")
+        src = StagedCTokenizer.mask(src, cycle_tokens)
+        tokens += cycle_tokens
+        tokens += StagedCTokenizer.scan(src, StagedCTokenizer.DO, "cycle")
+        src = StagedCTokenizer.mask(src, StagedCTokenizer.scan(src, StagedCTokenizer.WHILE_FROM_DO, "cycle"))
+
+        # Токенизация switch
+        switch_tokens, src = CTokenizer.get_tokens_switch(src)
+        tokens += switch_tokens
+
+        # Токенизация условных конструкций и определений функций
+        for pattern, token_key in [(StagedCTokenizer.IF_ELSE, "if"), (StagedCTokenizer.FUNC, "func")]:
+            stage_tokens = StagedCTokenizer.scan(src, pattern, token_key)
+            src = StagedCTokenizer.mask(src, stage_tokens)
+            tokens += stage_tokens
+
+        # Токенизация вызова функции: токен захватывает следующий за группой символ, который не маскируется
+        call_tokens = StagedCTokenizer.scan(src, StagedCTokenizer.CALL, "call", group=1, extend=1)
+        src = StagedCTokenizer.mask(src, call_tokens, is_full_replace=False)
+        tokens += call_tokens
+
+        # Токенизация приведения типа и указателя на структуру
+        for pattern, token_key in [(StagedCTokenizer.CAST, "cast"), (StagedCTokenizer.STRUCT_PTR, "ptr")]:
+            stage_tokens = StagedCTokenizer.scan(src, pattern, token_key)
+            src = StagedCTokenizer.mask(src, stage_tokens)
+            tokens += stage_tokens
+
+        # Токенизация структур и возврата из функции
+        for pattern, token_key in StagedCTokenizer.STRUCTS_AND_RETURN:
+            tokens += StagedCTokenizer.scan(src, pattern, token_key)
+        src = StagedCTokenizer.RETURN.sub(CTokenizer.NOT_TOKEN * 6, src)
+
+        # Токенизация основных типов данных и управляющих конструкций
+        pointers = StagedCTokenizer.scan(src, StagedCTokenizer.PTR, "ptr")
+        src = StagedCTokenizer.mask(src, pointers)
+        tokens += pointers
+        for pattern, token_key in StagedCTokenizer.DECLARATIONS:
+            tokens += StagedCTokenizer.scan(src, pattern, token_key)
+
+        # Токенизация сочетаний оператора присваивания (длина строки не меняется)
+        #   Специальный символ @ используется для токенизации этих сочетаний в правильном порядке
+        src = StagedCTokenizer.COMPOUND_ASSIGN.sub(r'@\1', src)
+
+        # Токенизация математических, логических, побитовых операций и сравнений
+        for pattern, token_key in StagedCTokenizer.OPERATORS:
+            tokens += StagedCTokenizer.scan(src, pattern, token_key)
+
+        # Токенизация присваивания
+        assign_tokens = StagedCTokenizer.scan(src, StagedCTokenizer.ASSIGN_BRACES, "assign")
+        src = StagedCTokenizer.mask(src, assign_tokens)
+        tokens += assign_tokens
+        tokens += StagedCTokenizer.scan(src, StagedCTokenizer.ASSIGN, "assign")
+
+        # Токенизация фигурных скобок за один проход: позиции { и } не пересекаются,
+        #   поэтому порядок после сортировки совпадает с двумя отдельными проходами
+        braces = [match.start() for match in StagedCTokenizer.BRACES.finditer(src)]
+        tokens += TokenStream.from_arrays([ord(src[start]) for start in braces], braces,
+                                          [start + 1 for start in braces])
+
+        return tokens.sorted()
+
+    @staticmethod
+    def scan(src, pattern, token_key, group=0, extend=0):
+        """
+        Находит токены типа token_key по выражению (re.Pattern или SegmentPattern) и возвращает их в TokenStream.
+        Токен - диапазон группы group совпадения, конец которого сдвинут на extend символов.
+        """
+        starts = array(TokenStream.TYPECODE)
+        ends = array(TokenStream.TYPECODE)
+        for match in pattern.finditer(src):
+            start, end = match.span(group)
+            starts.append(start)
+            ends.append(end + extend)
+        codes = array(TokenStream.TYPECODE, [ord(CTokenizer.TOKENS[token_key])]) * len(starts)
+        return TokenStream.from_arrays(codes, starts, ends)
+
+    @staticmethod
+    def mask(src, tokens, replace=".", is_full_replace=True):
+        """Маскирует токены этапа в исходном коде; если токенов нет, строка не копируется."""
+        if not len(tokens):
+            return src
+        return SourceBuffer(src).mask(tokens, replace, is_full_replace).render()
+
+
+def generate_c_source(seed, functions=20):
+    """Генерирует синтетическую программу на C для проверки эквивалентности токенизаторов."""
+    rnd = random.Random(seed)
+    types = ["int", "char", "double", "float", "long", "unsigned int", "short", "long long"]
+    names = ["a", "b", "count", "value", "idx", "total", "ptr", "buf", "tmp", "result"]
+
+    def expression():
+        parts = [rnd.choice(names + ["1", "42", "0"])]
+        for _ in range(rnd.randint(0, 3)):
+            parts.append(rnd.choice(["+", "-", "*", "/", "%", "<<", ">>", "&", "|", "^", "&&", "||"]))
+            parts.append(rnd.choice(names + ["2", "7"]))
+        return " ".join(parts)
+
+    def statement(depth):
+        kind = rnd.randint(0, 15 if depth < 3 else 7)
+        indent = "    " * (depth + 1)
+        if kind == 0:
+            return f"{indent}{rnd.choice(types)} {rnd.choice(names)} = {expression()};"
+        if kind == 1:
+            return f"{indent}{rnd.choice(names)} {rnd.choice(['=', '+=', '-=', '*=', '<<=', '|='])} {expression()};"
+        if kind == 2:
+            return f"{indent}{rnd.choice(names)}{rnd.choice(['++', '--'])};"
+        if kind == 3:
+            return f'{indent}printf("%d {rnd.choice(names)};\\n", {rnd.choice(names)});'
+        if kind == 4:
+            return f"{indent}{rnd.choice(names)} = ({rnd.choice(types)}) {rnd.choice(names)};"
+        if kind == 5:
+            return f"{indent}{rnd.choice(types)} *{rnd.choice(names)} = &{rnd.choice(names)};"
+        if kind == 6:
+            return f"{indent}{rnd.choice(names)} = {rnd.choice(names)} > {rnd.choice(names)} ? {expression()} : {expression()};"
+        if kind == 7:
+            return f"{indent}// {rnd.choice(names)} комментарий"
+        if kind == 8:
+            body = "\n".join(statement(depth + 1) for _ in range(rnd.randint(1, 3)))
+            tail = ""
+            if rnd.random() < 0.5:
+                tail = " else {\n" + statement(depth + 1) + "\n" + indent + "}"
+            return f"{indent}if ({expression()} {rnd.choice(['==', '!=', '<', '>=', '<='])} {rnd.choice(names)}) {{\n{body}\n{indent}}}{tail}"
+        if kind == 9:
+            return f"{indent}if ({rnd.choice(names)} != 0)\n{statement(depth + 1)}"
+        if kind == 10:
+            body = "\n".join(statement(depth + 1) for _ in range(rnd.randint(1, 3)))
+            return f"{indent}for (int i = 0; i < {rnd.choice(names)}; i++) {{\n{body}\n{indent}}}"
+        if kind == 11:
+            body = "\n".join(statement(depth + 1) for _ in range(rnd.randint(1, 2)))
+            return f"{indent}while ({rnd.choice(names)} > 0) {{\n{body}\n{indent}}}"
+        if kind == 12:
+            return f"{indent}do {{\n{statement(depth + 1)}\n{indent}}} while ({rnd.choice(names)} < 10);"
+        if kind == 13:
+            cases = []
+            for value in range(rnd.randint(1, 3)):
+                cases.append(f"{indent}case {value}:\n{statement(depth + 1)}\n{indent}    break;")
+            cases.append(f"{indent}default:\n{statement(depth + 1)}")
+            return f"{indent}switch ({rnd.choice(names)}) {{\n" + "\n".join(cases) + f"\n{indent}}}"
+        if kind == 14:
+            return f"{indent}struct point {rnd.choice(names)};"
+        return f"{indent}/* блок\n{indent}   комментария */ {rnd.choice(names)} = {rnd.choice(names)}({expression()});"
+
+    lines = ["#include <stdio.h>", "#define SIZE 100", "", "struct point {", "    int x;", "    int y;", "};", ""]
+    function_names = [f"func{i}" for i in range(functions)]
+    for name in function_names:
+        lines.append(f"{rnd.choice(types)} {name}({rnd.choice(types)} {rnd.choice(names)}, int n) {{")
+        lines += [statement(0) for _ in range(rnd.randint(3, 10))]
+        lines.append(f"    return {expression()};")
+        lines.append("}")
+        lines.append("")
+    lines.append("int main() {")
+    lines += [f"    {name}(1, 2);" for name in function_names[:5]]
+    lines.append("    return 0;")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def diff_tokenizers(src, reference=None, candidate=None):
+    """Сравнивает токены двух токенизаторов и возвращает список расхождений (индекс, эталон, кандидат)."""
+    reference = reference or CTokenizer()
+    candidate = candidate or StagedCTokenizer()
+    expected = [(token.symbol, token.start, token.end) for token in reference.tokenize(src)]
+    actual = [(token.symbol, token.start, token.end) for token in candidate.tokenize(src)]
+    diffs = []
+    for i in range(max(len(expected), len(actual))):
+        expected_token = expected[i] if i < len(expected) else None
+        actual_token = actual[i] if i < len(actual) else None
+        if expected_token != actual_token:
+            diffs.append((i, expected_token, actual_token))
+    return diffs
+
+
+def check_equivalence(sources):
+    """Проверяет эквивалентность StagedCTokenizer и CTokenizer на наборе исходников {имя: текст}."""
+    failures = {}
+    for name, src in sources.items():
+        diffs = diff_tokenizers(src)
+        if diffs:
+            failures[name] = diffs
+    return failures
+
+
+if __name__ == "__main__":
+    # Режим проверки эквивалентности на тестовых примерах и синтетическом корпусе C
+    test_examples_dir = os.path.join(os.path.dirname(__file__), '..', 'test_examples')
+    sources = {}
+    for file_name in sorted(os.listdir(test_examples_dir)):
+        if not file_name.endswith(".py"):
+            continue
+        with open(os.path.join(test_examples_dir, file_name), encoding='utf-8') as file:
+            sources[file_name] = file.read()
+    for seed in range(50):
+        sources[f"synthetic_{seed}.c"] = generate_c_source(seed)
+
+    failures = check_equivalence(sources)
+    for name, diffs in failures.items():
+        print(f"{name}: {len(diffs)} расхождений, первое: {diffs[0]}")
+    print(f"Проверено файлов: {len(sources)}, с расхождениями: {len(failures)}")
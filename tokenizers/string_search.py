@@ -0,0 +1,81 @@
+from collections import deque
+
+
+def kmp_prefix_function(pattern):
+    """Вычисляет префикс-функцию Кнута — Морриса — Пратта для образца."""
+    prefix = [0] * len(pattern)
+    k = 0
+    for i in range(1, len(pattern)):
+        while k > 0 and pattern[i] != pattern[k]:
+            k = prefix[k - 1]
+        if pattern[i] == pattern[k]:
+            k += 1
+        prefix[i] = k
+    return prefix
+
+
+def kmp_find_all(text, pattern):
+    """Находит все (в том числе перекрывающиеся) вхождения образца в текст за O(len(text) + len(pattern))."""
+    if not pattern:
+        yield from range(len(text) + 1)
+        return
+    prefix = kmp_prefix_function(pattern)
+    k = 0
+    for i, symbol in enumerate(text):
+        while k > 0 and symbol != pattern[k]:
+            k = prefix[k - 1]
+        if symbol == pattern[k]:
+            k += 1
+        if k == len(pattern):
+            yield i - k + 1
+            k = prefix[k - 1]
+
+
+def kmp_find(text, pattern):
+    """Возвращает позицию первого вхождения образца в текст или -1."""
+    return next(kmp_find_all(text, pattern), -1)
+
+
+class AhoCorasick:
+    """Автомат Ахо — Корасик для поиска всех вхождений набора образцов за один проход по тексту."""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.__goto = [{}]
+        self.__fail = [0]
+        self.__output = [[]]
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("Образец не может быть пустым")
+            state = 0
+            for symbol in pattern:
+                if symbol not in self.__goto[state]:
+                    self.__goto.append({})
+                    self.__fail.append(0)
+                    self.__output.append([])
+                    self.__goto[state][symbol] = len(self.__goto) - 1
+                state = self.__goto[state][symbol]
+            self.__output[state].append(index)
+        self.__build_fail_links()
+
+    def __build_fail_links(self):
+        queue = deque(self.__goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for symbol, next_state in self.__goto[state].items():
+                queue.append(next_state)
+                fail = self.__fail[state]
+                while fail and symbol not in self.__goto[fail]:
+                    fail = self.__fail[fail]
+                self.__fail[next_state] = self.__goto[fail].get(symbol, 0)
+                self.__output[next_state] += self.__output[self.__fail[next_state]]
+
+    def find_all(self, text):
+        """Возвращает пары (индекс образца, позиция начала) для всех вхождений в порядке их окончания."""
+        state = 0
+        for i, symbol in enumerate(text):
+            while state and symbol not in self.__goto[state]:
+                state = self.__fail[state]
+            state = self.__goto[state].get(symbol, 0)
+            for index in self.__output[state]:
+                yield index, i - len(self.patterns[index]) + 1
@@ -1,4 +1,11 @@
+from array import array
+import numpy as np
+from tokenizers.string_search import AhoCorasick, kmp_find, kmp_find_all
+
+
 class Token:
+    __slots__ = ("__symbol", "__start", "__end")
+
     def __init__(self, symbol, start, end):
         self.__symbol = symbol
         self.__start = start
@@ -18,18 +25,170 @@ class Token:
 
     @staticmethod
     def get_tokens_str_from_token_list(token_list):
-        token_str = ""
-        for token in sorted(token_list, key=lambda tok: tok.start):
-            token_str += token.symbol
-        return token_str
+        if isinstance(token_list, TokenStream):
+            if not token_list.is_sorted(by_end=False):
+                token_list = token_list.sorted(by_end=False)
+            return token_list.symbols_str()
+        if any(token_list[i].start < token_list[i - 1].start for i in range(1, len(token_list))):
+            token_list = sorted(token_list, key=lambda tok: tok.start)
+        return "".join([token.symbol for token in token_list])
 
     @staticmethod
     def find_border_tokens_str_in_token_list(token_list, token_str):
-        for i in range(len(token_list)):
-            j = 0
-            while j < len(token_str) and i + j < len(token_list) and token_list[i + j].symbol == token_str[j]:
-                j += 1
-            if j == len(token_str):
-                return token_list[i].start, token_list[i + j - 1].end
-            i += 1
-        return None
+        if isinstance(token_list, TokenStream):
+            symbols = token_list.symbols_str()
+        else:
+            symbols = "".join([token.symbol for token in token_list])
+        i = kmp_find(symbols, token_str) if token_list else -1
+        if i < 0:
+            return None
+        return token_list[i].start, token_list[i + len(token_str) - 1].end
+
+
+class TokenStream:
+    """
+    Компактный контейнер токенов: символы, начала и концы хранятся в параллельных массивах array('i').
+    Символ токена хранится кодом Юникода, поэтому поддерживаются только односимвольные токены.
+    При итерации и индексации возвращаются объекты Token, что сохраняет совместимость со списками токенов.
+    """
+    TYPECODE = "i"
+
+    def __init__(self, tokens=()):
+        self.__codes = array(TokenStream.TYPECODE)
+        self.__starts = array(TokenStream.TYPECODE)
+        self.__ends = array(TokenStream.TYPECODE)
+        self.extend(tokens)
+
+    @classmethod
+    def from_arrays(cls, codes, starts, ends):
+        """Создаёт поток из готовых массивов кодов символов, начал и концов токенов."""
+        if not len(codes) == len(starts) == len(ends):
+            raise ValueError("Массивы токенов должны иметь одинаковую длину")
+        stream = cls()
+        stream.__codes = TokenStream.__to_array(codes)
+        stream.__starts = TokenStream.__to_array(starts)
+        stream.__ends = TokenStream.__to_array(ends)
+        return stream
+
+    @staticmethod
+    def __to_array(values):
+        if isinstance(values, np.ndarray):
+            return array(TokenStream.TYPECODE, values.astype(np.intc).tobytes())
+        return array(TokenStream.TYPECODE, values)
+
+    @staticmethod
+    def __view(values):
+        return np.frombuffer(values, dtype=np.intc)
+
+    @property
+    def codes(self):
+        return self.__codes
+
+    @property
+    def starts(self):
+        return self.__starts
+
+    @property
+    def ends(self):
+        return self.__ends
+
+    def append(self, token):
+        self.add(token.symbol, token.start, token.end)
+
+    def add(self, symbol, start, end):
+        self.__codes.append(ord(symbol))
+        self.__starts.append(start)
+        self.__ends.append(end)
+
+    def extend(self, tokens):
+        if isinstance(tokens, TokenStream):
+            self.__codes.extend(tokens.codes)
+            self.__starts.extend(tokens.starts)
+            self.__ends.extend(tokens.ends)
+        else:
+            for token in tokens:
+                self.add(token.symbol, token.start, token.end)
+
+    def __iadd__(self, tokens):
+        self.extend(tokens)
+        return self
+
+    def __len__(self):
+        return len(self.__codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TokenStream.from_arrays(self.__codes[index], self.__starts[index], self.__ends[index])
+        return Token(chr(self.__codes[index]), self.__starts[index], self.__ends[index])
+
+    def __iter__(self):
+        for code, start, end in zip(self.__codes, self.__starts, self.__ends):
+            yield Token(chr(code), start, end)
+
+    def is_sorted(self, by_end=True):
+        """Проверяет, упорядочен ли поток по (start, end) или только по start."""
+        starts = TokenStream.__view(self.__starts)
+        steps = np.diff(starts)
+        if by_end:
+            ends = TokenStream.__view(self.__ends)
+            return bool(np.all((steps > 0) | ((steps == 0) & (np.diff(ends) >= 0))))
+        return bool(np.all(steps >= 0))
+
+    def sorted(self, by_end=True):
+        """Возвращает новый поток, устойчиво отсортированный по (start, end) или только по start."""
+        starts = TokenStream.__view(self.__starts)
+        ends = TokenStream.__view(self.__ends)
+        order = np.lexsort((ends, starts)) if by_end else np.argsort(starts, kind="stable")
+        return TokenStream.from_arrays(TokenStream.__view(self.__codes)[order], starts[order], ends[order])
+
+    def symbols_str(self):
+        """Возвращает строку символов токенов в порядке хранения."""
+        return TokenStream.__view(self.__codes).astype("<u4").tobytes().decode("utf-32-le")
+
+
+class TokenStringIndex:
+    """
+    Строка символов токенов вместе с отображением позиций строки в смещения исходного кода.
+    Позиция i строки соответствует i-му токену, поэтому любое найденное вхождение [i, j)
+    переводится в диапазон исходного кода за O(1).
+    """
+
+    def __init__(self, token_list):
+        stream = token_list if isinstance(token_list, TokenStream) else TokenStream(token_list)
+        if not stream.is_sorted(by_end=False):
+            stream = stream.sorted(by_end=False)
+        self.token_str = stream.symbols_str()
+        self.__starts = stream.starts
+        self.__ends = stream.ends
+
+    def __len__(self):
+        return len(self.token_str)
+
+    def source_range(self, begin, end):
+        """Возвращает (start, end) исходного кода для токенов строки в диапазоне [begin, end)."""
+        if not 0 <= begin < end <= len(self.token_str):
+            raise IndexError("Диапазон токенов вне строки токенов")
+        return self.__starts[begin], self.__ends[end - 1]
+
+    def find(self, fragment):
+        """Возвращает диапазон исходного кода первого вхождения фрагмента или None."""
+        begin = kmp_find(self.token_str, fragment) if fragment else -1
+        return self.source_range(begin, begin + len(fragment)) if begin >= 0 else None
+
+    def find_all(self, fragment):
+        """Возвращает диапазоны исходного кода всех вхождений фрагмента."""
+        if not fragment:
+            return []
+        return [self.source_range(begin, begin + len(fragment)) for begin in kmp_find_all(self.token_str, fragment)]
+
+    def find_fragments(self, fragments):
+        """Находит за один проход все вхождения набора фрагментов: {фрагмент: [(start, end), ...]}."""
+        fragments = list(dict.fromkeys(fragment for fragment in fragments if fragment))
+        result = {fragment: [] for fragment in fragments}
+        if not fragments:
+            return result
+        for index, begin in AhoCorasick(fragments).find_all(self.token_str):
+            result[fragments[index]].append(self.source_range(begin, begin + len(fragments[index])))
+        for ranges in result.values():
+            ranges.sort()
+        return result
@@ -0,0 +1,175 @@
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from tokenizers.token import Token, TokenStream
+
+
+def default_cache_dir():
+    """Каталог кэша по умолчанию: переменная окружения CODE_CLONE_CACHE_DIR или ~/.cache/code_clone_detector."""
+    return os.environ.get("CODE_CLONE_CACHE_DIR",
+                          os.path.join(os.path.expanduser("~"), ".cache", "code_clone_detector"))
+
+
+class DiskCache:
+    """
+    Кэш на диске с адресацией по ключу и вытеснением давно не использованных записей (LRU) по суммарному размеру.
+    Каждая запись хранится в отдельном файле и записывается атомарно (временный файл + os.replace),
+    поэтому параллельные читатели видят либо старую, либо новую запись целиком.
+    Время последнего использования хранится во времени модификации файла.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.__size = None
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Возвращает содержимое записи или None, если записи нет."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key, data):
+        """Сохраняет запись и при превышении лимита вытесняет самые старые записи."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        if self.__size is None:
+            self.__size = self.total_size()
+        else:
+            self.__size += len(data)
+        if self.__size > self.max_bytes:
+            self.evict()
+
+    def entries(self):
+        """Возвращает список (время использования, размер, путь) для всех записей."""
+        entries = []
+        for root, _, file_names in os.walk(self.directory):
+            for file_name in file_names:
+                if file_name.startswith(".tmp-"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, file_name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, os.path.join(root, file_name)))
+        return entries
+
+    def total_size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Удаляет давно не использованные записи, пока размер кэша превышает лимит."""
+        entries = sorted(self.entries())
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in entries:
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self.__size = size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.__size = 0
+
+
+class TokenCache(DiskCache):
+    """
+    Кэш результатов токенизации. Ключ — хэш содержимого исходного кода, класса и версии (VERSION) токенизатора
+    и дополнительных параметров, влияющих на результат; значение — компактный поток токенов и строка символов токенов.
+    """
+    MAGIC = b"CCDT"
+    FORMAT = 1
+    HEADER = struct.Struct("<4sII")
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024):
+        super().__init__(directory or os.path.join(default_cache_dir(), "tokens"), max_bytes)
+
+    @staticmethod
+    def key(src, tokenizer, **params):
+        """Вычисляет ключ записи по содержимому исходного кода, токенизатору и параметрам."""
+        tokenizer_type = type(tokenizer)
+        digest = hashlib.sha256()
+        digest.update(src.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+        description = [tokenizer_type.__module__, tokenizer_type.__qualname__, getattr(tokenizer, "VERSION", 0),
+                       sorted(params.items()), TokenCache.FORMAT, sys.byteorder]
+        digest.update(repr(description).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_tokens(self, src, tokenizer, **params):
+        """Возвращает (поток токенов, строка токенов) из кэша или None."""
+        data = self.get(TokenCache.key(src, tokenizer, **params))
+        return None if data is None else TokenCache.decode(data)
+
+    def tokenize(self, src, tokenizer, **params):
+        """Токенизирует исходный код, используя кэш; возвращает (поток токенов, строка токенов)."""
+        key = TokenCache.key(src, tokenizer, **params)
+        data = self.get(key)
+        if data is not None:
+            cached = TokenCache.decode(data)
+            if cached is not None:
+                return cached
+        tokens = tokenizer.tokenize(src)
+        if not isinstance(tokens, TokenStream):
+            tokens = TokenStream(tokens)
+        token_str = Token.get_tokens_str_from_token_list(tokens)
+        self.put(key, TokenCache.encode(tokens, token_str))
+        return tokens, token_str
+
+    def get_tokens_str(self, src, tokenizer, **params):
+        """Возвращает строку символов токенов, токенизируя исходный код только при промахе кэша."""
+        return self.tokenize(src, tokenizer, **params)[1]
+
+    @staticmethod
+    def encode(tokens, token_str):
+        symbols = token_str.encode("utf-8")
+        return b"".join([TokenCache.HEADER.pack(TokenCache.MAGIC, len(tokens), len(symbols)),
+                         tokens.codes.tobytes(), tokens.starts.tobytes(), tokens.ends.tobytes(), symbols])
+
+    @staticmethod
+    def decode(data):
+        """Восстанавливает запись; для повреждённой записи возвращает None."""
+        if len(data) < TokenCache.HEADER.size:
+            return None
+        magic, count, symbols_length = TokenCache.HEADER.unpack_from(data)
+        item_size = array(TokenStream.TYPECODE).itemsize
+        arrays_length = 3 * count * item_size
+        if magic != TokenCache.MAGIC or len(data) != TokenCache.HEADER.size + arrays_length + symbols_length:
+            return None
+        columns = []
+        offset = TokenCache.HEADER.size
+        for _ in range(3):
+            column = array(TokenStream.TYPECODE)
+            column.frombytes(data[offset:offset + count * item_size])
+            columns.append(column)
+            offset += count * item_size
+        return TokenStream.from_arrays(*columns), data[offset:].decode("utf-8")
@@ -2,6 +2,8 @@ from abc import ABC, abstractmethod
 
 
 class Tokenizer(ABC):
+    VERSION = 1  # Увеличивается при любом изменении результата токенизации (используется в ключе кэша)
+
     def tokenize(self, src):
         src_with_replace_import = self.replace_import(src)
         src_with_replace_comments = self.replace_comments(src_with_replace_import)